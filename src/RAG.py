@@ -1,29 +1,431 @@
 # This file contains import functions for the connection to the RAG Databank with valuable information of the DUUI System
 
-import chromadb as cdb
-import ollama
-from utils import embed_ollama, get_rag_path
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from utils import embed_ollama, embed_ollama_batch, embedding_signature, get_rag_path
+from embeddings import check_collection_signature
 
 
 DATABASE_RAG = "DUUI_RAG_PYTHON"
-RAG_PATH = get_rag_path()
+# diversified retrieval: candidates fetched per result, relevance weight of MMR, chunks per file
+FETCH_FACTOR = 4
+MMR_LAMBDA = 0.7
+MAX_PER_FILE = 2
+
+
+def _get_client():
+    """
+    Opens the persistent Chroma client, chromadb and the RAG path are only resolved on first use.
+    """
+    import chromadb as cdb
+    return cdb.PersistentClient(get_rag_path())
+
+
 def init_run_db():
-    client = cdb.PersistentClient(RAG_PATH)
+    client = _get_client()
     collection =client.get_or_create_collection(name="test_OLLAMA")
     collection.add()
 
-def _get_collection():
-    pass
+def _get_collection(collection_name: str):
+    collection = _get_client().get_or_create_collection(name=collection_name)
+    if collection.count() > 0:
+        check_collection_signature(collection, embedding_signature())
+    return collection
 
 
-def query_results(query_input: str, collection_name: str, n_results: int = 5):
-    client = cdb.PersistentClient(RAG_PATH)
-    collection = client.get_or_create_collection(name=collection_name)
+def query_results(
+    query_input: str,
+    collection_name: str,
+    n_results: int = 5,
+    where: dict | None = None,
+    diversify: bool = False,
+    fetch_k: int | None = None,
+    mmr_lambda: float = MMR_LAMBDA,
+    max_per_file: int | None = MAX_PER_FILE,
+    query_embedding: list[float] | None = None,
+):
+    """
+    Top n_results chunks for the question. With diversify, fetch_k candidates (default
+    4 * n_results) are retrieved and reduced by diversify_results.
+    query_embedding skips embedding the question if the caller already has its vector.
+    """
+    collection = _get_collection(collection_name)
     if collection.count() == 0:
         raise Exception("Collection is Empty.")
     # use proper embedding ollama
-    embedding_input = embed_ollama(query_input)
-    return collection.query(query_embeddings=embedding_input, n_results=n_results)
+    embedding_input = embed_ollama(query_input) if query_embedding is None else list(query_embedding)
+    if not diversify:
+        return collection.query(query_embeddings=embedding_input, n_results=n_results, where=where)
+    candidates = collection.query(
+        query_embeddings=[embedding_input],
+        n_results=max(fetch_k or FETCH_FACTOR * n_results, n_results),
+        where=where,
+        include=["documents", "metadatas", "distances", "embeddings"],
+    )
+    return diversify_results(candidates, embedding_input, n_results, mmr_lambda=mmr_lambda, max_per_file=max_per_file)
+
+
+def _collection_space(collection) -> str:
+    """
+    Returns the distance space of a collection ("l2", "cosine" or "ip").
+    """
+    config = getattr(collection, "configuration", None) or {}
+    hnsw = config.get("hnsw") if isinstance(config, dict) else None
+    if isinstance(hnsw, dict) and hnsw.get("space"):
+        return hnsw["space"]
+    return (collection.metadata or {}).get("hnsw:space", "l2")
+
+
+def _distance_to_similarity(distance: float, space: str) -> float:
+    """
+    Maps a raw Chroma distance to a cosine similarity so results of collections
+    with different distance spaces can be ranked together.
+    The mxbai embeddings are unit length, so squared l2 = 2 - 2 * cos.
+    """
+    if space == "l2":
+        return 1.0 - distance / 2.0
+    # cosine: 1 - cos, ip: 1 - dot
+    return 1.0 - distance
+
+
+def _query_collection(
+    client,
+    collection_name: str,
+    embedding: list[float],
+    n_results: int,
+    where: dict | None = None,
+    with_embeddings: bool = False,
+):
+    collection = client.get_collection(name=collection_name)
+    if collection.count() == 0:
+        return collection_name, None, None
+    check_collection_signature(collection, embedding_signature())
+    include = ["documents", "metadatas", "distances"]
+    result = collection.query(
+        query_embeddings=[embedding],
+        n_results=n_results,
+        where=where,
+        include=include + ["embeddings"] if with_embeddings else include,
+    )
+    return collection_name, _collection_space(collection), result
+
+
+def merge_query_results(results: list[tuple[str, str, dict]], n_results: int) -> dict:
+    """
+    Merges the query results of several collections into one ranked list.
+    Distances are normalised to cosine similarity and duplicates (same stable chunk ID)
+    are collapsed onto their best hit.
+    """
+    best: dict[str, dict] = {}
+    for collection_name, space, result in results:
+        if not result:
+            continue
+        ids = result.get("ids", [[]])[0]
+        documents = (result.get("documents") or [[]])[0]
+        metadatas = (result.get("metadatas") or [[]])[0]
+        distances = (result.get("distances") or [[]])[0]
+        # embeddings are numpy arrays in chroma >= 0.5, no truth value tests on them
+        embeddings = result.get("embeddings")
+        embeddings = embeddings[0] if embeddings is not None else None
+        for i, chunk_id in enumerate(ids):
+            similarity = _distance_to_similarity(float(distances[i]), space)
+            current = best.get(chunk_id)
+            if current is not None and current["similarity"] >= similarity:
+                continue
+            best[chunk_id] = {
+                "id": chunk_id,
+                "document": documents[i] if i < len(documents) else None,
+                "metadata": metadatas[i] if i < len(metadatas) else {},
+                "similarity": similarity,
+                "collection": collection_name,
+                "embedding": embeddings[i] if embeddings is not None else None,
+            }
+
+    ranked = sorted(best.values(), key=lambda hit: (-hit["similarity"], hit["id"]))[:n_results]
+    merged = {
+        "ids": [[hit["id"] for hit in ranked]],
+        "documents": [[hit["document"] for hit in ranked]],
+        "metadatas": [[hit["metadata"] for hit in ranked]],
+        "distances": [[1.0 - hit["similarity"] for hit in ranked]],
+        "collections": [[hit["collection"] for hit in ranked]],
+    }
+    if ranked and all(hit["embedding"] is not None for hit in ranked):
+        merged["embeddings"] = [[hit["embedding"] for hit in ranked]]
+    return merged
+
+
+def query_results_federated(
+    query_input: str,
+    collection_names: list[str],
+    n_results: int = 5,
+    where: dict | None = None,
+    max_workers: int | None = None,
+    diversify: bool = False,
+    fetch_k: int | None = None,
+    mmr_lambda: float = MMR_LAMBDA,
+    max_per_file: int | None = MAX_PER_FILE,
+    query_embedding: list[float] | None = None,
+) -> dict:
+    """
+    Runs one query embedding against several collections in parallel and returns a single
+    ranked list in the same shape as query_results (plus a "collections" entry per hit).
+    diversify and query_embedding work as in query_results, on the merged candidates.
+    """
+    if not collection_names:
+        raise ValueError("collection_names must not be empty.")
+    client = _get_client()
+    # embed once, every collection is queried with the same vector
+    embedding_input = embed_ollama(query_input) if query_embedding is None else list(query_embedding)
+    n_candidates = max(fetch_k or FETCH_FACTOR * n_results, n_results) if diversify else n_results
+    with ThreadPoolExecutor(max_workers=max_workers or len(collection_names)) as ex:
+        futures = [
+            ex.submit(_query_collection, client, name, embedding_input, n_candidates, where, diversify)
+            for name in collection_names
+        ]
+        results = [fut.result() for fut in futures]
+    if all(result is None for _, _, result in results):
+        raise Exception("Collection is Empty.")
+    merged = merge_query_results(results, n_candidates)
+    if not diversify:
+        return merged
+    return diversify_results(merged, embedding_input, n_results, mmr_lambda=mmr_lambda, max_per_file=max_per_file)
+
+
+def fuse_rrf(results: list[dict], n_results: int, k: int = 60) -> dict:
+    """
+    Reciprocal rank fusion of several query results of the same collection.
+    """
+    scores: dict[str, float] = {}
+    hits: dict[str, tuple] = {}
+    for result in results:
+        ids = result.get("ids", [[]])[0]
+        documents = (result.get("documents") or [[]])[0]
+        metadatas = (result.get("metadatas") or [[]])[0]
+        distances = (result.get("distances") or [[]])[0]
+        embeddings = result.get("embeddings")
+        embeddings = embeddings[0] if embeddings is not None else None
+        for rank, chunk_id in enumerate(ids):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank + 1)
+            distance = distances[rank] if rank < len(distances) else None
+            if chunk_id not in hits or (distance is not None and distance < hits[chunk_id][2]):
+                hits[chunk_id] = (
+                    documents[rank] if rank < len(documents) else None,
+                    metadatas[rank] if rank < len(metadatas) else {},
+                    distance,
+                    embeddings[rank] if embeddings is not None else None,
+                )
+
+    ranked = sorted(scores, key=lambda chunk_id: (-scores[chunk_id], chunk_id))[:n_results]
+    fused = {
+        "ids": [ranked],
+        "documents": [[hits[chunk_id][0] for chunk_id in ranked]],
+        "metadatas": [[hits[chunk_id][1] for chunk_id in ranked]],
+        "distances": [[hits[chunk_id][2] for chunk_id in ranked]],
+    }
+    if ranked and all(hits[chunk_id][3] is not None for chunk_id in ranked):
+        fused["embeddings"] = [[hits[chunk_id][3] for chunk_id in ranked]]
+    return fused
+
+
+def _line_span(metadata: dict) -> tuple[str, int, int] | None:
+    file = (metadata or {}).get("file")
+    start = int((metadata or {}).get("start_line") or 0)
+    end = int((metadata or {}).get("end_line") or 0)
+    if not file or start <= 0 or end < start:
+        return None
+    return file, start, end
+
+
+def collapse_overlaps(ids: list[str], metadatas: list[dict], min_overlap: float = 0.5) -> list[int]:
+    """
+    Positions of the hits (in rank order) left after parent/child collapse: a hit is dropped
+    when a better ranked hit of the same file covers at least min_overlap of its lines or
+    of their lines (a class and its methods, a header and the chunk it heads), or when one
+    is the parent_id of the other.
+    """
+    kept: list[int] = []
+    spans: list[tuple[str, int, int] | None] = []
+    for i, chunk_id in enumerate(ids):
+        meta = metadatas[i] if i < len(metadatas) else {}
+        span = _line_span(meta)
+        parent = (meta or {}).get("parent_id") or ""
+        duplicate = False
+        for j, other in zip(kept, spans):
+            other_meta = metadatas[j] if j < len(metadatas) else {}
+            if parent == ids[j] or ((other_meta or {}).get("parent_id") or "") == chunk_id:
+                duplicate = True
+                break
+            if span is None or other is None or span[0] != other[0]:
+                continue
+            shared = min(span[2], other[2]) - max(span[1], other[1]) + 1
+            smaller = min(span[2] - span[1], other[2] - other[1]) + 1
+            if shared > 0 and shared >= min_overlap * smaller:
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append(i)
+            spans.append(span)
+    return kept
+
+
+def mmr_select(
+    query_embedding,
+    embeddings,
+    n_results: int,
+    mmr_lambda: float = MMR_LAMBDA,
+    groups: list | None = None,
+    max_per_group: int | None = None,
+) -> list[int]:
+    """
+    Maximal marginal relevance over candidate embeddings (cosine), returns the chosen rows in
+    selection order. Each step scores all candidates at once:
+    mmr_lambda * sim(query) - (1 - mmr_lambda) * max sim(already selected).
+    With groups, at most max_per_group rows per group are chosen while other groups are left.
+    """
+    import numpy as np
+
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if matrix.ndim != 2 or not len(matrix):
+        return []
+    matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = matrix @ query
+    similarity = matrix @ matrix.T
+    redundancy = np.zeros(len(matrix), dtype=np.float32)
+    available = np.ones(len(matrix), dtype=bool)
+    per_group: dict = {}
+    selected: list[int] = []
+    while len(selected) < min(n_results, len(matrix)):
+        allowed = available.copy()
+        if groups is not None and max_per_group:
+            full = np.array([per_group.get(g, 0) >= max_per_group for g in groups])
+            # the per group cap only applies while other groups have candidates left
+            if (allowed & ~full).any():
+                allowed &= ~full
+        scores = np.where(allowed, mmr_lambda * relevance - (1.0 - mmr_lambda) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[:, best])
+        if groups is not None:
+            per_group[groups[best]] = per_group.get(groups[best], 0) + 1
+    return selected
+
+
+def diversify_results(
+    result: dict,
+    query_embedding,
+    n_results: int,
+    mmr_lambda: float = MMR_LAMBDA,
+    max_per_file: int | None = MAX_PER_FILE,
+) -> dict:
+    """
+    Reduces over-fetched query results (with embeddings) to n_results distinct hits:
+    parent/child overlaps are collapsed onto the better ranked chunk, then MMR picks the
+    hits with at most max_per_file chunks of one file. Same shape as the input, without embeddings.
+    """
+    ids = result.get("ids", [[]])[0]
+    metadatas = (result.get("metadatas") or [[]])[0]
+    embeddings = result.get("embeddings")
+    if embeddings is None or not len(ids):
+        raise ValueError("diversify_results needs query results with embeddings.")
+    embeddings = embeddings[0]
+
+    kept = collapse_overlaps(ids, metadatas)
+    groups = [(metadatas[i] or {}).get("file") or ids[i] for i in kept]
+    chosen = [kept[i] for i in mmr_select(
+        query_embedding,
+        [embeddings[i] for i in kept],
+        n_results,
+        mmr_lambda=mmr_lambda,
+        groups=groups,
+        max_per_group=max_per_file,
+    )]
+
+    return _select_hits(result, chosen)
+
+
+def _select_hits(result: dict, positions) -> dict:
+    """
+    The hits at positions (in that order) of a single-query result, without embeddings.
+    """
+    positions = list(positions)
+    selected = {}
+    for key, value in result.items():
+        if key == "embeddings" or not isinstance(value, list) or not value or not isinstance(value[0], list):
+            continue
+        selected[key] = [[value[0][i] for i in positions]]
+    return selected
+
+
+def query_results_hyde(
+    query_input: str,
+    collection_name: str,
+    n_results: int = 5,
+    coding_lg: str = "python",
+    budget_s: float = 3.0,
+    llm=None,
+    where: dict | None = None,
+    diversify: bool = False,
+    fetch_k: int | None = None,
+    mmr_lambda: float = MMR_LAMBDA,
+    max_per_file: int | None = MAX_PER_FILE,
+    query_embedding: list[float] | None = None,
+) -> dict:
+    """
+    HyDE retrieval: a small model writes a hypothetical snippet for the question while the
+    plain query retrieval runs. If the snippet arrives within budget_s (measured from the call),
+    its results are fused with the plain ones, otherwise the plain results are returned as is.
+    where restricts both queries. With diversify both queries over-fetch and the (fused)
+    candidates are reduced by diversify_results as in query_results. query_embedding is the
+    vector of the question for the plain query, if the caller already has it.
+    The returned dict has an additional "hyde_used" flag.
+    """
+    if llm is None:
+        # imported here, llm_wrapper itself imports this module
+        import llm_wrapper
+        llm = llm_wrapper.LLMWrapper()
+
+    n_candidates = max(fetch_k or FETCH_FACTOR * n_results, n_results) if diversify else n_results
+    include = {"include": ["documents", "metadatas", "distances", "embeddings"]} if diversify else {}
+
+    started = time.perf_counter()
+    ex = ThreadPoolExecutor(max_workers=1)
+    try:
+        hypothetical_future = ex.submit(llm.llm_hypothetical_answer, query_input, coding_lg)
+
+        collection = _get_collection(collection_name)
+        if collection.count() == 0:
+            raise Exception("Collection is Empty.")
+        if query_embedding is None:
+            query_embedding = embed_ollama(query_input)
+        plain = collection.query(query_embeddings=[query_embedding], n_results=n_candidates, where=where, **include)
+
+        remaining = budget_s - (time.perf_counter() - started)
+        try:
+            hypothetical = hypothetical_future.result(timeout=max(remaining, 0.0))
+        except FutureTimeoutError:
+            hypothetical = None
+        except Exception:
+            # HyDE is best effort, a failing generation must not break retrieval
+            hypothetical = None
+    finally:
+        # never wait for a late generation, its result is dropped
+        ex.shutdown(wait=False, cancel_futures=True)
+
+    if not hypothetical or not hypothetical.strip():
+        result, hyde_used = plain, False
+    else:
+        hyde_embeddings = embed_ollama_batch([hypothetical])
+        hyde = collection.query(query_embeddings=hyde_embeddings, n_results=n_candidates, where=where, **include)
+        result, hyde_used = fuse_rrf([plain, hyde], n_results=n_candidates), True
+    if diversify:
+        # relevance is measured against the question, not the hypothetical snippet
+        result = diversify_results(result, query_embedding, n_results, mmr_lambda=mmr_lambda, max_per_file=max_per_file)
+    result["hyde_used"] = hyde_used
+    return result
 
 
 
@@ -0,0 +1,260 @@
+"""
+Offline batch mode for chunk descriptions.
+
+- Writes all pending description requests (chunk ID + prompt + schema) to a requests JSONL
+- Submits it to the OpenAI batch endpoint and polls until the batch is done
+- Stores finished results by chunk ID and merges them via RAGChunk.append_llm_data
+- Resumable: the submitted batch and all collected results live in work_dir,
+  a restart only resubmits chunks without a result. A batch counts as collected only
+  after its results are on disk, a finished but uncollected batch is collected first
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional
+
+import utils
+from chunk_data.rag_chunk import RAGChunk
+
+
+BATCH_ENDPOINT = "/v1/responses"
+PROMPT_PATH = "src/prompts/code_section_summary.txt"
+# same fields as metadatasRag in llm_wrapper.llm_code_description
+DESCRIPTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "description": {"type": "string"},
+        "keywords": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["description", "keywords"],
+    "additionalProperties": False,
+}
+_FINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+
+def build_batch_request(custom_id: str, code: str, model: str, instructions: str) -> Dict[str, object]:
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": model,
+            "instructions": instructions,
+            "input": code,
+            "text": {
+                "format": {
+                    "type": "json_schema",
+                    "name": "metadatasRag",
+                    "schema": DESCRIPTION_SCHEMA,
+                    "strict": True,
+                }
+            },
+        },
+    }
+
+
+def _output_text(body: Dict[str, object]) -> Optional[str]:
+    """
+    Extracts the output text of a responses API body (what .output_text returns on the client).
+    """
+    if body.get("output_text"):
+        return body["output_text"]
+    parts: List[str] = []
+    for item in body.get("output", []) or []:
+        if item.get("type") != "message":
+            continue
+        for content in item.get("content", []) or []:
+            if content.get("type") == "output_text":
+                parts.append(content.get("text", ""))
+    return "".join(parts) if parts else None
+
+
+def _field(obj, name: str):
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+class BatchDescriber:
+    def __init__(
+        self,
+        client=None,
+        work_dir: str = "src/data/batch",
+        model: Optional[str] = None,
+        poll_interval: float = 60.0,
+    ):
+        if client is None or model is None:
+            import llm_wrapper
+            model = model or llm_wrapper.MODEL_NAME_2
+            client = client or llm_wrapper.LLMWrapper().client
+        self.client = client
+        self.model = model
+        self.work_dir = work_dir
+        self.poll_interval = poll_interval
+        os.makedirs(work_dir, exist_ok=True)
+        self.requests_path = os.path.join(work_dir, "requests.jsonl")
+        self.results_path = os.path.join(work_dir, "results.jsonl")
+        self.state_path = os.path.join(work_dir, "state.json")
+
+    # --- persisted state -------------------------------------------------
+
+    def load_results(self) -> Dict[str, str]:
+        """
+        Collected results by chunk ID. A torn last line from a crash is ignored.
+        """
+        results: Dict[str, str] = {}
+        if not os.path.exists(self.results_path):
+            return results
+        with open(self.results_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                results[item["custom_id"]] = item["output_text"]
+        return results
+
+    def _load_state(self) -> Dict[str, object]:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_state(self, state: Dict[str, object]) -> None:
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, self.state_path)
+
+    # --- batch steps -----------------------------------------------------
+
+    def write_requests(self, chunks: Iterable[RAGChunk]) -> int:
+        """
+        Writes one request per chunk without a collected result, returns the number written.
+        """
+        done = self.load_results()
+        instructions = utils.load_prompt_template(PROMPT_PATH)
+        written = 0
+        seen = set()
+        with open(self.requests_path, "w", encoding="utf-8") as f:
+            for chunk in chunks:
+                chunk_id = chunk.chunk_id()
+                if chunk_id in done or chunk_id in seen:
+                    continue
+                seen.add(chunk_id)
+                request = build_batch_request(chunk_id, chunk.text, self.model, instructions)
+                f.write(json.dumps(request, ensure_ascii=True) + "\n")
+                written += 1
+        return written
+
+    def submit(self) -> str:
+        """
+        Uploads the requests file and creates the batch. An unfinished batch from a previous
+        run is reused instead of submitting the same requests twice.
+        """
+        state = self._load_state()
+        if state.get("batch_id") and state.get("status") not in _FINAL_STATES:
+            return state["batch_id"]
+        with open(self.requests_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=_field(input_file, "id"),
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        self._save_state({"batch_id": _field(batch, "id"), "status": _field(batch, "status"), "collected": False})
+        return _field(batch, "id")
+
+    def poll(self, batch_id: str, timeout: Optional[float] = None):
+        """
+        Polls the batch until it reaches a final state (or the timeout), returns the batch.
+        """
+        started = time.monotonic()
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            status = _field(batch, "status")
+            self._save_state({"batch_id": batch_id, "status": status, "collected": False})
+            if status in _FINAL_STATES:
+                return batch
+            if timeout is not None and time.monotonic() - started >= timeout:
+                return batch
+            time.sleep(self.poll_interval)
+
+    def collect(self, batch) -> int:
+        """
+        Appends the successful results of a (possibly partial) batch output, returns the number of new results.
+        """
+        output_file_id = _field(batch, "output_file_id")
+        if not output_file_id:
+            return 0
+        content = self.client.files.content(output_file_id)
+        text = content if isinstance(content, str) else content.text
+        done = self.load_results()
+        added = 0
+        with open(self.results_path, "a", encoding="utf-8") as f:
+            for line in text.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                custom_id = item.get("custom_id")
+                response = item.get("response") or {}
+                if not custom_id or custom_id in done or item.get("error") or response.get("status_code") != 200:
+                    continue
+                output_text = _output_text(response.get("body") or {})
+                if output_text is None:
+                    continue
+                f.write(json.dumps({"custom_id": custom_id, "output_text": output_text}, ensure_ascii=True) + "\n")
+                done[custom_id] = output_text
+                added += 1
+            f.flush()
+            os.fsync(f.fileno())
+        return added
+
+    def collect_final(self, batch) -> int:
+        """
+        Collects a batch in a final state and marks it collected once the results are fsynced.
+        """
+        added = self.collect(batch)
+        self._save_state({"batch_id": _field(batch, "id"), "status": _field(batch, "status"), "collected": True})
+        return added
+
+    def collect_pending(self) -> int:
+        """
+        Collects the batch of a previous run that finished but was never collected (crash
+        between poll and collect), returns the number of new results.
+        """
+        state = self._load_state()
+        if not state.get("batch_id") or state.get("status") not in _FINAL_STATES or state.get("collected"):
+            return 0
+        return self.collect_final(self.client.batches.retrieve(state["batch_id"]))
+
+    def merge(self, chunks: Iterable[RAGChunk]) -> int:
+        """
+        Applies the collected results to the chunks by ID, returns the number of described chunks.
+        """
+        results = self.load_results()
+        merged = 0
+        for chunk in chunks:
+            output_text = results.get(chunk.chunk_id())
+            if output_text is None:
+                continue
+            chunk.append_llm_data(output_text)
+            merged += 1
+        return merged
+
+    def run(self, chunks: List[RAGChunk], timeout: Optional[float] = None) -> int:
+        """
+        Full flow: write pending requests, submit (or resume) the batch, poll, collect and merge.
+        Chunks still without a result after a failed or expired batch are picked up by the next run.
+        """
+        # results of a finished batch must be on disk before new requests are written
+        self.collect_pending()
+        state = self._load_state()
+        resuming = state.get("batch_id") and state.get("status") not in _FINAL_STATES
+        if not resuming and self.write_requests(chunks) == 0:
+            return self.merge(chunks)
+        batch = self.poll(self.submit(), timeout=timeout)
+        if _field(batch, "status") in _FINAL_STATES:
+            self.collect_final(batch)
+        return self.merge(chunks)
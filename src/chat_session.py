@@ -0,0 +1,138 @@
+"""
+Multi-turn assistant sessions that reuse retrieval across follow-up questions.
+
+Every question is embedded and compared (cosine) with the questions of the current topic:
+- similarity >= reuse_threshold: "reuse", no retrieval, only the question is sent
+- similarity >= extend_threshold: "extend", retrieval runs, only chunks not sent before
+  are added to the turn
+- otherwise (or when the topic would exceed max_context_chunks): "new", the retrieved
+  context starts a new topic with the full code assistant prompt
+
+All turns are chained with previous_response_id, so the context of earlier turns is never
+sent again. A new topic sends its full context in the same chain, only the bookkeeping of
+sent chunks and topic questions starts over.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import utils
+
+
+REUSE_THRESHOLD = 0.85
+EXTEND_THRESHOLD = 0.6
+MAX_CONTEXT_CHUNKS = 12
+
+
+@dataclass
+class Turn:
+    question: str
+    mode: str
+    similarity: Optional[float]
+    new_chunk_ids: List[str]
+    prompt_tokens: int
+    retrieval_ms: float
+    answer: str = ""
+
+
+@dataclass
+class ChatSession:
+    """
+    Conversation with the code assistant, ask() answers one question.
+    retrieval_options are passed to LLMWrapper.retrieve_context (hyde, diversify, rerank, n_results).
+    With symbol_fast_path location-only questions are answered from the symbol index.
+    """
+    collection_name: object
+    coding_lg: str = "python"
+    llm: object = None
+    reuse_threshold: float = REUSE_THRESHOLD
+    extend_threshold: float = EXTEND_THRESHOLD
+    max_context_chunks: int = MAX_CONTEXT_CHUNKS
+    retrieval_options: Dict[str, object] = field(default_factory=dict)
+    symbol_fast_path: bool = True
+    chunk_ids: List[str] = field(default_factory=list)
+    topic_embeddings: List[List[float]] = field(default_factory=list)
+    previous_response_id: Optional[str] = None
+    turns: List[Turn] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.llm is None:
+            import llm_wrapper
+            self.llm = llm_wrapper.LLMWrapper()
+
+    def topic_similarity(self, embedding) -> Optional[float]:
+        """
+        Highest cosine similarity of the question embedding to a question of the current topic.
+        """
+        if not self.topic_embeddings:
+            return None
+        import numpy as np
+
+        topic = np.asarray(self.topic_embeddings, dtype=np.float32)
+        query = np.asarray(embedding, dtype=np.float32)
+        norms = np.linalg.norm(topic, axis=1) * max(float(np.linalg.norm(query)), 1e-12)
+        return float(np.max(topic @ query / np.maximum(norms, 1e-12)))
+
+    def classify(self, similarity: Optional[float]) -> str:
+        if similarity is None or similarity < self.extend_threshold:
+            return "new"
+        return "reuse" if similarity >= self.reuse_threshold else "extend"
+
+    def reset(self) -> None:
+        """
+        Starts a new topic, the response chain is kept.
+        """
+        self.chunk_ids = []
+        self.topic_embeddings = []
+
+    def ask(self, question: str) -> str:
+        from llm_wrapper import code_assistant_prompt, format_rag_context
+        from symbol_index import answer_location
+
+        # location questions are answered from the symbol index and do not change the topic
+        location = answer_location(question) if self.symbol_fast_path else None
+        if location is not None:
+            self.turns.append(Turn(question, "symbol", None, [], 0, 0.0, location))
+            return location
+
+        embedding = utils.embed_ollama(question)
+        similarity = self.topic_similarity(embedding)
+        mode = self.classify(similarity)
+
+        started = time.perf_counter()
+        documents: List[str] = []
+        metadatas: List[dict] = []
+        new_ids: List[str] = []
+        if mode != "reuse":
+            # the question is already embedded for the topic check, retrieval reuses the vector
+            result = self.llm.retrieve_context(question, self.collection_name, coding_lg=self.coding_lg,
+                                               query_embedding=embedding, **self.retrieval_options)
+            ids = (result.get("ids") or [[]])[0]
+            known = set(self.chunk_ids) if mode == "extend" else set()
+            fresh = [i for i, chunk_id in enumerate(ids) if chunk_id not in known]
+            if mode == "extend" and len(self.chunk_ids) + len(fresh) > self.max_context_chunks:
+                # the chain would carry too much context, the question starts over with its own hits
+                mode = "new"
+                fresh = list(range(len(ids)))
+            documents = [(result.get("documents") or [[]])[0][i] for i in fresh]
+            metadatas = [(result.get("metadatas") or [[]])[0][i] for i in fresh]
+            new_ids = [ids[i] for i in fresh]
+        retrieval_ms = (time.perf_counter() - started) * 1000
+
+        if mode == "new":
+            self.reset()
+            prompt = code_assistant_prompt(question, format_rag_context(documents, metadatas), self.coding_lg)
+        elif new_ids:
+            context = format_rag_context(documents, metadatas, start=len(self.chunk_ids) + 1)
+            prompt = f"Additional RAG context:\n{context}\n\nFollow-up question:\n{question}"
+        else:
+            prompt = f"Follow-up question (use the RAG context above):\n{question}"
+
+        answer, self.previous_response_id = self.llm.llm_session_turn(prompt, self.previous_response_id)
+        self.chunk_ids.extend(new_ids)
+        self.topic_embeddings.append(list(embedding))
+        self.turns.append(Turn(question, mode, similarity, new_ids, utils.count_tokens(prompt), retrieval_ms, answer))
+        return answer
@@ -0,0 +1,227 @@
+"""
+Batched, resumable bulk upsert into Chroma.
+
+- Records (RAGChunks or chunk dump items) are streamed in batches bounded by count
+  (at most the client's max batch size) and by document bytes
+- Missing embeddings are computed per batch with one batch call, while the previous
+  batch is being written, so embedding and writing overlap
+- upsert makes every batch idempotent, a batch replayed after a crash does no harm
+- After each committed batch the number of written records is checkpointed (atomic
+  replace), a rerun skips them; the source must yield records in the same order
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import chunk_data.rag_chunk as rc
+
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_MAX_BATCH_BYTES = 16 * 1024 * 1024
+
+
+def _record_size(record) -> int:
+    if isinstance(record, rc.RAGChunk):
+        return len(record.text_ref) + 512
+    return len(str(record.get("document", ""))) + len(json.dumps(record.get("metadata", {}))) + 8 * len(record.get("embedding") or ())
+
+
+def _batches(records: Iterable, batch_size: int, max_bytes: int) -> Iterator[List]:
+    batch: List = []
+    size = 0
+    for record in records:
+        record_size = _record_size(record)
+        if batch and (len(batch) >= batch_size or size + record_size > max_bytes):
+            yield batch
+            batch, size = [], 0
+        batch.append(record)
+        size += record_size
+    if batch:
+        yield batch
+
+
+def _prepare(batch: List) -> Dict[str, list]:
+    """
+    Chroma columns of a batch, the missing embeddings are computed with one batch call.
+    """
+    from utils import embed_ollama_batch
+
+    missing = [i for i, r in enumerate(batch) if isinstance(r, rc.RAGChunk) or r.get("embedding") is None]
+    inputs = [(r if isinstance(r, rc.RAGChunk) else rc.ragchunk_from_json_item(r)).embedding_input() for r in (batch[i] for i in missing)]
+    vectors = dict(zip(missing, embed_ollama_batch(inputs)))
+
+    columns: Dict[str, list] = {"ids": [], "embeddings": [], "documents": [], "metadatas": []}
+    for i, record in enumerate(batch):
+        if isinstance(record, rc.RAGChunk):
+            record = record.to_chroma_item(embedding=vectors[i])
+        columns["ids"].append(record["id"])
+        columns["embeddings"].append(vectors.get(i, record.get("embedding")))
+        columns["documents"].append(record.get("document", ""))
+        columns["metadatas"].append(record.get("metadata") or None)
+    return columns
+
+
+class UpsertCheckpoint:
+    """
+    Number of records of a source already committed to a collection.
+    """
+
+    def __init__(self, path: Optional[str], collection: str, source: str):
+        self.path = path
+        self.collection = collection
+        self.source = source
+        self.items = 0
+        self.batches = 0
+        self.done = False
+
+    def load(self) -> "UpsertCheckpoint":
+        if not self.path or not os.path.exists(self.path):
+            return self
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        # a checkpoint of another collection or source does not apply
+        if state.get("collection") == self.collection and state.get("source") == self.source:
+            self.items, self.batches, self.done = state["items"], state["batches"], state.get("done", False)
+        return self
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"collection": self.collection, "source": self.source, "items": self.items,
+                       "batches": self.batches, "done": self.done, "updated_at": int(time.time())}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+def _open_collection(collection_name: str, client):
+    from embeddings import check_collection_signature, collection_metadata
+    from utils import embedding_signature
+
+    signature = embedding_signature()
+    collection = client.get_or_create_collection(name=collection_name, metadata=collection_metadata(signature))
+    # never mix vectors of different embedding backends in one collection
+    check_collection_signature(collection, signature)
+    return collection
+
+
+def bulk_upsert(
+    records: Iterable,
+    collection_name: str,
+    client=None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+    checkpoint_path: Optional[str] = None,
+    source: str = "",
+    total: Optional[int] = None,
+    restart: bool = False,
+    progress: bool = True,
+) -> Dict[str, object]:
+    """
+    Upserts records (RAGChunks or dump items) in batches and returns counts and timings.
+    With checkpoint_path a rerun resumes after the last committed batch, restart ignores it.
+    """
+    import tqdm
+
+    if client is None:
+        import RAG
+        client = RAG._get_client()
+    collection = _open_collection(collection_name, client)
+    batch_size = max(1, min(batch_size, client.get_max_batch_size()))
+
+    checkpoint = UpsertCheckpoint(checkpoint_path, collection_name, source)
+    if not restart:
+        checkpoint.load()
+    if checkpoint.done:
+        return {"collection": collection_name, "written": 0, "skipped": checkpoint.items, "batches": 0, "seconds": 0.0}
+    skip = checkpoint.items
+
+    def remaining() -> Iterator:
+        for position, record in enumerate(records):
+            if position >= skip:
+                yield record
+
+    started = time.perf_counter()
+    written = 0
+    batches = 0
+    bar = tqdm.tqdm(total=total, initial=skip, unit="chunks", disable=not progress)
+
+    def commit(count: int) -> None:
+        nonlocal written, batches
+        checkpoint.items += count
+        checkpoint.batches += 1
+        checkpoint.save()
+        written += count
+        batches += 1
+        bar.update(count)
+
+    in_flight = None
+    try:
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            try:
+                for batch in _batches(remaining(), batch_size, max_batch_bytes):
+                    # embeds this batch while the previous one is written
+                    columns = _prepare(batch)
+                    if in_flight is not None:
+                        commit(in_flight.result())
+                    in_flight = writer.submit(_upsert, collection, columns)
+                if in_flight is not None:
+                    commit(in_flight.result())
+                    in_flight = None
+            finally:
+                # a write that succeeded before a failure elsewhere (source, embedding) still counts
+                if in_flight is not None and in_flight.exception() is None:
+                    commit(in_flight.result())
+    finally:
+        bar.close()
+
+    checkpoint.done = True
+    checkpoint.save()
+    return {
+        "collection": collection_name,
+        "written": written,
+        "skipped": skip,
+        "batches": batches,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def _upsert(collection, columns: Dict[str, list]) -> int:
+    collection.upsert(**columns)
+    return len(columns["ids"])
+
+
+def upsert_jsonl(jsonl_path: str, collection_name: str, client=None, restart: bool = False, **kwargs) -> Dict[str, object]:
+    """
+    Bulk upsert of a chunk dump (chunks_all_v1.jsonl), checkpointed next to it.
+    """
+    from embeddings import load_dump_signature
+    from jsonl_stream import iter_jsonl_items
+    from utils import embedding_signature
+
+    stored = load_dump_signature(jsonl_path)
+    if stored and stored != embedding_signature():
+        # the stored vectors would be labeled with the configured signature
+        raise ValueError(f"'{jsonl_path}' was embedded with '{stored}', the configured embedder is '{embedding_signature()}'.")
+
+    with open(jsonl_path, "rb") as f:
+        total = sum(1 for line in f if line.strip())
+    stat = os.stat(jsonl_path)
+    return bulk_upsert(
+        iter_jsonl_items(jsonl_path),
+        collection_name,
+        client=client,
+        checkpoint_path=f"{jsonl_path}.{collection_name}.upsert.json",
+        # a rewritten dump must not resume from the checkpoint of the old one
+        source=f"{os.path.abspath(jsonl_path)}:{stat.st_size}:{int(stat.st_mtime)}",
+        total=total,
+        restart=restart,
+        **kwargs,
+    )
@@ -13,9 +13,11 @@ import os
 import re
 from typing import Dict, List, Optional, Tuple
 
-import llm_wrapper
 import utils
 from chunk_data.rag_chunk import RAGChunk, make_repo_id
+from chunk_data.split import split_oversized
+from chunk_data.static_description import describe_chunks
+from chunk_data.text_span import SourceBuffer
 
 
 _CLASS_RE = re.compile(
@@ -73,6 +75,34 @@ def _slice_lines(lines: List[str], start_line: int, end_line: int) -> str:
     return "".join(lines[start_idx:end_idx])
 
 
+def _class_skeleton(lines: List[str], c_start: int, c_end: int, methods: List[Tuple[int, int, str]]) -> str:
+    """
+    Class source with fields, Javadoc and signatures; method bodies (start_line, end_line, chunk ID)
+    are replaced by a comment with the ID of their method chunk. Nested methods go with their outer one.
+    """
+    out: List[str] = []
+    cursor = c_start
+    for m_start, m_end, chunk_id in sorted(methods):
+        # nested (already elided) methods and bodies without inner lines are skipped
+        if m_start < cursor or m_end - m_start < 2:
+            continue
+        out.extend(lines[cursor - 1:m_start])
+        body_line = lines[m_start]
+        indent = body_line[:len(body_line) - len(body_line.lstrip())]
+        out.append(f"{indent}// ... body in chunk {chunk_id}\n")
+        cursor = m_end
+    out.extend(lines[cursor - 1:c_end])
+    return "".join(out)
+
+
+def _split_symbol(chunk: RAGChunk, lines: List[str], max_tokens: Optional[int]) -> List[RAGChunk]:
+    if not max_tokens:
+        return [chunk]
+    # a new piece may start after a statement or a block brace
+    starts = [i + 1 for i in range(chunk.start_line, chunk.end_line) if lines[i - 1].rstrip().endswith((";", "{", "}"))]
+    return split_oversized(chunk, starts, max_tokens)
+
+
 def _parse_description_response(raw: str) -> dict:
     if isinstance(raw, dict):
         return raw
@@ -90,6 +120,8 @@ def _parse_description_response(raw: str) -> dict:
 
 
 def _gen_code_description(code: str) -> dict:
+    import llm_wrapper  # lazy, pulls in openai
+
     llm = llm_wrapper.LLMWrapper()
     response = llm.llm_code_description(code)
     return _parse_description_response(response)
@@ -128,6 +160,7 @@ def _build_chunk_fields(
         "keywords": keywords,
         "chunk_type": chunk_type,
         "repo_id": repo_id,
+        "description_source": "llm" if description != "N.A" else "none",
     }
 
 
@@ -140,12 +173,22 @@ def chunk_java_code(
     deferred_llm: bool = False,
     repo_root: Optional[str] = None,
     repo_id: Optional[str] = None,
+    class_skeleton: bool = False,
+    max_tokens: Optional[int] = None,
 ) -> List[RAGChunk]:
+    """
+    Chunk java code into classes/interfaces/enums and (optionally) methods.
+    With class_skeleton (and include_methods) class chunks elide method bodies and reference
+    the ID of the method chunk instead.
+    With max_tokens, larger symbols are split after statements and block braces into linked parts.
+    """
     lines = _split_lines(code)
     if repo_root is None:
         repo_root = utils.find_repo_root(file_path)
     effective_repo_id = make_repo_id(os.path.abspath(repo_root)) if repo_root else "repo::unknown"
     header = _get_java_header(lines, max_header_lines=header_max_lines) if include_header else ""
+    # class and method chunks reference spans of one buffer instead of copying their bodies
+    buffer = SourceBuffer(code, lines)
 
     chunks: List[RAGChunk] = []
     for i, line in enumerate(lines):
@@ -158,27 +201,8 @@ def chunk_java_code(
         c_end = _find_block_end(lines, i)
         if not c_end:
             continue
-        class_text = _slice_lines(lines, c_start, c_end)
-        text = (header + class_text) if include_header else class_text
-        llm_data = None if deferred_llm else _gen_code_description(text)
-
-        chunks.append(
-            RAGChunk(
-                text=text,
-                **_build_chunk_fields(
-                    file_path=file_path,
-                    symbol_type=class_type,
-                    symbol_name=class_name,
-                    start_line=c_start,
-                    end_line=c_end,
-                    language="java",
-                    llm_data=llm_data,
-                    chunk_type="java",
-                    repo_id=effective_repo_id,
-                ),
-            )
-        )
-
+        # (start_line, end_line, [method chunk, *its parts])
+        methods: List[Tuple[int, int, List[RAGChunk]]] = []
         if include_methods:
             for j in range(i, c_end):
                 method_match = _METHOD_RE.match(lines[j])
@@ -189,26 +213,53 @@ def chunk_java_code(
                 m_end = _find_block_end(lines, j)
                 if not m_end:
                     continue
-                method_text = _slice_lines(lines, m_start, m_end)
-                text = (header + method_text) if include_header else method_text
-                llm_data = None if deferred_llm else _gen_code_description(text)
+                text = buffer.span(m_start, m_end, header)
                 symbol_type = "constructor" if method_name == class_name else "method"
-                chunks.append(
-                    RAGChunk(
-                        text=text,
-                        **_build_chunk_fields(
-                            file_path=file_path,
-                            symbol_type=symbol_type,
-                            symbol_name=f"{class_name}.{method_name}",
-                            start_line=m_start,
-                            end_line=m_end,
-                            language="java",
-                            llm_data=llm_data,
-                            chunk_type="java",
-                            repo_id=effective_repo_id,
-                        ),
-                    )
+                method_chunk = RAGChunk(
+                    text=text,
+                    **_build_chunk_fields(
+                        file_path=file_path,
+                        symbol_type=symbol_type,
+                        symbol_name=f"{class_name}.{method_name}",
+                        start_line=m_start,
+                        end_line=m_end,
+                        language="java",
+                        chunk_type="java",
+                        repo_id=effective_repo_id,
+                    ),
                 )
+                methods.append((m_start, m_end, _split_symbol(method_chunk, lines, max_tokens)))
+
+        if class_skeleton and methods:
+            # method bodies live in the method chunks, the class chunk only references them
+            spans = [(m_start, m_end, pieces[0].chunk_id()) for m_start, m_end, pieces in methods]
+            text = header + _class_skeleton(lines, c_start, c_end, spans)
+        else:
+            text = buffer.span(c_start, c_end, header)
+        class_chunk = RAGChunk(
+            text=text,
+            **_build_chunk_fields(
+                file_path=file_path,
+                symbol_type=class_type,
+                symbol_name=class_name,
+                start_line=c_start,
+                end_line=c_end,
+                language="java",
+                chunk_type="java",
+                repo_id=effective_repo_id,
+            ),
+        )
+        class_pieces = _split_symbol(class_chunk, lines, max_tokens)
+        chunks.extend(class_pieces)
+        if methods:
+            class_id = class_pieces[0].chunk_id()
+            for _, _, pieces in methods:
+                pieces[0].parent_id = class_id
+                chunks.extend(pieces)
+
+    if not deferred_llm:
+        # docstrings, Javadoc and trivial bodies are described without the LLM
+        describe_chunks(chunks, _gen_code_description)
 
     if not chunks:
         chunks.append(
@@ -238,6 +289,8 @@ def chunk_java_file(
     deferred_llm: bool = False,
     repo_root: Optional[str] = None,
     repo_id: Optional[str] = None,
+    class_skeleton: bool = False,
+    max_tokens: Optional[int] = None,
 ) -> List[RAGChunk]:
     code = _safe_read(path)
     return chunk_java_code(
@@ -249,4 +302,6 @@ def chunk_java_file(
         deferred_llm=deferred_llm,
         repo_root=repo_root,
         repo_id=repo_id,
+        class_skeleton=class_skeleton,
+        max_tokens=max_tokens,
     )
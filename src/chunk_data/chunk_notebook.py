@@ -0,0 +1,213 @@
+"""
+Jupyter notebook chunker.
+
+- Cell outputs and attachments (base64 images, tables, logs) are dropped while the JSON is
+  decoded, only cell sources are kept
+- The cells are laid out as a percent-format script ("# %% [cell 3]" before every cell),
+  start_line/end_line of all chunks refer to that script, so a line maps back to its cell
+- Functions and classes go through the Python AST chunker; magics (%, !) and cells that do
+  not parse are commented out for it, line numbers stay the same
+- The remaining cells (markdown with the code that follows it) become "notebook_cells" chunks
+  of at most max_tokens, cells made of definitions and imports only are covered by the AST chunks
+"""
+
+from __future__ import annotations
+
+import ast
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import utils
+from chunk_data.chunk_python import _gen_code_description, chunk_python_code
+from chunk_data.rag_chunk import RAGChunk, make_repo_id
+from chunk_data.split import split_oversized
+from chunk_data.static_description import describe_chunks
+from chunk_data.text_span import SourceBuffer
+
+
+_DROPPED_KEYS = frozenset({"outputs", "attachments"})
+_DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Import, ast.ImportFrom)
+
+
+def _drop_outputs(pairs: List[Tuple[str, object]]) -> Dict[str, object]:
+    # called for every JSON object as soon as it is decoded, outputs never reach the notebook dict
+    return {key: value for key, value in pairs if key not in _DROPPED_KEYS}
+
+
+def load_cells(text: str) -> List[Tuple[int, str, str]]:
+    """
+    (cell index, cell type, source) of every code and markdown cell, outputs dropped.
+    """
+    notebook = json.loads(text, object_pairs_hook=_drop_outputs)
+    if not isinstance(notebook, dict):
+        raise ValueError("Not a notebook: the JSON root is not an object")
+    # nbformat 3 keeps the cells in worksheets and the code in "input"
+    cells = notebook.get("cells")
+    if cells is None:
+        cells = [cell for sheet in notebook.get("worksheets", []) for cell in sheet.get("cells", [])]
+    result = []
+    for index, cell in enumerate(cells):
+        cell_type = cell.get("cell_type")
+        if cell_type not in ("code", "markdown"):
+            continue
+        source = cell.get("source", cell.get("input", ""))
+        if isinstance(source, list):
+            source = "".join(source)
+        result.append((index, cell_type, source))
+    return result
+
+
+def _is_magic(line: str) -> bool:
+    return line.lstrip().startswith(("%", "!"))
+
+
+def _parses(source: str) -> Optional[ast.Module]:
+    try:
+        return ast.parse(source)
+    except SyntaxError:
+        return None
+
+
+def _commented(lines: List[str]) -> List[str]:
+    return ["# " + line if line.strip() else line for line in lines]
+
+
+def _layout(cells: List[Tuple[int, str, str]]):
+    """
+    Builds the display script, the script for the AST chunker (same lines) and per cell
+    (index, type, marker line, last line, covered by definitions).
+    """
+    display: List[str] = []
+    parseable: List[str] = []
+    layout = []
+    for index, cell_type, source in cells:
+        lines = source.splitlines(keepends=True)
+        if lines and not lines[-1].endswith("\n"):
+            lines[-1] += "\n"
+        marker = f"# %% [markdown] [cell {index}]\n" if cell_type == "markdown" else f"# %% [cell {index}]\n"
+        marker_line = len(display) + 1
+        display.append(marker)
+        parseable.append(marker)
+
+        covered = False
+        if cell_type == "markdown":
+            display.extend(lines)
+            parseable.extend(_commented(lines))
+        else:
+            # cell magics (%%bash, %%time) make the whole cell foreign code
+            cell_magic = bool(lines) and lines[0].lstrip().startswith("%%")
+            code = [("# " + line if _is_magic(line) else line) for line in lines]
+            tree = None if cell_magic else _parses("".join(code))
+            display.extend(lines)
+            parseable.extend(code if tree is not None else _commented(lines))
+            covered = tree is not None and bool(tree.body) and all(isinstance(n, _DEFINITIONS) for n in tree.body)
+        layout.append((index, cell_type, marker_line, len(display), covered))
+    return "".join(display), "".join(parseable), layout
+
+
+def _cell_groups(layout, buffer: SourceBuffer, max_tokens: Optional[int]) -> List[List[tuple]]:
+    # a markdown cell starts a new group, groups are closed before they exceed max_tokens
+    # and at covered cells (a group is one contiguous line range)
+    groups: List[List[tuple]] = []
+    used = 0
+    closed = True
+    for cell in layout:
+        _, cell_type, marker_line, last_line, covered = cell
+        if covered:
+            closed = True
+            continue
+        if last_line <= marker_line:
+            continue
+        tokens = utils.count_tokens(buffer.span(marker_line, last_line).body())
+        if closed or cell_type == "markdown" or (max_tokens and used + tokens > max_tokens):
+            groups.append([])
+            used = 0
+            closed = False
+        groups[-1].append(cell)
+        used += tokens
+    return groups
+
+
+def chunk_notebook_code(
+    text: str,
+    file_path: str = "<memory>",
+    deferred_llm: bool = False,
+    repo_root: Optional[str] = None,
+    repo_id: Optional[str] = None,
+    class_skeleton: bool = False,
+    max_tokens: Optional[int] = None,
+) -> List[RAGChunk]:
+    """
+    Chunks a notebook (its JSON text) into AST symbol chunks and cell group chunks.
+    """
+    if repo_root is None:
+        repo_root = utils.find_repo_root(file_path)
+    effective_repo_id = make_repo_id(os.path.abspath(repo_root)) if repo_root else "repo::unknown"
+
+    display, parseable, layout = _layout(load_cells(text))
+    chunks = [
+        chunk
+        for chunk in chunk_python_code(
+            parseable,
+            file_path=file_path,
+            deferred_llm=True,
+            repo_root=repo_root,
+            class_skeleton=class_skeleton,
+            max_tokens=max_tokens,
+        )
+        # a script without definitions comes back as one "file" chunk, the cell groups cover it
+        if chunk.symbol_type != "file"
+    ]
+
+    buffer = SourceBuffer(display)
+    name = os.path.basename(file_path)
+    for group in _cell_groups(layout, buffer, max_tokens):
+        first, last = group[0], group[-1]
+        start, end = first[2], last[3]
+        has_code = any(cell[1] == "code" for cell in group)
+        chunk = RAGChunk(
+            text=buffer.span(start, end),
+            file=file_path,
+            language="python" if has_code else "markdown",
+            symbol_type="notebook_cells",
+            symbol_name=f"{name} cells {first[0]}-{last[0]}" if len(group) > 1 else f"{name} cell {first[0]}",
+            start_line=start,
+            end_line=end,
+            description="N.A",
+            keywords=["N.A"],
+            chunk_type="notebook",
+            repo_id=effective_repo_id,
+        )
+        # a single cell above max_tokens is cut at its lines
+        chunks.extend(split_oversized(chunk, range(start, end + 1), max_tokens) if max_tokens else [chunk])
+
+    if not deferred_llm:
+        describe_chunks(chunks, _gen_code_description)
+    return chunks
+
+
+def chunk_notebook_file(
+    path: str,
+    deferred_llm: bool = False,
+    repo_root: Optional[str] = None,
+    repo_id: Optional[str] = None,
+    class_skeleton: bool = False,
+    max_tokens: Optional[int] = None,
+) -> List[RAGChunk]:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        text = f.read()
+    try:
+        return chunk_notebook_code(
+            text,
+            file_path=path,
+            deferred_llm=deferred_llm,
+            repo_root=repo_root,
+            repo_id=repo_id,
+            class_skeleton=class_skeleton,
+            max_tokens=max_tokens,
+        )
+    except ValueError:
+        # not notebook JSON after all, chunked like any other file
+        from chunk_data.chunk_other_files import chunk_other_file
+        return chunk_other_file(path, deferred_llm=deferred_llm, repo_root=repo_root, repo_id=repo_id)
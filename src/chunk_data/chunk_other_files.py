@@ -11,7 +11,6 @@ import json
 import os
 from typing import Dict, List, Optional
 
-import llm_wrapper
 import utils
 from chunk_data.rag_chunk import RAGChunk, make_repo_id
 
@@ -49,7 +48,7 @@ def infer_chunk_type(path: str) -> str:
         if "typesystem" in path_lower:
             return "typesystem"
         return "schema"
-    if path_lower.endswith("Dockerfile"):
+    if os.path.basename(path_lower).startswith("dockerfile"):
         return "dockerfile"
     if path_lower.endswith(".py"):
         return "python"
@@ -77,6 +76,8 @@ def _parse_description_response(raw: str) -> dict:
 
 
 def _gen_file_description(text: str) -> dict:
+    import llm_wrapper
+
     llm = llm_wrapper.LLMWrapper()
     response = llm.llm_other_file_description(text)
     return _parse_description_response(response)
@@ -115,6 +116,7 @@ def _build_chunk_fields(
         "keywords": keywords,
         "chunk_type": chunk_type,
         "repo_id": repo_id,
+        "description_source": "llm" if description != "N.A" else "none",
     }
 
 
@@ -129,6 +131,9 @@ def chunk_other_file(
     lines = text.splitlines()
     language = _infer_language(path)
     chunk_type = infer_chunk_type(path)
+    # same repo_id as the code chunks of the repo, the facet pre-filters select by it
+    if repo_root is None:
+        repo_root = utils.find_repo_root(path)
     effective_repo_id = make_repo_id(os.path.abspath(repo_root)) if repo_root else "repo::unknown"
     llm_data = None if deferred_llm else _gen_file_description(text)
     chunk = RAGChunk(
@@ -14,9 +14,11 @@ import json
 import os
 from typing import Dict, List, Optional, Tuple
 
-import llm_wrapper as llm_wrapper
 import utils
 from chunk_data.rag_chunk import RAGChunk, make_repo_id
+from chunk_data.split import split_oversized
+from chunk_data.static_description import describe_chunks
+from chunk_data.text_span import SourceBuffer
 
 
 def _safe_read(path: str) -> str:
@@ -88,6 +90,47 @@ def _slice_lines(lines: List[str], start_line: int, end_line: int) -> str:
     return "".join(lines[start_idx:end_idx])
 
 
+def _is_docstring(stmt: ast.AST) -> bool:
+    return isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant) and isinstance(stmt.value.value, str)
+
+
+def _class_skeleton(node: ast.ClassDef, lines: List[str], method_ids: Dict[ast.AST, str]) -> str:
+    """
+    Class source with fields, signatures and docstrings; the bodies of the methods in
+    method_ids are replaced by a reference to their chunk ID.
+    """
+    out: List[str] = []
+    cursor = node.lineno
+    for inner in node.body:
+        chunk_id = method_ids.get(inner)
+        if chunk_id is None:
+            continue
+        rest = inner.body[1:] if _is_docstring(inner.body[0]) else inner.body
+        # one-line defs and docstring-only methods have nothing to elide
+        if not rest or rest[0].lineno <= inner.lineno:
+            continue
+        keep_until = rest[0].lineno - 1
+        out.extend(lines[cursor - 1:keep_until])
+        body_line = lines[rest[0].lineno - 1]
+        indent = body_line[:len(body_line) - len(body_line.lstrip())]
+        out.append(f"{indent}...  # body in chunk {chunk_id}\n")
+        cursor = inner.end_lineno + 1
+    out.extend(lines[cursor - 1:node.end_lineno])
+    return "".join(out)
+
+
+def _split_symbol(chunk: RAGChunk, node: ast.AST, max_tokens: Optional[int]) -> List[RAGChunk]:
+    if not max_tokens:
+        return [chunk]
+    starts = set()
+    for stmt in ast.walk(node):
+        if isinstance(stmt, ast.stmt) and stmt is not node:
+            # decorators stay with the definition they decorate
+            decorators = getattr(stmt, "decorator_list", [])
+            starts.add(min([stmt.lineno, *(d.lineno for d in decorators)]))
+    return split_oversized(chunk, starts, max_tokens)
+
+
 def _parse_description_response(raw: str) -> dict:
     if isinstance(raw, dict):
         return raw
@@ -108,6 +151,9 @@ def _gen_code_description(code: str) -> dict:
     """
     Generates a short description of a code section for the Metadata of the RAG properties.
     """
+    # imported on first use, pure chunking runs never load openai
+    import llm_wrapper
+
     llm = llm_wrapper.LLMWrapper()
     response = llm.llm_code_description(code)
     return _parse_description_response(response)
@@ -146,6 +192,7 @@ def _build_chunk_fields(
         "keywords": keywords,
         "chunk_type": chunk_type,
         "repo_id": repo_id,
+        "description_source": "llm" if description != "N.A" else "none",
     }
 
 
@@ -159,9 +206,14 @@ def chunk_python_code(
     deferred_llm: bool = False,
     repo_root: Optional[str] = None,
     repo_id: Optional[str] = None,
+    class_skeleton: bool = False,
+    max_tokens: Optional[int] = None,
 ) -> List[RAGChunk]:
     """
     Chunk python code into logical units: functions, classes, (optionally) methods.
+    With class_skeleton (and include_methods) class chunks keep fields, signatures and docstrings
+    but elide method bodies, which are referenced by the ID of their method chunk.
+    With max_tokens, larger symbols are split at statement boundaries into linked parts.
 
     Returns list of RAGChunk objects with explicit fields.
     """
@@ -191,6 +243,7 @@ def chunk_python_code(
         ]
 
     header = _get_module_header(tree, lines, max_header_lines=header_max_lines) if include_header else ""
+    buffer = SourceBuffer(code, lines)
 
     chunks: List[RAGChunk] = []
 
@@ -200,12 +253,10 @@ def chunk_python_code(
             if not span:
                 continue
             start, end = span
-            body_text = _slice_lines(lines, start, end)
+            # span into the shared file buffer, the text is built when it is read
+            text = buffer.span(start, end, header)
 
-            text = (header + body_text) if include_header else body_text
-            llm_code_description = None if deferred_llm else _gen_code_description(text)
-
-            chunks.append(
+            chunks.extend(_split_symbol(
                 RAGChunk(
                     text=text,
                     **_build_chunk_fields(
@@ -214,38 +265,22 @@ def chunk_python_code(
                         symbol_name=node.name,
                         start_line=start,
                         end_line=end,
-                        llm_data=llm_code_description,
                         chunk_type="python",
                         repo_id=effective_repo_id,
                     ),
-                )
-            )
+                ),
+                node,
+                max_tokens,
+            ))
 
         elif isinstance(node, ast.ClassDef):
             span = _node_span(node)
             if not span:
                 continue
             c_start, c_end = span
-            class_text = _slice_lines(lines, c_start, c_end)
-
-            text = (header + class_text) if include_header else class_text
-            llm_code_description = None if deferred_llm else _gen_code_description(text)
-            chunks.append(
-                RAGChunk(
-                    text=text,
-                    **_build_chunk_fields(
-                        file_path=file_path,
-                        symbol_type="class",
-                        symbol_name=node.name,
-                        start_line=c_start,
-                        end_line=c_end,
-                        llm_data=llm_code_description,
-                        chunk_type="python",
-                        repo_id=effective_repo_id,
-                    ),
-                )
-            )
 
+            # (node, [method chunk, *its parts])
+            methods: List[Tuple[ast.AST, List[RAGChunk]]] = []
             if include_methods:
                 for inner in node.body:
                     if isinstance(inner, (ast.FunctionDef, ast.AsyncFunctionDef)):
@@ -253,24 +288,55 @@ def chunk_python_code(
                         if not m_span:
                             continue
                         m_start, m_end = m_span
-                        method_text = _slice_lines(lines, m_start, m_end)
-                        text = (header + method_text) if include_header else method_text
-                        llm_code_description = None if deferred_llm else _gen_code_description(text)
-                        chunks.append(
-                            RAGChunk(
-                                text=text,
-                                **_build_chunk_fields(
-                                    file_path=file_path,
-                                    symbol_type="method" if isinstance(inner, ast.FunctionDef) else "async_method",
-                                    symbol_name=f"{node.name}.{inner.name}",
-                                    start_line=m_start,
-                                    end_line=m_end,
-                                    llm_data=llm_code_description,
-                                    chunk_type="python",
-                                    repo_id=effective_repo_id,
+                        text = buffer.span(m_start, m_end, header)
+                        methods.append((
+                            inner,
+                            _split_symbol(
+                                RAGChunk(
+                                    text=text,
+                                    **_build_chunk_fields(
+                                        file_path=file_path,
+                                        symbol_type="method" if isinstance(inner, ast.FunctionDef) else "async_method",
+                                        symbol_name=f"{node.name}.{inner.name}",
+                                        start_line=m_start,
+                                        end_line=m_end,
+                                        chunk_type="python",
+                                        repo_id=effective_repo_id,
+                                    ),
                                 ),
-                            )
-                        )
+                                inner,
+                                max_tokens,
+                            ),
+                        ))
+
+            if class_skeleton and methods:
+                # method bodies live in the method chunks, the class chunk only references them
+                text = header + _class_skeleton(node, lines, {inner: pieces[0].chunk_id() for inner, pieces in methods})
+            else:
+                text = buffer.span(c_start, c_end, header)
+            class_chunk = RAGChunk(
+                text=text,
+                **_build_chunk_fields(
+                    file_path=file_path,
+                    symbol_type="class",
+                    symbol_name=node.name,
+                    start_line=c_start,
+                    end_line=c_end,
+                    chunk_type="python",
+                    repo_id=effective_repo_id,
+                ),
+            )
+            class_pieces = _split_symbol(class_chunk, node, max_tokens)
+            chunks.extend(class_pieces)
+            if methods:
+                class_id = class_pieces[0].chunk_id()
+                for _, pieces in methods:
+                    pieces[0].parent_id = class_id
+                    chunks.extend(pieces)
+
+    if not deferred_llm:
+        # docstrings, Javadoc and trivial bodies are described without the LLM
+        describe_chunks(chunks, _gen_code_description)
 
     if not chunks:
         chunks.append(
@@ -299,6 +365,8 @@ def chunk_python_file(
     deferred_llm: bool = False,
     repo_root: Optional[str] = None,
     repo_id: Optional[str] = None,
+    class_skeleton: bool = False,
+    max_tokens: Optional[int] = None,
 ) -> List[RAGChunk]:
     code = _safe_read(path)
     return chunk_python_code(
@@ -310,4 +378,6 @@ def chunk_python_file(
         deferred_llm=deferred_llm,
         repo_root=repo_root,
         repo_id=repo_id,
+        class_skeleton=class_skeleton,
+        max_tokens=max_tokens,
     )
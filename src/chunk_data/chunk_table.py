@@ -0,0 +1,197 @@
+"""
+Columnar (struct-of-arrays) chunk table for bulk operations on large corpora.
+
+- Categorical fields are dictionary-encoded: one code per row in an array("I"), one string per category
+- Line spans live in array("i") columns
+- Rows convert back to RAGChunk on demand, so meta / to_chroma_item keep working
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from chunk_data.rag_chunk import RAGChunk
+
+
+CATEGORICAL_FIELDS = ("file", "language", "symbol_type", "chunk_type", "repo_id", "description_source")
+
+
+class _CategoryColumn:
+    def __init__(self):
+        self.codes = array("I")
+        self.categories: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self._index.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(sys.intern(value))
+            self._index[value] = code
+        return code
+
+    def append(self, value: str) -> None:
+        self.codes.append(self.encode(value))
+
+    def code_of(self, value: str) -> Optional[int]:
+        return self._index.get(value)
+
+    def __getitem__(self, row: int) -> str:
+        return self.categories[self.codes[row]]
+
+
+class ChunkTable:
+    def __init__(self):
+        self._categorical = {name: _CategoryColumn() for name in CATEGORICAL_FIELDS}
+        self.text: List[object] = []
+        self.symbol_name: List[str] = []
+        self.description: List[str] = []
+        self.keywords: List[tuple] = []
+        self.parent_id: List[str] = []
+        self.start_line = array("i")
+        self.end_line = array("i")
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[RAGChunk]) -> "ChunkTable":
+        table = cls()
+        for chunk in chunks:
+            table.append(chunk)
+        return table
+
+    def append(self, chunk: RAGChunk) -> None:
+        for name, column in self._categorical.items():
+            column.append(getattr(chunk, name))
+        # keeps spans as spans, the table does not materialise chunk text
+        self.text.append(chunk.text_ref)
+        self.symbol_name.append(chunk.symbol_name)
+        self.description.append(chunk.description)
+        self.keywords.append(tuple(chunk.keywords))
+        self.parent_id.append(chunk.parent_id)
+        self.start_line.append(int(chunk.start_line))
+        self.end_line.append(int(chunk.end_line))
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def column(self, name: str) -> List[object]:
+        """
+        Decoded values of one column.
+        """
+        if name in self._categorical:
+            column = self._categorical[name]
+            return [column.categories[code] for code in column.codes]
+        return list(getattr(self, name))
+
+    def categories(self, name: str) -> List[str]:
+        return list(self._categorical[name].categories)
+
+    def row(self, i: int) -> RAGChunk:
+        return RAGChunk(
+            text=self.text[i],
+            file=self._categorical["file"][i],
+            language=self._categorical["language"][i],
+            symbol_type=self._categorical["symbol_type"][i],
+            symbol_name=self.symbol_name[i],
+            start_line=self.start_line[i],
+            end_line=self.end_line[i],
+            description=self.description[i],
+            keywords=list(self.keywords[i]),
+            chunk_type=self._categorical["chunk_type"][i],
+            repo_id=self._categorical["repo_id"][i],
+            description_source=self._categorical["description_source"][i],
+            parent_id=self.parent_id[i],
+        )
+
+    def __iter__(self) -> Iterator[RAGChunk]:
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def to_chunks(self) -> List[RAGChunk]:
+        return list(self)
+
+    def where(self, **equals: str) -> List[int]:
+        """
+        Row indices whose categorical fields equal the given values, e.g. where(language="java").
+        Compares integer codes, no strings are touched per row.
+        """
+        rows: Optional[List[int]] = None
+        for name, value in equals.items():
+            if name not in self._categorical:
+                raise KeyError(f"{name} is not a categorical column")
+            column = self._categorical[name]
+            code = column.code_of(value)
+            if code is None:
+                return []
+            candidates = range(len(self)) if rows is None else rows
+            rows = [i for i in candidates if column.codes[i] == code]
+        return list(range(len(self))) if rows is None else rows
+
+    def take(self, rows: Iterable[int]) -> List[RAGChunk]:
+        return [self.row(i) for i in rows]
+
+
+@dataclass
+class _PlainChunk:
+    """
+    Previous RAGChunk layout (plain dataclass, no interning), only used as benchmark baseline.
+    """
+    text: str
+    file: str
+    language: str
+    symbol_type: str
+    symbol_name: str
+    start_line: int
+    end_line: int
+    description: str
+    keywords: list
+    chunk_type: str
+    repo_id: str
+
+
+def _synthetic_fields(i: int, n_files: int) -> Dict[str, object]:
+    # every value is built per row, like the strings json.loads returns for a JSONL dump
+    file_no = i % n_files
+    return {
+        "text": f"def f{i}(x):\n    return x + {i}\n",
+        "file": "".join(["src/data/duui-uima/duui-", str(file_no % 40), "/src/main/python/module_", str(file_no), ".py"]),
+        "language": "".join(["pyth", "on"]),
+        "symbol_type": "".join(["func", "tion"]),
+        "symbol_name": f"f{i}",
+        "start_line": i % 500,
+        "end_line": i % 500 + 2,
+        "description": f"Adds {i} to the input.",
+        "keywords": ["".join(["file:module_", str(file_no), ".py"]), "".join(["ma", "th"]), "".join(["add", "er"])],
+        "chunk_type": "".join(["pyth", "on"]),
+        "repo_id": "".join(["repo::", str(file_no % 40).zfill(12)]),
+    }
+
+
+def _measure(build) -> Dict[str, float]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return {"bytes": current, "peak_bytes": peak, "seconds": elapsed}
+
+
+def benchmark_chunk_memory(n: int = 100_000, n_files: int = 5_000) -> Dict[str, Dict[str, float]]:
+    """
+    Memory of a synthetic n-chunk corpus as plain dataclasses, slotted RAGChunks and a ChunkTable.
+    """
+    results = {
+        "plain_dataclass": _measure(lambda: [_PlainChunk(**_synthetic_fields(i, n_files)) for i in range(n)]),
+        "ragchunk": _measure(lambda: [RAGChunk(**_synthetic_fields(i, n_files)) for i in range(n)]),
+        "chunk_table": _measure(lambda: ChunkTable.from_chunks(RAGChunk(**_synthetic_fields(i, n_files)) for i in range(n))),
+    }
+    for values in results.values():
+        values["bytes_per_chunk"] = values["bytes"] / n
+    return results
+
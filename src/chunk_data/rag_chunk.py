@@ -1,12 +1,10 @@
 from __future__ import annotations
 # Eigentlich irrelvant für Python 3.13
 
-from dataclasses import dataclass
-from typing import Dict, List
+from typing import Dict, List, Optional
 import hashlib
 import json
-
-import ollama
+import sys
 
 
 def make_repo_id(repo_root: str) -> str:
@@ -15,19 +13,93 @@ def make_repo_id(repo_root: str) -> str:
     return f"repo::{h}"
 
 
-@dataclass
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _intern_keywords(keywords) -> List[str]:
+    if isinstance(keywords, (list, tuple)):
+        return [_intern(k) for k in keywords]
+    return keywords
+
+
+_FIELDS = (
+    "text", "file", "language", "symbol_type", "symbol_name", "start_line", "end_line",
+    "description", "keywords", "chunk_type", "repo_id", "description_source", "parent_id",
+)
+
+
 class RAGChunk:
-    text: str
-    file: str
-    language: str
-    symbol_type: str
-    symbol_name: str
-    start_line: int
-    end_line: int
-    description: str
-    keywords: str
-    chunk_type: str
-    repo_id: str
+    """
+    One chunk of a source file. Slotted, and the categorical fields (file, language, types,
+    repo_id) and keywords are interned, so large corpora share one copy per distinct value.
+    text can be given as a TextSpan into the shared file buffer and is only built when read.
+    description_source records which tier wrote the description ("docstring", "signature", "llm", "none").
+    parent_id is the ID of the enclosing (skeleton) class chunk, "" for top-level chunks.
+    """
+    __slots__ = (
+        "_text", "file", "language", "symbol_type", "symbol_name", "start_line",
+        "end_line", "description", "keywords", "chunk_type", "repo_id", "description_source",
+        "parent_id",
+    )
+
+    def __init__(
+        self,
+        text,
+        file: str,
+        language: str,
+        symbol_type: str,
+        symbol_name: str,
+        start_line: int,
+        end_line: int,
+        description: str,
+        keywords: List[str],
+        chunk_type: str,
+        repo_id: str,
+        description_source: str = "none",
+        parent_id: str = "",
+    ) -> None:
+        self._text = text
+        self.file = _intern(file)
+        self.language = _intern(language)
+        self.symbol_type = _intern(symbol_type)
+        self.symbol_name = symbol_name
+        self.start_line = start_line
+        self.end_line = end_line
+        self.description = description
+        self.keywords = _intern_keywords(keywords)
+        self.chunk_type = _intern(chunk_type)
+        self.repo_id = _intern(repo_id)
+        self.description_source = _intern(description_source)
+        self.parent_id = parent_id
+
+    @property
+    def text(self) -> str:
+        # a TextSpan is materialised on every read, the span itself stays stored
+        value = self._text
+        return value if type(value) is str else value.materialize()
+
+    @text.setter
+    def text(self, value) -> None:
+        self._text = value
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in _FIELDS)
+        return f"RAGChunk({fields})"
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in _FIELDS)
+
+    __hash__ = None
+
+    @property
+    def text_ref(self):
+        """
+        The stored text without materialising it (str or TextSpan).
+        """
+        return self._text
 
     @property
     def meta(self) -> Dict[str, object]:
@@ -43,18 +115,24 @@ class RAGChunk:
             "keywords": self.keywords,
             "chunk_type": self.chunk_type,
             "repo_id": self.repo_id,
+            "description_source": self.description_source,
+            "parent_id": self.parent_id,
         }
 
-    def gen_embedding_meta(self):
-        embedding_string = f"""
+    def embedding_input(self) -> str:
+        """
+        The text that is embedded for this chunk (file, description and keywords, not the code).
+        """
+        return f"""
             name: {self.file}
             summary: {self.description}
             keywords: {self.keywords}
         """
-        return ollama.embed(
-            model="mxbai-embed-large",
-            input=embedding_string,
-        ).embeddings[0]
+
+    def gen_embedding_meta(self):
+        # imported here, utils imports this module
+        from utils import embed_ollama
+        return embed_ollama(self.embedding_input())
     
     def append_llm_data(self, llm_data: str) -> None:
         """
@@ -73,33 +151,54 @@ class RAGChunk:
         elif not isinstance(kw, list):
             kw = [str(kw)]
         self.description = desc
-        self.keywords = kw
+        self.keywords = _intern_keywords(kw)
+        self.description_source = "llm" if desc != "N.A" else "none"
 
-    def to_chroma_item(
+    def chunk_id(
         self,
         *,
         id_mode: str = "stable_hash",
         id_prefix: str = "id",
-    ) -> Dict[str, object]:
+    ) -> str:
+        """
+        Stable chunk ID, independent of the description and the embedding.
+        """
         file_path = str(self.file)
         symbol_type = str(self.symbol_type)
         symbol_name = str(self.symbol_name)
         start_line = int(self.start_line)
         end_line = int(self.end_line)
         language = str(self.language)
-        description = str(self.description)
-        keywords = str(", ".join(self.keywords))
 
         #TODO überlege eine bessere hashmethode für die IDS, file_path komisch
         if id_mode == "symbol_lines":
             raw_id = f"{id_prefix}::{file_path}::{symbol_type}::{symbol_name}::{start_line}-{end_line}"
-            chunk_id = raw_id.replace("\\", "/")
-        elif id_mode == "stable_hash":
+            return raw_id.replace("\\", "/")
+        if id_mode == "stable_hash":
             base = f"{file_path}|{symbol_type}|{symbol_name}|{start_line}|{end_line}|{language}|{self.text}"
             h = hashlib.sha1(base.encode("utf-8")).hexdigest()[:24]
-            chunk_id = f"{id_prefix}::{h}"
-        else:
-            raise ValueError("id_mode must be 'stable_hash' or 'symbol_lines'")
+            return f"{id_prefix}::{h}"
+        raise ValueError("id_mode must be 'stable_hash' or 'symbol_lines'")
+
+    def to_chroma_item(
+        self,
+        *,
+        id_mode: str = "stable_hash",
+        id_prefix: str = "id",
+        embedding: Optional[List[float]] = None,
+    ) -> Dict[str, object]:
+        """
+        Chroma record of the chunk, embedding is computed if not given (e.g. by a batch call).
+        """
+        file_path = str(self.file)
+        symbol_type = str(self.symbol_type)
+        symbol_name = str(self.symbol_name)
+        start_line = int(self.start_line)
+        end_line = int(self.end_line)
+        language = str(self.language)
+        description = str(self.description)
+        keywords = str(", ".join(self.keywords))
+        chunk_id = self.chunk_id(id_mode=id_mode, id_prefix=id_prefix)
 
         chroma_meta = {
             "file": file_path.replace("\\", "/"),
@@ -112,11 +211,13 @@ class RAGChunk:
             "keywords": keywords,
             "chunk_type": self.chunk_type,
             "repo_id": self.repo_id,
+            "description_source": self.description_source,
+            "parent_id": self.parent_id,
         }
 
         return {
             "id": chunk_id,
-            "embedding": self.gen_embedding_meta(),
+            "embedding": self.gen_embedding_meta() if embedding is None else embedding,
             "document": self.text,
             "metadata": chroma_meta,
         }
@@ -132,35 +233,40 @@ class RAGChunk:
         return self.to_chroma_item(id_mode=id_mode, id_prefix=id_prefix)
 
 
+def ragchunk_from_json_item(item: Dict[str, object]) -> RAGChunk:
+    """
+    Convert one JSONL-loaded dict into a RAGChunk, the embedding is not needed.
+    """
+    document = str(item.get("document", ""))
+    metadata = item.get("metadata", {}) or {}
+    keywords = metadata.get("keywords", "")
+    if isinstance(keywords, str):
+        keywords_list = [k.strip() for k in keywords.split(",") if k.strip()]
+    elif isinstance(keywords, list):
+        keywords_list = [str(k).strip() for k in keywords if str(k).strip()]
+    else:
+        keywords_list = []
+
+    return RAGChunk(
+        text=document,
+        file=str(metadata.get("file", "")),
+        language=str(metadata.get("language", "")),
+        symbol_type=str(metadata.get("symbol_type", "")),
+        symbol_name=str(metadata.get("symbol_name", "")),
+        start_line=int(metadata.get("start_line", 0) or 0),
+        end_line=int(metadata.get("end_line", 0) or 0),
+        description=str(metadata.get("description", "N.A")),
+        keywords=keywords_list,
+        chunk_type=str(metadata.get("chunk_type", "code")),
+        repo_id=str(metadata.get("repo_id", "repo::unknown")),
+        # dumps written before the tiers only have LLM descriptions
+        description_source=str(metadata.get("description_source", "llm" if metadata.get("description", "N.A") != "N.A" else "none")),
+        parent_id=str(metadata.get("parent_id", "")),
+    )
+
+
 def ragchunks_from_json_items(items: List[Dict[str, object]]) -> List[RAGChunk]:
     """
     Convert a list of JSONL-loaded dicts into RAGChunk objects.
     """
-    chunks: List[RAGChunk] = []
-    for item in items:
-        document = str(item.get("document", ""))
-        metadata = item.get("metadata", {}) or {}
-        keywords = metadata.get("keywords", "")
-        if isinstance(keywords, str):
-            keywords_list = [k.strip() for k in keywords.split(",") if k.strip()]
-        elif isinstance(keywords, list):
-            keywords_list = [str(k).strip() for k in keywords if str(k).strip()]
-        else:
-            keywords_list = []
-
-        chunks.append(
-            RAGChunk(
-                text=document,
-                file=str(metadata.get("file", "")),
-                language=str(metadata.get("language", "")),
-                symbol_type=str(metadata.get("symbol_type", "")),
-                symbol_name=str(metadata.get("symbol_name", "")),
-                start_line=int(metadata.get("start_line", 0) or 0),
-                end_line=int(metadata.get("end_line", 0) or 0),
-                description=str(metadata.get("description", "N.A")),
-                keywords=keywords_list,
-                chunk_type=str(metadata.get("chunk_type", "code")),
-                repo_id=str(metadata.get("repo_id", "repo::unknown")),
-            )
-        )
-    return chunks
+    return [ragchunk_from_json_item(item) for item in items]
@@ -0,0 +1,118 @@
+"""
+Token-aware splitting of oversized symbol chunks.
+
+- A chunk above max_tokens is cut at statement/block boundaries (line numbers given by the chunker)
+- The symbol chunk keeps the header and the first piece, the rest become "<symbol_type>_part"
+  chunks without header, linked to it by parent_id
+- Each part starts with the last segment of the previous piece if it fits in overlap_tokens
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, List, Tuple
+
+import utils
+from chunk_data.rag_chunk import RAGChunk
+from chunk_data.text_span import SourceBuffer, TextSpan
+
+
+DEFAULT_OVERLAP_TOKENS = 64
+
+
+def _segments(start: int, end: int, boundaries: Iterable[int]) -> List[Tuple[int, int]]:
+    """
+    Inclusive line ranges between consecutive boundaries inside [start, end].
+    """
+    cuts = sorted({b for b in boundaries if start < b <= end})
+    starts = [start, *cuts]
+    ends = [c - 1 for c in cuts] + [end]
+    return list(zip(starts, ends))
+
+
+def _pieces(buffer: SourceBuffer, segments: List[Tuple[int, int]], first_budget: int, budget: int) -> List[List[Tuple[int, int, int]]]:
+    # greedy: add segments to the current piece until the next one would not fit
+    pieces: List[List[Tuple[int, int, int]]] = [[]]
+    used = 0
+    pending = list(reversed(segments))
+    while pending:
+        seg_start, seg_end = pending.pop()
+        tokens = utils.count_tokens(buffer.span(seg_start, seg_end).body())
+        limit = first_budget if len(pieces) == 1 else budget
+        if tokens > limit and seg_end > seg_start:
+            # a single statement above the budget (e.g. a long literal) is cut into lines
+            pending.extend((line, line) for line in range(seg_end, seg_start - 1, -1))
+            continue
+        if pieces[-1] and used + tokens > limit:
+            pieces.append([])
+            used = 0
+        pieces[-1].append((seg_start, seg_end, tokens))
+        used += tokens
+    return pieces
+
+
+def split_oversized(
+    chunk: RAGChunk,
+    boundaries: Iterable[int],
+    max_tokens: int,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+) -> List[RAGChunk]:
+    """
+    Returns [chunk] if it fits, otherwise the shortened symbol chunk followed by its parts.
+    Only chunks whose text is a TextSpan can be split.
+    """
+    ref = chunk.text_ref
+    if not isinstance(ref, TextSpan) or utils.count_tokens(chunk.text) <= max_tokens:
+        return [chunk]
+
+    buffer = ref.buffer
+    start, end = int(chunk.start_line), int(chunk.end_line)
+    header_tokens = utils.count_tokens(ref.header) if ref.header else 0
+    pieces = _pieces(
+        buffer,
+        _segments(start, end, boundaries),
+        first_budget=max(max_tokens - header_tokens, 1),
+        budget=max_tokens - overlap_tokens,
+    )
+    if len(pieces) == 1:
+        return [chunk]
+
+    head_end = pieces[0][-1][1]
+    head = RAGChunk(
+        text=buffer.span(start, head_end, ref.header),
+        file=chunk.file,
+        language=chunk.language,
+        symbol_type=chunk.symbol_type,
+        symbol_name=chunk.symbol_name,
+        start_line=start,
+        end_line=head_end,
+        description=chunk.description,
+        keywords=chunk.keywords,
+        chunk_type=chunk.chunk_type,
+        repo_id=chunk.repo_id,
+        description_source=chunk.description_source,
+        parent_id=chunk.parent_id,
+    )
+    head_id = head.chunk_id()
+
+    result = [head]
+    for previous, piece in zip(pieces, pieces[1:]):
+        last_start, _, last_tokens = previous[-1]
+        part_start = last_start if last_tokens <= overlap_tokens else piece[0][0]
+        part_end = piece[-1][1]
+        result.append(
+            RAGChunk(
+                text=buffer.span(part_start, part_end),
+                file=chunk.file,
+                language=chunk.language,
+                symbol_type=f"{chunk.symbol_type}_part",
+                symbol_name=chunk.symbol_name,
+                start_line=part_start,
+                end_line=part_end,
+                description="N.A",
+                keywords=["N.A"],
+                chunk_type=chunk.chunk_type,
+                repo_id=chunk.repo_id,
+                parent_id=head_id,
+            )
+        )
+    return result
@@ -0,0 +1,261 @@
+"""
+Tiered chunk descriptions, the LLM is only asked when the deterministic tiers are not good enough.
+
+- docstring: first sentences of the Python docstring or Javadoc of the symbol
+- signature: trivial code (getters, setters, one-statement bodies) described from its signature
+- llm: every chunk scoring below min_score goes to llm_code_description
+
+Keywords come from the file name, the language and the parts of the symbol name.
+The threshold is min_score or DESCRIPTION_MIN_SCORE (0..1, default 0.5).
+"""
+
+from __future__ import annotations
+
+import ast
+import os
+import re
+import textwrap
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+from chunk_data.rag_chunk import RAGChunk
+from chunk_data.text_span import TextSpan
+
+
+DEFAULT_MIN_SCORE = 0.5
+# a docstring with this many words fully covers a short symbol
+_DOC_WORDS_FULL = 8
+_CODE_LINES_FULL = 60
+_MAX_DESCRIPTION_CHARS = 300
+_SKIP_NAME_PARTS = {"get", "set", "is", "init", "self", "the", "to"}
+_CODE_SYMBOL_TYPES = {
+    "function", "async_function", "class", "method", "async_method",
+    "constructor", "interface", "enum",
+}
+
+_JAVA_GETTER_RE = re.compile(r"^return\s+(?:this\.)?(\w+)\s*;$")
+_JAVA_SETTER_RE = re.compile(r"^(?:this\.)?(\w+)\s*=\s*(\w+)\s*;$")
+_JAVADOC_TAG_RE = re.compile(r"\{@\w+\s+([^}]*)\}")
+_HTML_TAG_RE = re.compile(r"</?\w+[^>]*>")
+
+
+@dataclass
+class StaticDescription:
+    description: str
+    keywords: List[str]
+    source: str
+    score: float
+
+
+def min_score_from_env(default: float = DEFAULT_MIN_SCORE) -> float:
+    value = os.getenv("DESCRIPTION_MIN_SCORE")
+    return float(value) if value else default
+
+
+def _name_parts(symbol_name: str) -> List[str]:
+    parts: List[str] = []
+    for piece in re.split(r"[._]", symbol_name):
+        parts.extend(re.findall(r"[A-Z]?[a-z0-9]+|[A-Z]+(?![a-z])", piece))
+    return [p.lower() for p in parts]
+
+
+def _keywords(chunk: RAGChunk, extra: Iterable[str] = ()) -> List[str]:
+    keywords = [f"file:{os.path.basename(chunk.file)}", chunk.language]
+    for word in [*_name_parts(chunk.symbol_name), *extra]:
+        if len(word) > 2 and word not in _SKIP_NAME_PARTS and word not in keywords:
+            keywords.append(word)
+    return keywords[:8]
+
+
+def _summary(doc: str) -> str:
+    """
+    First paragraph of a docstring, cut to two sentences.
+    """
+    paragraph = doc.strip().split("\n\n")[0]
+    text = " ".join(paragraph.split())
+    sentences = re.split(r"(?<=[.!?])\s+", text)
+    summary = " ".join(sentences[:2])
+    if len(summary) > _MAX_DESCRIPTION_CHARS:
+        summary = summary[:_MAX_DESCRIPTION_CHARS].rsplit(" ", 1)[0] + " ..."
+    return summary
+
+
+def _doc_score(summary: str, code_lines: int) -> float:
+    coverage = min(1.0, len(summary.split()) / _DOC_WORDS_FULL)
+    # a one-liner does not describe a long body well enough
+    return coverage * min(1.0, _CODE_LINES_FULL / max(code_lines, 1))
+
+
+def _prefer_docstring(documented: Optional[StaticDescription], signature: StaticDescription, min_score: float) -> StaticDescription:
+    # a written docstring says more than the generated getter/setter sentence, unless it is a stub
+    if documented is not None and documented.score >= min_score:
+        return documented
+    return signature
+
+
+def _kind(chunk: RAGChunk) -> str:
+    return chunk.symbol_type.replace("_", " ").capitalize()
+
+
+def _chunk_code(chunk: RAGChunk) -> str:
+    ref = chunk.text_ref
+    return ref.body() if isinstance(ref, TextSpan) else chunk.text
+
+
+def _python_node(code: str, name: str) -> Optional[ast.AST]:
+    # the stored text may start with the module header, parse from the declaration on
+    match = re.search(rf"^[ \t]*(?:async\s+def|def|class)\s+{re.escape(name)}\b", code, re.MULTILINE)
+    if not match:
+        return None
+    try:
+        tree = ast.parse(textwrap.dedent(code[match.start():]))
+    except SyntaxError:
+        return None
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)) and node.name == name:
+            return node
+    return None
+
+
+def _python_trivial(node: ast.AST) -> Optional[tuple]:
+    if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return None
+    body = [stmt for stmt in node.body if not (isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant))]
+    if len(body) != 1:
+        return None
+    stmt = body[0]
+    if isinstance(stmt, ast.Pass):
+        return "stub", "Does nothing (empty body)."
+    if isinstance(stmt, ast.Return) and isinstance(stmt.value, (ast.Attribute, ast.Name, ast.Constant)):
+        return "getter", f"Returns {ast.unparse(stmt.value)}."
+    if (isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Attribute)
+            and isinstance(stmt.value, (ast.Name, ast.Constant))):
+        return "setter", f"Sets {ast.unparse(stmt.targets[0])} to {ast.unparse(stmt.value)}."
+    return None
+
+
+def _python_description(chunk: RAGChunk, min_score: float) -> Optional[StaticDescription]:
+    code = _chunk_code(chunk)
+    name = chunk.symbol_name.split(".")[-1]
+    node = _python_node(code, name)
+    if node is None:
+        return None
+    prefix = f"{_kind(chunk)} {chunk.symbol_name} in {os.path.basename(chunk.file)}"
+    code_lines = (node.end_lineno or node.lineno) - node.lineno + 1
+
+    doc = ast.get_docstring(node)
+    documented = None
+    if doc:
+        summary = _summary(doc)
+        documented = StaticDescription(f"{prefix}: {summary}", _keywords(chunk), "docstring", _doc_score(summary, code_lines))
+    trivial = _python_trivial(node)
+    if trivial is not None:
+        kind, what = trivial
+        args = ", ".join(a.arg for a in node.args.args if a.arg not in ("self", "cls"))
+        signature = StaticDescription(f"{prefix}({args}): {what}", _keywords(chunk, [kind]), "signature", 1.0)
+        return _prefer_docstring(documented, signature, min_score)
+    return documented
+
+
+def _preceding_javadoc(ref: TextSpan) -> Optional[str]:
+    lines = ref.buffer.text[:ref.start].rstrip().splitlines()
+    # annotations sit between the Javadoc and the declaration
+    while lines and lines[-1].strip().startswith("@"):
+        lines.pop()
+    before = "\n".join(lines).rstrip()
+    if not before.endswith("*/"):
+        return None
+    start = before.rfind("/**")
+    if start < 0:
+        return None
+    body = before[start + 3:-2]
+    doc_lines = [line.strip().lstrip("*").strip() for line in body.splitlines()]
+    # block tags (@param, @return, ...) follow the description
+    doc_lines = [line for line in doc_lines if not line.startswith("@")]
+    doc = "\n".join(doc_lines)
+    doc = _JAVADOC_TAG_RE.sub(r"\1", doc)
+    return _HTML_TAG_RE.sub("", doc).strip() or None
+
+
+def _java_trivial(code: str) -> Optional[tuple]:
+    open_idx, close_idx = code.find("{"), code.rfind("}")
+    if open_idx < 0 or close_idx <= open_idx:
+        return None
+    statements = [s.strip() for s in code[open_idx + 1:close_idx].strip().splitlines() if s.strip()]
+    if not statements:
+        return "stub", "Does nothing (empty body)."
+    if len(statements) != 1:
+        return None
+    getter = _JAVA_GETTER_RE.match(statements[0])
+    if getter:
+        return "getter", f"Returns {getter.group(1)}."
+    setter = _JAVA_SETTER_RE.match(statements[0])
+    if setter:
+        return "setter", f"Sets {setter.group(1)} to {setter.group(2)}."
+    return None
+
+
+def _java_description(chunk: RAGChunk, min_score: float) -> Optional[StaticDescription]:
+    code = _chunk_code(chunk)
+    prefix = f"{_kind(chunk)} {chunk.symbol_name} in {os.path.basename(chunk.file)}"
+    ref = chunk.text_ref
+    doc = _preceding_javadoc(ref) if isinstance(ref, TextSpan) else None
+    documented = None
+    if doc:
+        summary = _summary(doc)
+        code_lines = int(chunk.end_line) - int(chunk.start_line) + 1
+        documented = StaticDescription(f"{prefix}: {summary}", _keywords(chunk), "docstring", _doc_score(summary, code_lines))
+
+    trivial = _java_trivial(code) if chunk.symbol_type in ("method", "constructor") else None
+    if trivial is not None:
+        kind, what = trivial
+        signature = StaticDescription(f"{prefix}: {what}", _keywords(chunk, [kind]), "signature", 1.0)
+        return _prefer_docstring(documented, signature, min_score)
+    return documented
+
+
+def static_description(chunk: RAGChunk, min_score: Optional[float] = None) -> Optional[StaticDescription]:
+    """
+    Best deterministic description of a code chunk, None if there is nothing to build it from.
+    A docstring is preferred over a signature sentence if it scores at least min_score.
+    """
+    if chunk.symbol_type not in _CODE_SYMBOL_TYPES:
+        return None
+    threshold = min_score_from_env() if min_score is None else min_score
+    if chunk.language == "python":
+        return _python_description(chunk, threshold)
+    if chunk.language == "java":
+        return _java_description(chunk, threshold)
+    return None
+
+
+def apply_static_description(chunk: RAGChunk, min_score: Optional[float] = None) -> bool:
+    """
+    Sets description, keywords and description_source if a deterministic tier scores at least min_score.
+    """
+    threshold = min_score_from_env() if min_score is None else min_score
+    found = static_description(chunk, threshold)
+    if found is None or found.score < threshold:
+        return False
+    chunk.description = found.description
+    chunk.keywords = found.keywords
+    chunk.description_source = found.source
+    return True
+
+
+def describe_chunks(
+    chunks: Iterable[RAGChunk],
+    llm_describe: Callable[[str], object],
+    min_score: Optional[float] = None,
+) -> Dict[str, int]:
+    """
+    Describes every chunk with the cheapest sufficient tier, llm_describe(code) only for the rest.
+    Returns the number of chunks per description_source.
+    """
+    counts: Counter = Counter()
+    for chunk in chunks:
+        if not apply_static_description(chunk, min_score):
+            chunk.append_llm_data(llm_describe(chunk.text))
+        counts[chunk.description_source] += 1
+    return dict(counts)
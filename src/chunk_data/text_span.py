@@ -0,0 +1,64 @@
+"""
+Zero-copy chunk text.
+
+- SourceBuffer: the file text once per file plus the character offset of every line
+- TextSpan: (buffer, start offset, end offset, header ref), the chunk text is only
+  built when it is read (embedding, description, output)
+"""
+
+from __future__ import annotations
+
+from itertools import accumulate
+from typing import List, Optional
+
+
+class SourceBuffer:
+    __slots__ = ("text", "line_offsets")
+
+    def __init__(self, text: str, lines: Optional[List[str]] = None):
+        """
+        lines must be text.splitlines(keepends=True) if given (the chunkers already have it).
+        """
+        self.text = text
+        if lines is None:
+            lines = text.splitlines(keepends=True)
+        # line_offsets[i] is the offset of line i + 1, the last entry is len(text)
+        self.line_offsets = [0, *accumulate(len(line) for line in lines)]
+
+    @property
+    def line_count(self) -> int:
+        return len(self.line_offsets) - 1
+
+    def span(self, start_line: int, end_line: int, header: str = "") -> "TextSpan":
+        """
+        Span of the 1-indexed inclusive line range, clamped like _slice_lines in the chunkers.
+        """
+        start_idx = min(max(start_line - 1, 0), self.line_count)
+        end_idx = min(max(end_line, start_idx), self.line_count)
+        return TextSpan(self, self.line_offsets[start_idx], self.line_offsets[end_idx], header)
+
+
+class TextSpan:
+    __slots__ = ("buffer", "start", "end", "header")
+
+    def __init__(self, buffer: SourceBuffer, start: int, end: int, header: str = ""):
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+        self.header = header
+
+    def materialize(self) -> str:
+        body = self.buffer.text[self.start:self.end]
+        return self.header + body if self.header else body
+
+    def body(self) -> str:
+        return self.buffer.text[self.start:self.end]
+
+    def __len__(self) -> int:
+        return len(self.header) + self.end - self.start
+
+    def __str__(self) -> str:
+        return self.materialize()
+
+    def __repr__(self) -> str:
+        return f"TextSpan({self.start}:{self.end}, header={len(self.header)} chars)"
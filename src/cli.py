@@ -0,0 +1,512 @@
+"""
+Command line interface for the DUUI RagBot.
+
+    python src/cli.py ingest [--batch] [--skeleton] [--max-tokens N] [--output PATH]
+    python src/cli.py ingest --shard I/N | --workers N [--out-dir DIR]
+    python src/cli.py merge DIR -n N [--output PATH] [--snapshot DIR] [-c COLLECTION]
+    python src/cli.py query "question" -c all_data_v1 [-c java_v2] [-k 5] [--hyde] [--version REPO@VERSION] [--facet KIND=VALUE] [--mmr]
+                                  [--rerank llm|cross-encoder] [--budget S]
+    python src/cli.py describe PATH [--no-llm]
+    python src/cli.py bench [MODULE ...] [--memory N]
+    python src/cli.py tokens [PATH ...]
+    python src/cli.py upsert [JSONL] -c COLLECTION [--batch-size N] [--restart]
+    python src/cli.py facets [KIND [VALUE]] [--contains TEXT]
+    python src/cli.py chat -c all_data_v1 [--lang java] [--mmr]
+    python src/cli.py symbols "where is HateCheck defined?" [--index PATH] [--all-kinds]
+    python src/cli.py versions index REPO_PATH REV [REV ...] [--store DIR] | sync -c COLLECTION | list
+    python src/cli.py snapshot export|import DIR [-c COLLECTION] [--jsonl PATH [--embedding-model SIG]] [--index DIR]
+    python src/cli.py eval [QUERIES] -c all_data_v1 -k 5 -k 10 [--mode hyde] [--rag-path DIR]
+
+Every command imports its heavy dependencies (openai, chromadb, ollama) only when it runs,
+so starting the CLI or a pure chunking run stays fast.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+# cumulative import time (-X importtime) of the module itself, without interpreter startup
+COLD_START_TARGETS_MS = {
+    "cli": 100,
+    "chunk_data.chunk_python": 150,
+    "chunk_data.chunk_java": 150,
+    "llm_wrapper": 150,
+    "import_data": 300,
+}
+DUUI_PATHS = ("src/data/duui-uima/duui-Hate", "src/data/duui-uima/duui-entailment")
+HEAVY_MODULES = ("openai", "chromadb", "pydantic", "ollama", "dotenv", "numpy")
+
+
+def import_time_report(module: str, python: str = sys.executable) -> Dict[str, object]:
+    """
+    Imports module in a fresh interpreter with -X importtime and summarizes the output:
+    cumulative import time of the module, wall time of the whole process,
+    heavy dependencies that got imported and the slowest imports.
+    """
+    code = f"import sys, {module}; print(','.join(sorted(m for m in sys.modules if '.' not in m)))"
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", code],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    timings: Dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # nested imports are indented, keep the first (outermost) entry per name
+        timings.setdefault(name.strip(), int(cumulative) / 1000)
+
+    loaded = set(proc.stdout.strip().split(","))
+    top = sorted(timings.items(), key=lambda item: -item[1])[:10]
+    return {
+        "module": module,
+        "import_ms": timings.get(module, 0.0),
+        "wall_ms": wall_ms,
+        "target_ms": COLD_START_TARGETS_MS.get(module),
+        "heavy": [m for m in HEAVY_MODULES if m in loaded],
+        "top": top,
+    }
+
+
+def skeleton_token_report(paths: List[str]) -> Dict[str, object]:
+    """
+    Tokens of all chunks and of the class chunks of the .py/.java files under paths,
+    with full class bodies and with skeleton class chunks.
+    """
+    from chunk_data.chunk_java import chunk_java_file
+    from chunk_data.chunk_python import chunk_python_file
+    from utils import count_tokens, filter_files
+
+    totals = {mode: {"all": 0, "classes": 0} for mode in ("full", "skeleton")}
+    files = 0
+    for path in paths:
+        for file in filter_files(path, {".py", ".java"}):
+            chunker = chunk_python_file if file.endswith(".py") else chunk_java_file
+            files += 1
+            for mode in totals:
+                for chunk in chunker(file, deferred_llm=True, class_skeleton=mode == "skeleton"):
+                    tokens = count_tokens(chunk.text)
+                    totals[mode]["all"] += tokens
+                    if chunk.symbol_type in ("class", "interface", "enum"):
+                        totals[mode]["classes"] += tokens
+    saved = totals["full"]["all"] - totals["skeleton"]["all"]
+    return {
+        "files": files,
+        **totals,
+        "saved_tokens": saved,
+        "saved_ratio": saved / totals["full"]["all"] if totals["full"]["all"] else 0.0,
+    }
+
+
+def cmd_ingest(args: argparse.Namespace) -> int:
+    import import_data
+
+    if args.shard or args.workers:
+        import sharded_ingest
+
+        kwargs = dict(use_batch=args.batch, class_skeleton=args.skeleton, max_tokens=args.max_tokens)
+        files = import_data.duui_files()
+        if args.shard:
+            index, n_shards = (int(part) for part in args.shard.split("/"))
+            manifests = [sharded_ingest.ingest_shard(files, index, n_shards, args.out_dir, **kwargs)]
+        else:
+            manifests = sharded_ingest.run_local(files, args.workers, args.out_dir, **kwargs)
+        for manifest in manifests:
+            if manifest is not None:
+                print(f"shard {manifest['shard']}/{manifest['n_shards']}: {len(manifest['files'])} files, {manifest['count']} chunks")
+        return 0 if all(m is not None for m in manifests) else 1
+
+    import_data.load_data(use_batch=args.batch, output_path=args.output, class_skeleton=args.skeleton,
+                          max_tokens=args.max_tokens or None)
+    return 0
+
+
+def cmd_query(args: argparse.Namespace) -> int:
+    import RAG
+    import rerank
+
+    collections: List[str] = args.collection
+    # the reranker picks the k best out of a larger first-stage list
+    n_first = max(args.k, rerank.RERANK_CANDIDATES) if args.rerank else args.k
+    where = None
+    if args.version or args.facet:
+        clauses = []
+        if args.version:
+            import versioned_index
+
+            repo, _, version = args.version.partition("@")
+            clauses.append(versioned_index.version_where(repo, version))
+        if args.facet:
+            import facets
+
+            store = facets.load_cached()
+            repo_ids = store.match(dict(f.split("=", 1) for f in args.facet)) if store else set()
+            if not repo_ids:
+                print("no repo matches the facets")
+                return 1
+            clauses.append(facets.facet_where(repo_ids))
+        where = clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    if args.hyde:
+        if len(collections) > 1:
+            print("--hyde queries a single collection, pass one -c")
+            return 1
+        result = RAG.query_results_hyde(args.question, collection_name=collections[0], n_results=n_first, coding_lg=args.lang,
+                                        where=where, diversify=args.mmr)
+    elif where is not None or len(collections) > 1:
+        result = RAG.query_results_federated(args.question, collection_names=collections, n_results=n_first, where=where,
+                                               diversify=args.mmr)
+    else:
+        result = RAG.query_results(args.question, collection_name=collections[0], n_results=n_first, diversify=args.mmr)
+    if args.rerank:
+        result = rerank.rerank_results(args.question, result, n_results=args.k,
+                                       scorer=rerank.get_scorer(args.rerank), budget_s=args.budget, top_n=n_first)
+        if not result["reranked"]:
+            print("reranking ran over budget or failed, first-stage order")
+
+    if args.version:
+        import versioned_index
+
+        # a chunk shared by several versions has other line numbers in each of them
+        repo, _, version = args.version.partition("@")
+        result = versioned_index.apply_version(result, repo, version)
+
+    metadatas = (result.get("metadatas") or [[]])[0]
+    distances = (result.get("distances") or [[]])[0]
+    for i, meta in enumerate(metadatas):
+        distance = distances[i] if i < len(distances) else None
+        print(f"[{i + 1}] {meta.get('file')}:{meta.get('start_line')}-{meta.get('end_line')} "
+              f"{meta.get('symbol_name')} (distance={distance})")
+    return 0
+
+
+def cmd_describe(args: argparse.Namespace) -> int:
+    import import_data
+    from chunk_data.static_description import apply_static_description
+
+    chunks = import_data.chunk_file(args.path, deferred_llm=True)
+    for chunk in chunks:
+        if apply_static_description(chunk, args.min_score):
+            pass
+        elif not args.no_llm:
+            _, data = import_data.describe_chunk(chunk)
+            chunk.append_llm_data(data)
+        meta = dict(chunk.meta)
+        meta.pop("code", None)
+        print(json.dumps(meta, ensure_ascii=False))
+    return 0
+
+
+def cmd_bench(args: argparse.Namespace) -> int:
+    if args.memory:
+        from chunk_data.chunk_table import benchmark_chunk_memory
+
+        for layout, values in benchmark_chunk_memory(n=args.memory).items():
+            print(f"{layout:<16} {values['bytes_per_chunk']:8.1f} B/chunk  "
+                  f"peak {values['peak_bytes'] / 1e6:8.1f} MB  {values['seconds']:.2f} s")
+        return 0
+
+    failed = False
+    for module in args.modules or list(COLD_START_TARGETS_MS):
+        report = import_time_report(module)
+        target = report["target_ms"]
+        ok = (target is None or report["import_ms"] <= target) and not report["heavy"]
+        failed = failed or not ok
+        print(f"{module:<28} import {report['import_ms']:8.1f} ms  wall {report['wall_ms']:8.1f} ms  "
+              f"target {target if target is not None else '-':>5}  {'OK' if ok else 'FAIL'}")
+        if report["heavy"]:
+            print(f"    heavy imports: {', '.join(report['heavy'])}")
+        if args.verbose:
+            for name, ms in report["top"]:
+                print(f"    {ms:8.1f} ms  {name}")
+    return 1 if failed else 0
+
+
+def cmd_tokens(args: argparse.Namespace) -> int:
+    paths = [p for p in args.paths if os.path.exists(p)]
+    for missing in set(args.paths) - set(paths):
+        print(f"skipping missing path {missing}")
+    report = skeleton_token_report(paths)
+    print(f"{report['files']} files")
+    for mode in ("full", "skeleton"):
+        print(f"{mode:<9} all chunks {report[mode]['all']:>10}  class chunks {report[mode]['classes']:>10} tokens")
+    print(f"saved     {report['saved_tokens']:>10} tokens ({report['saved_ratio']:.1%})")
+    return 0
+
+
+def cmd_chat(args: argparse.Namespace) -> int:
+    import chat_session
+
+    collection = args.collection[0] if len(args.collection) == 1 else args.collection
+    session = chat_session.ChatSession(collection, coding_lg=args.lang, retrieval_options={"diversify": args.mmr})
+    while True:
+        try:
+            question = input("> ").strip()
+        except EOFError:
+            break
+        if not question:
+            break
+        print(session.ask(question))
+        turn = session.turns[-1]
+        print(f"({turn.mode}, {len(turn.new_chunk_ids)} new chunks, {turn.prompt_tokens} prompt tokens, "
+              f"retrieval {turn.retrieval_ms:.0f} ms)")
+    return 0
+
+
+def cmd_symbols(args: argparse.Namespace) -> int:
+    import symbol_index
+
+    index = symbol_index.load_cached(args.index)
+    if index is None:
+        print(f"no symbol index at {args.index or symbol_index.DEFAULT_SYMBOL_INDEX_PATH}, run ingest first")
+        return 1
+    started = time.perf_counter()
+    answer = symbol_index.answer_location(args.query, index)
+    if answer is None:
+        kinds = None if args.all_kinds else ("definition",)
+        mode, hits = index.lookup(args.query, kinds=kinds)
+        answer = "\n".join([f"{mode} match:"] + [f"- {h.kind} {h.symbol_type} {h.name} at {h.citation()}" for h in hits])
+    print(answer)
+    print(f"{(time.perf_counter() - started) * 1000:.2f} ms")
+    return 0
+
+
+def cmd_facets(args: argparse.Namespace) -> int:
+    import facets
+
+    store = facets.load_cached(args.store)
+    if store is None:
+        print(f"no facet store at {args.store or facets.DEFAULT_FACET_STORE_PATH}, run ingest first")
+        return 1
+    if args.kind is None:
+        for kind in facets.FACET_KINDS:
+            print(f"{kind}: {len(store.values(kind))} values")
+    elif args.value is None and not args.contains:
+        for value in store.values(args.kind):
+            print(f"{value}: {', '.join(store.components(store.repo_ids(args.kind, value)))}")
+    else:
+        repo_ids = store.repo_ids(args.kind, args.value, contains=args.contains)
+        for component in store.components(repo_ids):
+            print(component)
+    return 0
+
+
+def cmd_upsert(args: argparse.Namespace) -> int:
+    import chroma_writer
+
+    report = chroma_writer.upsert_jsonl(args.jsonl, args.collection, restart=args.restart, batch_size=args.batch_size)
+    print(f"{report['written']} chunks written in {report['batches']} batches ({report['skipped']} already committed) "
+          f"to {report['collection']} in {report['seconds']:.1f} s")
+    return 0
+
+
+def cmd_eval(args: argparse.Namespace) -> int:
+    import evaluation
+
+    queries = evaluation.load_queries(args.queries)
+    collections = args.collection or ["all_data_v1"]
+    mode = args.mode or ("federated" if len(collections) > 1 else "plain")
+    configs = [
+        evaluation.EvalConfig(
+            name=f"{mode}:{args.index or ','.join(collections)}",
+            collection=collections if len(collections) > 1 else collections[0],
+            n_results=k,
+            mode=mode,
+            index_path=args.index,
+        )
+        for k in args.k or [5]
+    ]
+    reports = evaluation.run_evaluation(queries, configs, rag_path=args.rag_path, measure_memory=not args.no_memory)
+    print(evaluation.format_report(reports))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+def cmd_snapshot(args: argparse.Namespace) -> int:
+    import snapshot
+
+    started = time.perf_counter()
+    if args.action == "export":
+        if args.jsonl:
+            manifest = snapshot.export_jsonl(args.jsonl, args.path, embedding_model=args.embedding_model)
+        else:
+            manifest = snapshot.export_collection(args.collection or "all_data_v1", args.path)
+        print(f"exported {manifest['count']} chunks ({manifest['embedding_model']}, dim {manifest['dim']}) "
+              f"hash {manifest['content_hash'][:16]}")
+    elif args.index:
+        index = snapshot.import_to_quantized_index(args.path, args.index, mode=args.mode)
+        print(f"built {args.mode} index with {len(index)} vectors at {args.index}")
+    else:
+        collection = snapshot.import_to_chroma(args.path, args.collection or "all_data_v1")
+        print(f"imported {collection.count()} chunks into {collection.name}")
+    print(f"{time.perf_counter() - started:.2f} s")
+    return 0
+
+
+def cmd_merge(args: argparse.Namespace) -> int:
+    import sharded_ingest
+
+    report = sharded_ingest.merge_shards(args.out_dir, args.shards, args.output, snapshot_path=args.snapshot,
+                                         collection_name=args.collection)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+def cmd_versions(args: argparse.Namespace) -> int:
+    import versioned_index
+
+    store = versioned_index.VersionStore(args.store)
+    if args.action == "index":
+        for rev in args.revs:
+            stats = versioned_index.index_version(store, args.repo_path, rev, repo=args.repo, suffixes=args.suffix,
+                                                  max_tokens=args.max_tokens, use_llm=not args.no_llm)
+            if stats is None:
+                print(f"{rev}: chunks failed, rerun to resume")
+                return 1
+            print(f"{rev}: {stats['files']} files ({stats['files_reused']} reused), "
+                  f"{stats['chunks']} chunks ({stats['chunks_new']} new)")
+    elif args.action == "sync":
+        collection = versioned_index.sync_to_chroma(store, args.collection)
+        print(f"{collection.count()} chunks in {collection.name}")
+    else:
+        for key, entry in sorted(store.versions.items()):
+            print(f"{key} {entry['commit'][:10]} {len(entry['chunks'])} chunks")
+        print(f"{len(store)} distinct chunks")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="ragbot", description="DUUI RagBot")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_ingest = sub.add_parser("ingest", help="chunk, describe and embed the DUUI sources")
+    p_ingest.add_argument("--batch", action="store_true", help="describe chunks with the offline batch endpoint")
+    p_ingest.add_argument("--output", default="src/data/chunks_all_v1.jsonl")
+    p_ingest.add_argument("--skeleton", action="store_true", help="class chunks with elided method bodies")
+    p_ingest.add_argument("--max-tokens", type=int, default=512, help="split larger symbols into parts (0 disables)")
+    p_ingest.add_argument("--shard", help="only ingest shard I of N (I/N), e.g. one job of a cluster run")
+    p_ingest.add_argument("--workers", type=int, default=0, help="ingest N shards in parallel processes")
+    p_ingest.add_argument("--out-dir", default="src/data/shards", help="shard outputs of --shard/--workers")
+    p_ingest.set_defaults(func=cmd_ingest)
+
+    p_merge = sub.add_parser("merge", help="combine the shard outputs of a sharded ingest")
+    p_merge.add_argument("out_dir", nargs="?", default="src/data/shards")
+    p_merge.add_argument("-n", "--shards", type=int, required=True)
+    p_merge.add_argument("--output", default="src/data/chunks_all_v1.jsonl")
+    p_merge.add_argument("--snapshot", help="also write the merged chunks as a snapshot")
+    p_merge.add_argument("-c", "--collection", help="also load the merged chunks into a new collection")
+    p_merge.set_defaults(func=cmd_merge)
+
+    p_query = sub.add_parser("query", help="retrieve chunks for a question")
+    p_query.add_argument("question")
+    p_query.add_argument("-c", "--collection", action="append", required=True, help="repeat for a federated query")
+    p_query.add_argument("-k", type=int, default=5)
+    p_query.add_argument("--hyde", action="store_true")
+    p_query.add_argument("--lang", default="python")
+    p_query.add_argument("--version", help="only chunks of an indexed version, REPO@VERSION")
+    p_query.add_argument("--facet", action="append", help="only repos with this facet, KIND=VALUE (repeatable)")
+    p_query.add_argument("--mmr", action="store_true", help="over-fetch and diversify (MMR, parent/child collapse, per-file cap)")
+    p_query.add_argument("--rerank", choices=["llm", "cross-encoder"], help="rerank the top 20 hits and keep k")
+    p_query.add_argument("--budget", type=float, default=2.0, help="seconds for reranking before the first-stage order is kept")
+    p_query.set_defaults(func=cmd_query)
+
+    p_describe = sub.add_parser("describe", help="chunk a single file and describe its chunks")
+    p_describe.add_argument("path")
+    p_describe.add_argument("--no-llm", action="store_true", help="only chunk, skip the LLM description")
+    p_describe.add_argument("--min-score", type=float, default=None, help="docstring tier threshold (DESCRIPTION_MIN_SCORE)")
+    p_describe.set_defaults(func=cmd_describe)
+
+    p_bench = sub.add_parser("bench", help="import time report against the cold start targets, or chunk memory")
+    p_bench.add_argument("modules", nargs="*")
+    p_bench.add_argument("-v", "--verbose", action="store_true")
+    p_bench.add_argument("--memory", type=int, metavar="N", help="memory benchmark on an N-chunk synthetic corpus instead")
+    p_bench.set_defaults(func=cmd_bench)
+
+    p_eval = sub.add_parser("eval", help="recall@k, MRR, nDCG and latency on a labelled query set")
+    p_eval.add_argument("queries", nargs="?", default="src/data/eval/duui_queries.jsonl")
+    p_eval.add_argument("-c", "--collection", action="append", help="repeat for a federated configuration")
+    p_eval.add_argument("-k", type=int, action="append", help="repeat to compare several k")
+    p_eval.add_argument("--mode", choices=["plain", "federated", "hyde", "quantized"])
+    p_eval.add_argument("--index", help="QuantizedIndex directory for --mode quantized")
+    p_eval.add_argument("--rag-path", help="Chroma snapshot directory (overrides RAG_PATH)")
+    p_eval.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    p_eval.add_argument("--json", help="also write the reports to this file")
+    p_eval.set_defaults(func=cmd_eval)
+
+    p_snapshot = sub.add_parser("snapshot", help="export/import portable index snapshots")
+    p_snapshot.add_argument("action", choices=["export", "import"])
+    p_snapshot.add_argument("path", help="snapshot directory")
+    p_snapshot.add_argument("-c", "--collection", help="Chroma collection to export from / import into")
+    p_snapshot.add_argument("--jsonl", help="export from a chunk dump instead of Chroma")
+    p_snapshot.add_argument("--embedding-model", help="signature of a chunk dump without a recorded one, e.g. ollama:mxbai-embed-large")
+    p_snapshot.add_argument("--index", help="import into a QuantizedIndex at this directory instead of Chroma")
+    p_snapshot.add_argument("--mode", default="int8", choices=["int8", "binary", "both"])
+    p_snapshot.set_defaults(func=cmd_snapshot)
+
+    p_versions = sub.add_parser("versions", help="index git revisions into a content-addressed store")
+    p_versions.add_argument("action", choices=["index", "sync", "list"])
+    p_versions.add_argument("repo_path", nargs="?", default=".")
+    p_versions.add_argument("revs", nargs="*", default=["HEAD"], help="tags, branches or commits to index")
+    p_versions.add_argument("--store", default="src/data/versions")
+    p_versions.add_argument("--repo", help="repo name in the version keys (default: directory name)")
+    p_versions.add_argument("--suffix", action="append", help="only index files with this suffix (repeatable)")
+    p_versions.add_argument("--max-tokens", type=int, default=512)
+    p_versions.add_argument("--no-llm", action="store_true", help="static descriptions only")
+    p_versions.add_argument("-c", "--collection", default="all_versions_v1")
+    p_versions.set_defaults(func=cmd_versions)
+
+    p_chat = sub.add_parser("chat", help="multi-turn session, follow-ups reuse the retrieved context")
+    p_chat.add_argument("-c", "--collection", action="append", required=True, help="repeat for a federated query")
+    p_chat.add_argument("--lang", default="python")
+    p_chat.add_argument("--mmr", action="store_true")
+    p_chat.set_defaults(func=cmd_chat)
+
+    p_symbols = sub.add_parser("symbols", help="look up a symbol or answer a location question without the LLM")
+    p_symbols.add_argument("query", help="symbol name or question, e.g. \"where is HateCheck defined?\"")
+    p_symbols.add_argument("--index", help="symbol index path (default: SYMBOL_INDEX_PATH)")
+    p_symbols.add_argument("--all-kinds", action="store_true", help="include imports and references")
+    p_symbols.set_defaults(func=cmd_symbols)
+
+    p_facets = sub.add_parser("facets", help="components by dependency, base image, port, requirement or UIMA type")
+    p_facets.add_argument("kind", nargs="?", help="e.g. docker_gpu, uima_type, pip_requirement")
+    p_facets.add_argument("value", nargs="?")
+    p_facets.add_argument("--contains", help="substring match instead of an exact value")
+    p_facets.add_argument("--store", help="facet store path (default: FACET_STORE_PATH)")
+    p_facets.set_defaults(func=cmd_facets)
+
+    p_upsert = sub.add_parser("upsert", help="batched, resumable upsert of a chunk dump into a collection")
+    p_upsert.add_argument("jsonl", nargs="?", default="src/data/chunks_all_v1.jsonl")
+    p_upsert.add_argument("-c", "--collection", default="all_data_v1")
+    p_upsert.add_argument("--batch-size", type=int, default=256)
+    p_upsert.add_argument("--restart", action="store_true", help="ignore the checkpoint of an earlier run")
+    p_upsert.set_defaults(func=cmd_upsert)
+
+    p_tokens = sub.add_parser("tokens", help="token savings of skeleton class chunks")
+    p_tokens.add_argument("paths", nargs="*", default=list(DUUI_PATHS))
+    p_tokens.set_defaults(func=cmd_tokens)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
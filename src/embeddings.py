@@ -0,0 +1,247 @@
+"""
+Pluggable embedding backends with a shared batch API.
+
+- OllamaEmbedder: ollama.embed (default, mxbai-embed-large)
+- LocalCPUEmbedder: in-process sentence-transformers or ONNX model loaded from a local path
+- HashingEmbedder: deterministic feature hashing, no model needed (tests, offline runs)
+
+The backend is chosen with EMBED_BACKEND ("ollama", "local", "hashing") and EMBED_MODEL,
+EMBED_MODEL_PATH, EMBED_DIM. Its signature is stored in the collection metadata
+so vectors of different backends are never mixed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import re
+from typing import Dict, List, Optional
+
+
+DEFAULT_OLLAMA_MODEL = "mxbai-embed-large"
+# collections created before backends were recorded were all embedded with ollama
+LEGACY_SIGNATURE = f"ollama:{DEFAULT_OLLAMA_MODEL}"
+METADATA_KEY = "embedding_backend"
+_TOKEN_RE = re.compile(r"[A-Za-z0-9_]+")
+
+
+class EmbeddingProvider:
+    """
+    Base class, backends implement embed_batch.
+    """
+    name = "base"
+
+    def __init__(self, model: str, batch_size: int = 32):
+        self.model = model
+        self.batch_size = batch_size
+
+    @property
+    def signature(self) -> str:
+        return f"{self.name}:{self.model}"
+
+    def _embed(self, inputs: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    def embed_batch(self, inputs: List[str]) -> List[List[float]]:
+        """
+        Embeds the inputs in slices of batch_size, one vector per input.
+        """
+        vectors: List[List[float]] = []
+        for start in range(0, len(inputs), self.batch_size):
+            vectors.extend(self._embed(list(inputs[start:start + self.batch_size])))
+        return vectors
+
+    def embed(self, text: str) -> List[float]:
+        return self.embed_batch([text])[0]
+
+
+class OllamaEmbedder(EmbeddingProvider):
+    name = "ollama"
+
+    def __init__(self, model: str = DEFAULT_OLLAMA_MODEL, batch_size: int = 64):
+        super().__init__(model, batch_size)
+
+    def _embed(self, inputs: List[str]) -> List[List[float]]:
+        import ollama
+        return [list(v) for v in ollama.embed(model=self.model, input=inputs).embeddings]
+
+
+class LocalCPUEmbedder(EmbeddingProvider):
+    """
+    Runs a local model on the CPU. model_path is either a sentence-transformers directory
+    or a directory with model.onnx + tokenizer.json (onnxruntime and tokenizers are in requirements.txt).
+    """
+    name = "local"
+
+    def __init__(self, model_path: str, runtime: Optional[str] = None, pooling: str = "mean", max_length: int = 512, batch_size: int = 32):
+        super().__init__(os.path.basename(os.path.normpath(model_path)), batch_size)
+        self.model_path = model_path
+        self.runtime = runtime or ("onnx" if os.path.exists(os.path.join(model_path, "model.onnx")) else "sentence-transformers")
+        self.pooling = pooling
+        self.max_length = max_length
+        self._model = None
+        self._tokenizer = None
+
+    def _load(self) -> None:
+        if self._model is not None:
+            return
+        if self.runtime == "onnx":
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+
+            self._tokenizer = Tokenizer.from_file(os.path.join(self.model_path, "tokenizer.json"))
+            self._tokenizer.enable_truncation(max_length=self.max_length)
+            self._tokenizer.enable_padding()
+            self._model = ort.InferenceSession(os.path.join(self.model_path, "model.onnx"), providers=["CPUExecutionProvider"])
+        elif self.runtime == "sentence-transformers":
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as exc:
+                raise ImportError("LocalCPUEmbedder needs sentence-transformers or an ONNX export (model.onnx + tokenizer.json).") from exc
+            self._model = SentenceTransformer(self.model_path, device="cpu")
+        else:
+            raise ValueError("runtime must be 'onnx' or 'sentence-transformers'")
+
+    def _embed(self, inputs: List[str]) -> List[List[float]]:
+        self._load()
+        if self.runtime == "sentence-transformers":
+            return self._model.encode(inputs, batch_size=self.batch_size, normalize_embeddings=True).tolist()
+
+        import numpy as np
+
+        encodings = self._tokenizer.encode_batch(inputs)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": mask}
+        if "token_type_ids" in {i.name for i in self._model.get_inputs()}:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self._model.run(None, feeds)[0]
+        if self.pooling == "cls":
+            pooled = hidden[:, 0]
+        else:
+            weights = mask[..., None].astype(hidden.dtype)
+            pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.tolist()
+
+
+class HashingEmbedder(EmbeddingProvider):
+    """
+    Signed feature hashing over lowercased word and identifier-part tokens.
+    Deterministic across processes and machines.
+    """
+    name = "hashing"
+
+    def __init__(self, dim: int = 1024, batch_size: int = 256):
+        super().__init__(f"hash{dim}", batch_size)
+        self.dim = dim
+
+    def _tokens(self, text: str) -> List[str]:
+        tokens: List[str] = []
+        for word in _TOKEN_RE.findall(text):
+            lowered = word.lower()
+            tokens.append(lowered)
+            # camelCase / snake_case parts so "HateModel" and "hate_model" share features
+            parts = re.findall(r"[A-Z]?[a-z0-9]+|[A-Z]+(?![a-z])", word.replace("_", " "))
+            if len(parts) > 1:
+                tokens.extend(p.lower() for p in parts)
+        return tokens
+
+    def _embed(self, inputs: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for text in inputs:
+            vec = [0.0] * self.dim
+            for token in self._tokens(text):
+                digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                vec[value % self.dim] += 1.0 if (value >> 63) & 1 else -1.0
+            norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+            vectors.append([v / norm for v in vec])
+        return vectors
+
+
+_EMBEDDER: Optional[EmbeddingProvider] = None
+
+
+def create_embedder(backend: str, model: Optional[str] = None, model_path: Optional[str] = None, dim: Optional[int] = None) -> EmbeddingProvider:
+    if backend == "ollama":
+        return OllamaEmbedder(model or DEFAULT_OLLAMA_MODEL)
+    if backend == "local":
+        if not model_path:
+            raise ValueError("EMBED_MODEL_PATH must be set for the local backend")
+        return LocalCPUEmbedder(model_path)
+    if backend == "hashing":
+        return HashingEmbedder(dim or 1024)
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+def get_embedder() -> EmbeddingProvider:
+    """
+    Returns the embedder configured in the environment (.env), created once per process.
+    """
+    global _EMBEDDER
+    if _EMBEDDER is None:
+        import utils
+        utils.load_dotenv()
+        dim = os.getenv("EMBED_DIM")
+        _EMBEDDER = create_embedder(
+            os.getenv("EMBED_BACKEND", "ollama"),
+            model=os.getenv("EMBED_MODEL"),
+            model_path=os.getenv("EMBED_MODEL_PATH"),
+            dim=int(dim) if dim else None,
+        )
+    return _EMBEDDER
+
+
+def set_embedder(embedder: Optional[EmbeddingProvider]) -> None:
+    """
+    Overrides the configured embedder (None resets to the environment configuration).
+    """
+    global _EMBEDDER
+    _EMBEDDER = embedder
+
+
+def collection_metadata(signature: str) -> Dict[str, str]:
+    return {METADATA_KEY: signature}
+
+
+def dump_signature_path(chunks_path: str) -> str:
+    """
+    The signature file written next to a chunk dump, chunks_all_v1.jsonl -> chunks_all_v1.embedding.json.
+    """
+    return os.path.splitext(chunks_path)[0] + ".embedding.json"
+
+
+def save_dump_signature(chunks_path: str, signature: str) -> None:
+    import json
+
+    path = dump_signature_path(chunks_path)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({METADATA_KEY: signature}, f)
+    os.replace(path + ".tmp", path)
+
+
+def load_dump_signature(chunks_path: str) -> Optional[str]:
+    """
+    Signature of the embeddings in a chunk dump, None for dumps written before it was recorded.
+    """
+    import json
+
+    path = dump_signature_path(chunks_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)[METADATA_KEY]
+
+
+def check_collection_signature(collection, signature: str) -> None:
+    """
+    Raises if the collection was embedded with a different backend/model/projection.
+    """
+    stored = (collection.metadata or {}).get(METADATA_KEY, LEGACY_SIGNATURE)
+    if stored != signature:
+        raise ValueError(
+            f"Collection '{collection.name}' was embedded with '{stored}', "
+            f"the configured embedder is '{signature}'."
+        )
@@ -0,0 +1,235 @@
+"""
+Offline retrieval evaluation: quality vs. latency vs. memory per retrieval configuration.
+
+Query set (JSONL), one labelled question per line:
+    {"id": "hate-01", "question": "...", "expected": [{"file": "duui-Hate/.../hatechecker.py", "symbol": "HateCheck"}]}
+"file" is matched as a path suffix, "symbol" is optional (without it any chunk of the file is relevant).
+
+Each EvalConfig is run over all queries, the report has recall@k, MRR and nDCG@k
+together with p50/p95 latency and the peak Python memory of the retrieval calls.
+Point RAG_PATH (or rag_path) at a fixed snapshot of the collection for comparable runs.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+
+SAMPLE_QUERIES_PATH = "src/data/eval/duui_queries.jsonl"
+# relevance grades for nDCG
+FULL_MATCH = 2
+FILE_MATCH = 1
+
+
+@dataclass
+class EvalQuery:
+    id: str
+    question: str
+    expected: List[Dict[str, str]]
+
+
+@dataclass
+class EvalConfig:
+    """
+    One retrieval configuration.
+    mode: "plain" (query_results), "federated", "hyde" or "quantized" (QuantizedIndex at index_path,
+    metadata from the chunks JSONL at chunks_path).
+    options are passed to the retrieval function, e.g. {"diversify": True} for plain and federated.
+    """
+    name: str
+    collection: Union[str, List[str]] = "all_data_v1"
+    n_results: int = 5
+    mode: str = "plain"
+    where: Optional[Dict[str, object]] = None
+    index_path: Optional[str] = None
+    chunks_path: str = "src/data/chunks_all_v1.jsonl"
+    options: Dict[str, object] = field(default_factory=dict)
+
+    def retriever(self) -> Callable[[str], Dict[str, object]]:
+        import RAG
+
+        collections = [self.collection] if isinstance(self.collection, str) else list(self.collection)
+        if self.mode == "plain" and self.where is None and len(collections) == 1:
+            return lambda q: RAG.query_results(q, collection_name=collections[0], n_results=self.n_results, **self.options)
+        if self.mode in ("plain", "federated"):
+            return lambda q: RAG.query_results_federated(q, collection_names=collections, n_results=self.n_results, where=self.where, **self.options)
+        if self.mode == "hyde":
+            return lambda q: RAG.query_results_hyde(q, collection_name=collections[0], n_results=self.n_results, **self.options)
+        if self.mode == "quantized":
+            return _quantized_retriever(self.index_path, self.chunks_path, self.n_results, **self.options)
+        raise ValueError(f"Unknown evaluation mode: {self.mode}")
+
+
+def _quantized_retriever(index_path: str, chunks_path: str, n_results: int, rescore_factor: int = 4):
+    from jsonl_stream import iter_jsonl_items
+    from quantized_index import QuantizedIndex
+    from utils import embed_ollama
+
+    index = QuantizedIndex.load(index_path)
+    metadata = {item["id"]: item["metadata"] for item in iter_jsonl_items(chunks_path, fields=("id", "metadata"))}
+
+    def retrieve(question: str) -> Dict[str, object]:
+        hits = index.search(embed_ollama(question), k=n_results, rescore_factor=rescore_factor)
+        return {
+            "ids": [[chunk_id for chunk_id, _ in hits]],
+            "metadatas": [[metadata.get(chunk_id, {}) for chunk_id, _ in hits]],
+            "distances": [[1.0 - score for _, score in hits]],
+        }
+
+    return retrieve
+
+
+def load_queries(path: str = SAMPLE_QUERIES_PATH) -> List[EvalQuery]:
+    queries: List[EvalQuery] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                queries.append(EvalQuery(item["id"], item["question"], item["expected"]))
+    return queries
+
+
+def _normalize_path(path: str) -> str:
+    return str(path).replace("\\", "/")
+
+
+def relevance(meta: Dict[str, object], expected: Dict[str, str]) -> int:
+    """
+    FULL_MATCH if file (and symbol, if given) match, FILE_MATCH for another chunk of the file, else 0.
+    """
+    if not _normalize_path(meta.get("file", "")).endswith(_normalize_path(expected["file"])):
+        return 0
+    symbol = expected.get("symbol")
+    if not symbol or meta.get("symbol_name") == symbol:
+        return FULL_MATCH
+    return FILE_MATCH
+
+
+def _dcg(gains: Sequence[int]) -> float:
+    return sum((2 ** gain - 1) / math.log2(rank + 1) for rank, gain in enumerate(gains, start=1))
+
+
+def score_ranking(metadatas: Sequence[Dict[str, object]], expected: List[Dict[str, str]], k: int) -> Dict[str, float]:
+    """
+    recall@k, reciprocal rank and nDCG@k of one ranked result list.
+    Each expected item is a full match once, a repeated hit of it only counts as FILE_MATCH.
+    """
+    ranked = list(metadatas)[:k]
+    gains: List[int] = []
+    credited = set()
+    for meta in ranked:
+        gain = 0
+        for i, exp in enumerate(expected):
+            rel = relevance(meta, exp)
+            if rel == FULL_MATCH and i not in credited:
+                credited.add(i)
+                gain = FULL_MATCH
+                break
+            gain = max(gain, min(rel, FILE_MATCH))
+        gains.append(gain)
+
+    found = len(credited)
+    first = next((rank for rank, gain in enumerate(gains, start=1) if gain == FULL_MATCH), None)
+    dcg = _dcg(gains)
+    # best order of every expected item as full match plus the file matches that were retrieved
+    ideal = _dcg(sorted([FULL_MATCH] * len(expected) + [g for g in gains if g == FILE_MATCH], reverse=True)[:k])
+    return {
+        "recall": found / len(expected) if expected else 0.0,
+        "rr": 1.0 / first if first else 0.0,
+        "ndcg": dcg / ideal if ideal else 0.0,
+    }
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def evaluate_retriever(
+    name: str,
+    retrieve: Callable[[str], Dict[str, object]],
+    queries: List[EvalQuery],
+    k: int,
+    measure_memory: bool = True,
+    warmup: bool = True,
+) -> Dict[str, object]:
+    """
+    Runs every query once for quality and latency, then once more under tracemalloc for memory.
+    """
+    if warmup and queries:
+        # first call opens the client / loads the index
+        retrieve(queries[0].question)
+
+    latencies: List[float] = []
+    scores: List[Dict[str, float]] = []
+    for query in queries:
+        started = time.perf_counter()
+        result = retrieve(query.question)
+        latencies.append((time.perf_counter() - started) * 1000)
+        metadatas = (result.get("metadatas") or [[]])[0]
+        scores.append(score_ranking(metadatas, query.expected, k))
+
+    peak = 0
+    if measure_memory:
+        tracemalloc.start()
+        for query in queries:
+            retrieve(query.question)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    n = len(scores) or 1
+    return {
+        "config": name,
+        "k": k,
+        "queries": len(queries),
+        f"recall@{k}": sum(s["recall"] for s in scores) / n,
+        "mrr": sum(s["rr"] for s in scores) / n,
+        f"ndcg@{k}": sum(s["ndcg"] for s in scores) / n,
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "peak_mem_mb": peak / 1e6,
+    }
+
+
+def run_evaluation(
+    queries: List[EvalQuery],
+    configs: List[EvalConfig],
+    rag_path: Optional[str] = None,
+    measure_memory: bool = True,
+) -> List[Dict[str, object]]:
+    previous = os.environ.get("RAG_PATH")
+    if rag_path:
+        # query_results resolves the Chroma path per call
+        os.environ["RAG_PATH"] = rag_path
+    try:
+        return [
+            evaluate_retriever(config.name, config.retriever(), queries, config.n_results, measure_memory=measure_memory)
+            for config in configs
+        ]
+    finally:
+        # later queries of the same process must not hit the evaluated snapshot
+        if rag_path:
+            if previous is None:
+                os.environ.pop("RAG_PATH", None)
+            else:
+                os.environ["RAG_PATH"] = previous
+
+
+def format_report(reports: List[Dict[str, object]]) -> str:
+    lines = [f"{'config':<28} {'k':>3} {'recall':>7} {'mrr':>6} {'ndcg':>6} {'p50 ms':>8} {'p95 ms':>8} {'mem MB':>7}"]
+    for r in reports:
+        k = r["k"]
+        lines.append(
+            f"{r['config']:<28} {k:>3} {r[f'recall@{k}']:>7.3f} {r['mrr']:>6.3f} {r[f'ndcg@{k}']:>6.3f} "
+            f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['peak_mem_mb']:>7.2f}"
+        )
+    return "\n".join(lines)
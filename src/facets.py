@@ -0,0 +1,349 @@
+"""
+Structured facets of the DUUI components, used as exact pre-filters for retrieval.
+
+Extracted from the build files of every ingested repo (keyed by the same repo_id as its chunks):
+- maven_dependency: groupId:artifactId of pom.xml dependencies (version in "detail")
+- docker_base_image / docker_expose: FROM images and EXPOSE ports of Dockerfiles
+- docker_gpu: "true" if a base image is a CUDA/GPU image
+- pip_requirement: normalized package names of requirements*.txt (specifier in "detail")
+- uima_type: type names of UIMA typesystem descriptors
+
+FacetStore.repo_ids(...) answers "which components use X" exactly, facet_where() turns
+a facet filter into a Chroma where clause on repo_id, facets_for_question() finds the
+facet values a question mentions.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+
+DEFAULT_FACET_STORE_PATH = "src/data/chunks_all_v1.facets.json"
+FACET_KINDS = ("maven_dependency", "docker_base_image", "docker_expose", "docker_gpu", "pip_requirement", "uima_type")
+
+_GPU_IMAGE_RE = re.compile(r"cuda|cudnn|nvidia|gpu|rocm", re.IGNORECASE)
+_GPU_QUESTION_RE = re.compile(r"\b(gpus?|cuda|nvidia)\b", re.IGNORECASE)
+# "which components use/output X": only questions about the components themselves are filtered,
+# in prose ("split a text into a sentence") a type or package name is just a word
+_FACET_QUESTION_RE = re.compile(
+    r"\b(?:which|what|list|all|any|welche\w*|alle)\s+(?:[\w-]+\s+){0,3}?"
+    r"(?:components?|repos?|repositories|annotators?|services?|images?|projects?|komponenten|repositor\w*)\b",
+    re.IGNORECASE,
+)
+_REQUIREMENT_RE = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)(\[[^\]]*\])?\s*(.*)$")
+_DOCKER_VAR_RE = re.compile(r"\$\{?(\w+)(?::-([^}]*))?\}?")
+_POM_PROPERTY_RE = re.compile(r"\$\{([^}]+)\}")
+_WORD_RE = re.compile(r"[A-Za-z0-9_.:-]+")
+
+
+@dataclass
+class Facet:
+    repo_id: str
+    component: str
+    kind: str
+    value: str
+    file: str
+    line: int = 0
+    detail: str = ""
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child_text(element: ET.Element, name: str) -> str:
+    for child in element:
+        if _local(child.tag) == name:
+            return (child.text or "").strip()
+    return ""
+
+
+def parse_pom(text: str) -> List[Tuple[str, str]]:
+    """
+    (groupId:artifactId, version) of every dependency, ${properties} resolved.
+    """
+    root = ET.fromstring(text)
+    properties: Dict[str, str] = {"project.version": _child_text(root, "version")}
+    for element in root:
+        if _local(element.tag) == "properties":
+            properties.update({_local(p.tag): (p.text or "").strip() for p in element})
+
+    def resolve(value: str) -> str:
+        return _POM_PROPERTY_RE.sub(lambda m: properties.get(m.group(1), m.group(0)), value)
+
+    dependencies = []
+    for element in root.iter():
+        if _local(element.tag) == "dependency":
+            group, artifact = _child_text(element, "groupId"), _child_text(element, "artifactId")
+            if artifact:
+                dependencies.append((resolve(f"{group}:{artifact}"), resolve(_child_text(element, "version"))))
+    return dependencies
+
+
+def _logical_lines(text: str) -> Iterable[Tuple[int, str]]:
+    # joins "\" continuations, yields (first line number, instruction)
+    buffer, start = "", 0
+    for number, line in enumerate(text.splitlines(), start=1):
+        stripped = line.strip()
+        if not buffer and (not stripped or stripped.startswith("#")):
+            continue
+        if not buffer:
+            start = number
+        if stripped.endswith("\\"):
+            buffer += stripped[:-1] + " "
+            continue
+        yield start, buffer + stripped
+        buffer = ""
+    if buffer:
+        yield start, buffer
+
+
+def parse_dockerfile(text: str) -> Dict[str, List[Tuple[str, int]]]:
+    """
+    {"images": [(image, line)], "ports": [(port, line)]}, build stages and ARG defaults resolved.
+    """
+    args: Dict[str, str] = {}
+    stages: Set[str] = set()
+    images: List[Tuple[str, int]] = []
+    ports: List[Tuple[str, int]] = []
+
+    def substitute(value: str) -> str:
+        return _DOCKER_VAR_RE.sub(lambda m: args.get(m.group(1)) or m.group(2) or m.group(0), value)
+
+    for number, line in _logical_lines(text):
+        instruction, _, rest = line.partition(" ")
+        instruction = instruction.upper()
+        if instruction == "ARG":
+            name, _, default = rest.strip().partition("=")
+            args.setdefault(name.strip(), default.strip().strip('"'))
+        elif instruction == "FROM":
+            parts = [p for p in rest.split() if not p.startswith("--")]
+            if not parts:
+                continue
+            image = substitute(parts[0])
+            if len(parts) >= 3 and parts[1].lower() == "as":
+                stages.add(parts[2].lower())
+            # FROM <earlier stage> is not a base image
+            if image.lower() not in stages:
+                images.append((image, number))
+        elif instruction == "EXPOSE":
+            for port in rest.split():
+                ports.append((substitute(port).split("/")[0], number))
+    return {"images": images, "ports": ports}
+
+
+def parse_requirements(text: str) -> List[Tuple[str, str, int]]:
+    """
+    (normalized name, specifier, line) per requirement, options and includes are skipped.
+    """
+    requirements = []
+    for number, line in enumerate(text.splitlines(), start=1):
+        line = line.split("#", 1)[0].strip()
+        if not line or line.startswith("-") or "://" in line:
+            continue
+        match = _REQUIREMENT_RE.match(line)
+        if match:
+            name = re.sub(r"[-_.]+", "-", match.group(1)).lower()
+            requirements.append((name, match.group(3).split(";")[0].strip(), number))
+    return requirements
+
+
+def parse_typesystem(text: str) -> List[str]:
+    """
+    Type names of a UIMA typeSystemDescription, [] for any other XML.
+    """
+    root = ET.fromstring(text)
+    if _local(root.tag) != "typeSystemDescription":
+        return []
+    return [_child_text(t, "name") for t in root.iter() if _local(t.tag) == "typeDescription" and _child_text(t, "name")]
+
+
+def _file_kind(path: str) -> Optional[str]:
+    name = os.path.basename(path).lower()
+    if name == "pom.xml":
+        return "pom"
+    if name.startswith("dockerfile") or name.endswith(".dockerfile"):
+        return "dockerfile"
+    if name.startswith("requirements") and name.endswith(".txt"):
+        return "requirements"
+    if name.endswith(".xml"):
+        return "xml"
+    return None
+
+
+def facets_of_file(path: str, repo_id: str, component: str) -> List[Facet]:
+    kind = _file_kind(path)
+    if kind is None:
+        return []
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        text = f.read()
+    file = path.replace("\\", "/")
+    facets: List[Facet] = []
+    try:
+        if kind == "pom":
+            for name, version in parse_pom(text):
+                facets.append(Facet(repo_id, component, "maven_dependency", name, file, detail=version))
+        elif kind == "dockerfile":
+            parsed = parse_dockerfile(text)
+            for image, line in parsed["images"]:
+                facets.append(Facet(repo_id, component, "docker_base_image", image, file, line))
+                if _GPU_IMAGE_RE.search(image):
+                    facets.append(Facet(repo_id, component, "docker_gpu", "true", file, line, detail=image))
+            for port, line in parsed["ports"]:
+                facets.append(Facet(repo_id, component, "docker_expose", port, file, line))
+        elif kind == "requirements":
+            for name, spec, line in parse_requirements(text):
+                facets.append(Facet(repo_id, component, "pip_requirement", name, file, line, detail=spec))
+        else:
+            for name in parse_typesystem(text):
+                facets.append(Facet(repo_id, component, "uima_type", name, file))
+    except ET.ParseError:
+        return []
+    return facets
+
+
+def extract_facets(files: Iterable[str]) -> "FacetStore":
+    """
+    Facets of all build files among files, repo_id like the chunkers (utils.find_repo_root).
+    """
+    from chunk_data.rag_chunk import make_repo_id
+    from utils import find_repo_root
+
+    facets: List[Facet] = []
+    for path in sorted(files):
+        if _file_kind(path) is None:
+            continue
+        repo_root = find_repo_root(path)
+        repo_id = make_repo_id(os.path.abspath(repo_root)) if repo_root else "repo::unknown"
+        component = os.path.basename(repo_root) if repo_root else ""
+        facets.extend(facets_of_file(path, repo_id, component))
+    return FacetStore(facets)
+
+
+class FacetStore:
+    def __init__(self, facets: List[Facet]):
+        self.facets = facets
+        self._values: Dict[Tuple[str, str], Set[str]] = {}
+        for facet in facets:
+            self._values.setdefault((facet.kind, facet.value.lower()), set()).add(facet.repo_id)
+
+    def __len__(self) -> int:
+        return len(self.facets)
+
+    def values(self, kind: str) -> List[str]:
+        return sorted({f.value for f in self.facets if f.kind == kind})
+
+    def repo_ids(self, kind: str, value: Optional[str] = None, contains: Optional[str] = None) -> Set[str]:
+        """
+        Repos with a facet of kind: equal to value (case-insensitive), containing contains, or any.
+        A uima_type value also matches the short type name (org.x.Hate == Hate).
+        """
+        if value is not None:
+            low = value.lower()
+            found = set(self._values.get((kind, low), set()))
+            if kind == "uima_type" and "." not in low:
+                for (k, v), repos in self._values.items():
+                    if k == kind and v.rsplit(".", 1)[-1] == low:
+                        found |= repos
+            return found
+        low = (contains or "").lower()
+        return {f.repo_id for f in self.facets if f.kind == kind and low in f.value.lower()}
+
+    def components(self, repo_ids: Iterable[str]) -> List[str]:
+        wanted = set(repo_ids)
+        return sorted({f.component for f in self.facets if f.repo_id in wanted})
+
+    def match(self, filters: Dict[str, str]) -> Set[str]:
+        """
+        Repos matching every kind=value filter.
+        """
+        result: Optional[Set[str]] = None
+        for kind, value in filters.items():
+            repos = self.repo_ids(kind, value)
+            result = repos if result is None else result & repos
+        return result or set()
+
+    def save(self, path: str) -> None:
+        columns = list(Facet.__dataclass_fields__)
+        data = {"columns": columns, "rows": [[getattr(f, c) for c in columns] for f in self.facets]}
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FacetStore":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls([Facet(**dict(zip(data["columns"], row))) for row in data["rows"]])
+
+    @classmethod
+    def merge(cls, stores: Iterable["FacetStore"]) -> "FacetStore":
+        facets = {}
+        for store in stores:
+            for facet in store.facets:
+                facets.setdefault(tuple(asdict(facet).values()), facet)
+        return cls([facets[key] for key in sorted(facets)])
+
+
+def facet_store_path(chunks_path: str) -> str:
+    """
+    The facet store written next to a chunk dump, chunks_all_v1.jsonl -> chunks_all_v1.facets.json.
+    """
+    return os.path.splitext(chunks_path)[0] + ".facets.json"
+
+
+_LOADED: Dict[str, Tuple[float, FacetStore]] = {}
+
+
+def load_cached(path: Optional[str] = None) -> Optional[FacetStore]:
+    """
+    The store at path (FACET_STORE_PATH by default), loaded once per process. None if missing.
+    """
+    path = path or os.getenv("FACET_STORE_PATH", DEFAULT_FACET_STORE_PATH)
+    if not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    cached = _LOADED.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, FacetStore.load(path))
+        _LOADED[path] = cached
+    return cached[1]
+
+
+def facets_for_question(question: str, store: FacetStore, kinds: Sequence[str] = ("uima_type", "pip_requirement", "maven_dependency")) -> Dict[str, str]:
+    """
+    Facet filters a question mentions: GPU, a UIMA type (short name), a pip package or a Maven artifactId.
+    Only facet-style questions ("which components ...") are filtered, only names of at least four
+    characters count, one value per kind.
+    """
+    filters: Dict[str, str] = {}
+    if not _FACET_QUESTION_RE.search(question):
+        return filters
+    if _GPU_QUESTION_RE.search(question) and store.repo_ids("docker_gpu", "true"):
+        filters["docker_gpu"] = "true"
+    words = {w.strip(".:-").lower() for w in _WORD_RE.findall(question)}
+    for kind in kinds:
+        for value in store.values(kind):
+            names = {value.lower(), value.rsplit(".", 1)[-1].lower(), value.rsplit(":", 1)[-1].lower()}
+            if any(len(name) >= 4 and name in words for name in names):
+                filters[kind] = value
+                break
+    return filters
+
+
+def facet_where(repo_ids: Iterable[str]) -> Optional[Dict[str, object]]:
+    """
+    Chroma where clause restricting a query to the given repos, None if there are none.
+    """
+    ids = sorted(set(repo_ids))
+    if not ids:
+        return None
+    if len(ids) == 1:
+        return {"repo_id": ids[0]}
+    return {"repo_id": {"$in": ids}}
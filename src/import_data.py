@@ -4,10 +4,12 @@ import os
 from chunk_data.chunk_java import chunk_java_file
 from chunk_data.chunk_other_files import chunk_other_file
 from chunk_data.chunk_python import chunk_python_file
+from chunk_data.chunk_notebook import chunk_notebook_file
 
-import chromadb
 import tqdm
 from utils import filter_files, get_rag_path, load_jsonl_ragChunk
+from ingest_journal import RunJournal
+from chunk_data.static_description import apply_static_description, min_score_from_env
 import json
 import time
 import random
@@ -15,6 +17,11 @@ import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 
+# mxbai-embed-large only embeds the first 512 tokens of a chunk
+MAX_CHUNK_TOKENS = 512
+DUUI_PATHS = ("src/data/duui-uima/duui-Hate", "src/data/duui-uima/duui-entailment")
+
+
 def describe_chunk(chunk):
     llm = llm_wrapper.LLMWrapper()
     data = llm.llm_code_description(chunk.text)
@@ -28,60 +35,123 @@ def chunk_file(path: str,
     include_methods: bool = True,
     deferred_llm: bool = False,
     repo_root: str | None = None,
-    repo_id: str | None = None ) -> list[rg.RAGChunk]:
+    repo_id: str | None = None,
+    class_skeleton: bool = False,
+    max_tokens: int | None = MAX_CHUNK_TOKENS) -> list[rg.RAGChunk]:
     """
     This function takes any files and properly chunks it return a list of RAGChunk chunks.
     Proper formatting and chunking only available for python and java files for now.
     """
     if path.endswith(".py"):
-        return chunk_python_file(path=path, deferred_llm=True)
+        return chunk_python_file(path=path, deferred_llm=True, class_skeleton=class_skeleton, max_tokens=max_tokens)
     if path.endswith(".java"):
-        return chunk_java_file(path=path, deferred_llm=True)
+        return chunk_java_file(path=path, deferred_llm=True, class_skeleton=class_skeleton, max_tokens=max_tokens)
+    if path.endswith(".ipynb"):
+        return chunk_notebook_file(path=path, deferred_llm=True, class_skeleton=class_skeleton, max_tokens=max_tokens)
     else:
         return chunk_other_file(path=path, deferred_llm=True)
 
-def load_data():
-    PATH_DUUI = "src/data/duui-uima/duui-Hate"
-    PATH_DUUI_2 = "src/data/duui-uima/duui-entailment"
-
-    LIST_FILES_1 = filter_files(PATH_DUUI)
-    LIST_FILES_1.extend(filter_files(PATH_DUUI_2))
-    
+def load_data(use_batch: bool = False, output_path: str = "src/data/chunks_all_v1.jsonl", class_skeleton: bool = False,
+              max_tokens: int | None = MAX_CHUNK_TOKENS):
+    import chromadb
     client = chromadb.PersistentClient(get_rag_path())
 
     collection = client.get_or_create_collection("all_data_v1")
 
+    ingest_files(duui_files(), output_path, use_batch=use_batch, class_skeleton=class_skeleton, max_tokens=max_tokens)
+
+
+def duui_files(paths: tuple[str, ...] = DUUI_PATHS) -> list[str]:
+    files = []
+    for path in paths:
+        files.extend(filter_files(path))
+    return files
+
+
+def ingest_files(files: list[str], output_path: str, use_batch: bool = False, class_skeleton: bool = False,
+                 max_tokens: int | None = MAX_CHUNK_TOKENS, use_llm: bool = True, batch_dir: str = "src/data/batch") -> bool:
+    """
+    Chunks, describes and embeds the files into output_path. Journaled, so a rerun resumes.
+    Returns True once every chunk is written and output_path is final.
+    """
     all_chunks = []
-    for file in tqdm.tqdm(LIST_FILES_1):
-        cur_chunks = chunk_file(file, deferred_llm=True)
+    for file in tqdm.tqdm(files):
+        cur_chunks = chunk_file(file, deferred_llm=True, class_skeleton=class_skeleton, max_tokens=max_tokens)
         all_chunks.extend(cur_chunks)
 
     print("ALL CHUNKS LOADED.")
 
-    with open("src/data/chunks_all_v1.jsonl", "w", encoding="utf-8") as f:
-        with ThreadPoolExecutor(max_workers=6) as ex:
-            futures = [ex.submit(describe_chunk, c) for c in all_chunks]
-            for fut in tqdm.tqdm(as_completed(futures), total=len(futures)):
-                rchunk, data = fut.result()
-                rchunk.append_llm_data(data)
-                f.write(json.dumps(rchunk.to_json_item()) + "\n")
-                f.flush()
-    
-def insert_data_chroma(chunks: list[rg.RAGChunk], collection_name: str):
-    items = [chunk.to_chroma_item() for chunk in chunks]
-    ids = [item["id"] for item in items]
-    embs = [item["embedding"] for item in items]
-    docs = [item["document"] for item in items]
-    metas = [item["metadata"] for item in items]
-    client = chromadb.PersistentClient(get_rag_path())
-    collection = client.get_or_create_collection(name=collection_name)
-    collection.add(ids=ids, embeddings=embs, documents=docs, metadatas=metas)
-
-        
+    # "where is X" questions are answered from the symbol index without the LLM
+    from symbol_index import SymbolIndex, symbol_index_path
+    SymbolIndex.from_chunks(all_chunks).save(symbol_index_path(output_path))
+    # pom/Dockerfile/requirements/typesystem facets are exact pre-filters for retrieval
+    from facets import extract_facets, facet_store_path
+    extract_facets(files).save(facet_store_path(output_path))
+
+    # finished chunks of a crashed run are journaled and skipped, output_path is only replaced at the end
+    journal = RunJournal(output_path)
+    done = journal.start()
+    pending = [c for c in all_chunks if c.chunk_id() not in done]
+    print(f"{len(done)} chunks already done, {len(pending)} pending.")
+
+    failed = 0
+    with journal:
+        # chunks with a good docstring/Javadoc or a trivial body never reach the LLM
+        min_score = min_score_from_env()
+        llm_pending = []
+        for rchunk in pending:
+            if apply_static_description(rchunk, min_score):
+                journal.record(rchunk.to_json_item())
+            else:
+                llm_pending.append(rchunk)
+        print(f"{len(pending) - len(llm_pending)} chunks described without the LLM, {len(llm_pending)} left.")
+
+        if not use_llm:
+            for rchunk in llm_pending:
+                journal.record(rchunk.to_json_item())
+        elif use_batch:
+            # descriptions come from the offline batch endpoint, rerun until all chunks are described
+            from batch_describe import BatchDescriber
+            merged = BatchDescriber(work_dir=batch_dir).run(llm_pending)
+            print(f"{merged}/{len(llm_pending)} chunks described by batch.")
+            for rchunk in tqdm.tqdm(llm_pending):
+                if rchunk.description == "N.A":
+                    failed += 1
+                    continue
+                journal.record(rchunk.to_json_item())
+        else:
+            with ThreadPoolExecutor(max_workers=6) as ex:
+                futures = [ex.submit(describe_chunk, c) for c in llm_pending]
+                for fut in tqdm.tqdm(as_completed(futures), total=len(futures)):
+                    try:
+                        rchunk, data = fut.result()
+                        rchunk.append_llm_data(data)
+                        journal.record(rchunk.to_json_item())
+                    except Exception as exc:
+                        # e.g. rate limit, the chunk stays pending for the next run
+                        failed += 1
+                        print(f"Chunk failed: {exc}")
+
+    if failed:
+        print(f"{failed} chunks failed, rerun to resume.")
+        return False
+    journal.finish()
+    # snapshots and bulk upserts take the signature of the stored vectors from here
+    from embeddings import save_dump_signature
+    from utils import embedding_signature
+    save_dump_signature(output_path, embedding_signature())
+    return True
+
+def insert_data_chroma(chunks: list[rg.RAGChunk], collection_name: str, checkpoint_path: str | None = None):
+    """
+    Upserts the chunks in batches, embedding the next batch while the current one is written.
+    """
+    from chroma_writer import bulk_upsert
+    return bulk_upsert(chunks, collection_name, checkpoint_path=checkpoint_path, total=len(chunks))
 
 
 if __name__ == "__main__":
-    
+    import chromadb
     print(chromadb.PersistentClient("chroma").get_collection("all_data_v1").count())
 
     #chunks =  load_jsonl_ragChunk("src/data/chunks_all_v1.jsonl")
@@ -0,0 +1,118 @@
+"""
+Run journal for checkpointed, resumable ingestion runs.
+
+- Finished items are appended to "<output>.partial", their IDs to "<output>.journal" (both fsynced)
+- A restart skips every journaled ID and only processes the pending chunks
+- finish() atomically promotes the partial file to the final output
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Dict, Optional, Set
+
+
+class RunJournal:
+    def __init__(self, output_path: str, journal_path: Optional[str] = None):
+        self.output_path = output_path
+        self.partial_path = output_path + ".partial"
+        self.journal_path = journal_path or output_path + ".journal"
+        self._completed: Set[str] = set()
+        self._lock = threading.Lock()
+        self._out = None
+        self._journal = None
+
+    @property
+    def completed(self) -> Set[str]:
+        return set(self._completed)
+
+    def _read_journal(self) -> Set[str]:
+        ids: Set[str] = set()
+        if not os.path.exists(self.journal_path):
+            return ids
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                # a torn last line has no newline yet and is not complete
+                if line.endswith("\n") and line.strip():
+                    ids.add(line.strip())
+        return ids
+
+    def _recover_partial(self, journaled: Set[str]) -> Set[str]:
+        """
+        Keeps only the partial records that are journaled and parse, drops the rest
+        (e.g. a record written right before a crash but never journaled).
+        """
+        kept: Set[str] = set()
+        if not os.path.exists(self.partial_path):
+            return kept
+        tmp = self.partial_path + ".tmp"
+        with open(self.partial_path, encoding="utf-8") as src, open(tmp, "w", encoding="utf-8") as dst:
+            for line in src:
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                item_id = item.get("id")
+                if item_id in journaled and item_id not in kept:
+                    dst.write(json.dumps(item) + "\n")
+                    kept.add(item_id)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp, self.partial_path)
+        return kept
+
+    def start(self) -> Set[str]:
+        """
+        Opens the journal and returns the IDs completed by earlier runs.
+        """
+        completed = self._recover_partial(self._read_journal())
+        # rewrite the journal so it matches the recovered partial file
+        tmp = self.journal_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for item_id in sorted(completed):
+                f.write(item_id + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.journal_path)
+
+        self._completed = completed
+        self._out = open(self.partial_path, "a", encoding="utf-8")
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        return set(completed)
+
+    def record(self, item: Dict[str, object]) -> None:
+        """
+        Persists one finished item (RAGChunk.to_json_item) before its ID is journaled.
+        """
+        item_id = str(item["id"])
+        with self._lock:
+            if item_id in self._completed:
+                return
+            self._out.write(json.dumps(item) + "\n")
+            self._out.flush()
+            os.fsync(self._out.fileno())
+            self._journal.write(item_id + "\n")
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._completed.add(item_id)
+
+    def close(self) -> None:
+        for f in (self._out, self._journal):
+            if f is not None and not f.closed:
+                f.close()
+
+    def finish(self) -> None:
+        """
+        Promotes the partial output to output_path and removes the journal.
+        """
+        self.close()
+        os.replace(self.partial_path, self.output_path)
+        os.remove(self.journal_path)
+
+    def __enter__(self) -> "RunJournal":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,118 @@
+"""
+Streaming reader for RAGChunk JSONL dumps (chunks_all_v1.jsonl).
+
+- Lines are read and parsed lazily, only one batch is in memory at a time
+- orjson is used when installed, stdlib json otherwise
+- fields=(...) keeps only those top-level keys, the embedding array is cut out of the
+  raw line before parsing when it is not requested (most of a line is floats)
+- workers > 0 parses batches in a process pool, at most 2 * workers batches are in flight
+"""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import chunk_data.rag_chunk as rc
+
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+
+# the dumps are written by json.dumps, a quoted key followed by ":" only occurs as a real key
+_EMBEDDING_RE = re.compile(rb'"embedding":\s*\[[^\]]*\]')
+# RAGChunk needs neither the id nor the embedding
+CHUNK_FIELDS = ("document", "metadata")
+
+
+def _loads(line: bytes):
+    if _orjson is not None:
+        return _orjson.loads(line)
+    import json
+    return json.loads(line)
+
+
+def parse_line(line: bytes, fields: Optional[Sequence[str]] = None) -> Dict[str, object]:
+    """
+    Parses one JSONL line, keeping only fields if given.
+    """
+    if fields is not None and "embedding" not in fields:
+        line = _EMBEDDING_RE.sub(b'"embedding":null', line, count=1)
+    item = _loads(line)
+    if fields is not None:
+        item = {key: item[key] for key in fields if key in item}
+    return item
+
+
+def _parse_batch(lines: List[bytes], fields: Optional[Sequence[str]]) -> List[Dict[str, object]]:
+    return [parse_line(line, fields) for line in lines]
+
+
+def _iter_line_batches(path: str, batch_size: int) -> Iterator[List[bytes]]:
+    batch: List[bytes] = []
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            batch.append(line)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def iter_jsonl_item_batches(
+    path: str,
+    fields: Optional[Sequence[str]] = None,
+    batch_size: int = 512,
+    workers: int = 0,
+) -> Iterator[List[Dict[str, object]]]:
+    """
+    Yields the parsed items of the dump in batches of batch_size, in file order.
+    """
+    line_batches = _iter_line_batches(path, batch_size)
+    if workers <= 0:
+        for lines in line_batches:
+            yield _parse_batch(lines, fields)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        in_flight = deque()
+        for lines in line_batches:
+            in_flight.append(ex.submit(_parse_batch, lines, fields))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def iter_jsonl_items(path: str, fields: Optional[Sequence[str]] = None, batch_size: int = 512, workers: int = 0) -> Iterator[Dict[str, object]]:
+    for batch in iter_jsonl_item_batches(path, fields, batch_size, workers):
+        yield from batch
+
+
+def iter_ragchunk_batches(path: str, batch_size: int = 512, workers: int = 0) -> Iterator[List[rc.RAGChunk]]:
+    """
+    Yields RAGChunks in batches, the embeddings are skipped.
+    """
+    for items in iter_jsonl_item_batches(path, CHUNK_FIELDS, batch_size, workers):
+        yield [rc.ragchunk_from_json_item(item) for item in items]
+
+
+def iter_ragchunks(path: str, batch_size: int = 512, workers: int = 0) -> Iterator[rc.RAGChunk]:
+    for batch in iter_ragchunk_batches(path, batch_size, workers):
+        yield from batch
+
+
+def iter_embeddings(path: str, batch_size: int = 512, workers: int = 0) -> Iterator[tuple]:
+    """
+    Yields (id, embedding) pairs, e.g. to build an index without loading the chunks.
+    """
+    for item in iter_jsonl_items(path, ("id", "embedding"), batch_size, workers):
+        yield item["id"], item["embedding"]
+
@@ -1,68 +1,200 @@
-from openai import OpenAI
 import os
-from dotenv import load_dotenv
-import chromadb as cbd
-from pydantic import BaseModel
 import utils
-from RAG import query_results
+from RAG import query_results, query_results_federated, query_results_hyde
 
 MODEL_NAME_2 = "gpt-5-nano-2025-08-07"  
+# small model for the hypothetical HyDE answers
+HYDE_MODEL_NAME = "gpt-5-nano-2025-08-07"
+ASSISTANT_INSTRUCTIONS = "You are a DUUI assitant and answer question about."
+# small model for the batched rerank scores
+RERANK_MODEL_NAME = "gpt-5-nano-2025-08-07"
+
+# openai is imported on the first LLMWrapper() (see _openai_client), importing this module stays cheap
+OpenAI = None
+
+
+def _openai_client(api_key: str | None):
+    global OpenAI
+    if OpenAI is None:
+        from openai import OpenAI
+    return OpenAI(api_key=api_key)
+
+
+def _facet_where(question: str) -> dict | None:
+    """
+    Restricts retrieval to the repos whose facets (GPU image, UIMA type, dependency) the question names.
+    """
+    import facets
+    store = facets.load_cached()
+    if store is None:
+        return None
+    filters = facets.facets_for_question(question, store)
+    return facets.facet_where(store.match(filters)) if filters else None
+
+
+def code_assistant_prompt(input_user: str, rag_context_text: str, coding_lg: str = "python") -> str:
+    prompt_code_assistant = ""
+    match coding_lg.lower():
+        case "python":
+            prompt_code_assistant = utils.load_prompt_template("src/prompts/gen_python_code.txt")
+        case "java":
+            prompt_code_assistant = utils.load_prompt_template("src/prompts/gen_java_code.txt")
+    return (
+        prompt_code_assistant
+        .replace("{{user_input}}", input_user)
+        .replace("{{rag_context}}", rag_context_text)
+    )
+
+
+def format_rag_context(documents: list, metadatas: list, start: int = 1) -> str:
+    """
+    Numbered context entries ([start], [start + 1], ...) of retrieved chunks.
+    """
+    context_parts = []
+    for i, doc in enumerate(documents):
+        meta = metadatas[i] if i < len(metadatas) else {}
+        context_parts.append(f"[{start + i}] document:\n{doc}\nmetadata:\n{meta}")
+    return "\n\n".join(context_parts) if context_parts else "No RAG context."
+
 
 class LLMWrapper():
     def __init__(self, model: str = None):
         self.model = MODEL_NAME_2
-        load_dotenv()
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        utils.load_dotenv()
+        self.client = _openai_client(os.getenv("OPENAI_API_KEY"))
         self.llm_disabled = os.getenv("LLM_DISABLE", "").lower() in {"1", "true", "yes"}
 
     def add_model(self, model:str):
         self.model = model
     
-    def llm_code_assistant(self, input_user: str, collection_name: str, coding_lg: str = "python", rag_context: bool = True)-> str:
+    def llm_code_assistant(self, input_user: str, collection_name: str | list[str], coding_lg: str = "python", rag_context: bool = True, hyde: bool = False, diversify: bool = False, rerank: bool = False, symbol_fast_path: bool = True)-> str:
         """
         This function call instucts the Model in a certain way to assist with coding Question for DUUI and in particular python.
+        With diversify the context is chosen by MMR from over-fetched hits, without overlapping chunks (see RAG.diversify_results).
+        With rerank more hits are retrieved and only the best few by the reranker (RERANKER) go into the prompt.
+        With symbol_fast_path a question that only asks where an identifier is defined is answered from the symbol index.
+        Stateless, chat_session.ChatSession keeps the context of follow-up questions.
         """
-        prompt_code_assistant = ""
-        match coding_lg.lower():
-            case "python":
-                prompt_code_assistant = utils.load_prompt_template("src/prompts/gen_python_code.txt")
-            case "java":
-                prompt_code_assistant = utils.load_prompt_template("src/prompts/gen_java_code.txt")
+        # location questions ("where is X defined?") are answered from the symbol index, no RAG and no LLM call
+        if symbol_fast_path:
+            from symbol_index import answer_location
+            location = answer_location(input_user)
+            if location is not None:
+                return location
 
         # format query response
         query_response = {}
         if rag_context:
-            # TODO eventuell schlauer in der query_reponse funktion zu formatieren
-            # Anpassen,dass die collection ausgewählt wreden kann
-            query_response = query_results(input_user, collection_name=collection_name)
+            rerank_n = None
+            if rerank:
+                # a better ranked context needs fewer chunks in the prompt
+                from rerank import RERANK_TOP
+                rerank_n = RERANK_TOP
+            query_response = self.retrieve_context(input_user, collection_name, coding_lg=coding_lg, hyde=hyde, diversify=diversify, rerank=rerank, n_results=5,
+                                                   rerank_n=rerank_n)
 
         documents = query_response.get("documents", [[]])[0] if query_response else []
         metadatas = query_response.get("metadatas", [[]])[0] if query_response else []
-        context_parts = []
-        for i, doc in enumerate(documents or []):
-            meta = metadatas[i] if i < len(metadatas) else {}
-            context_parts.append(f"[{i + 1}] document:\n{doc}\nmetadata:\n{meta}")
-        rag_context_text = "\n\n".join(context_parts) if context_parts else "No RAG context."
-
-        concat_prompt = (
-            prompt_code_assistant
-            .replace("{{user_input}}", input_user)
-            .replace("{{rag_context}}", rag_context_text)
-        )
+        concat_prompt = code_assistant_prompt(input_user, format_rag_context(documents or [], metadatas or []), coding_lg)
 
         return self.client.responses.parse(
             model=self.model,
-            instructions="You are a DUUI assitant and answer question about.",
+            instructions=ASSISTANT_INSTRUCTIONS,
             input=concat_prompt
         ).output_text
 
+    def retrieve_context(self, input_user: str, collection_name: str | list[str], coding_lg: str = "python", hyde: bool = False, diversify: bool = False, rerank: bool = False, n_results: int = 5, query_embedding: list[float] | None = None,
+                         rerank_n: int | None = None) -> dict:
+        """
+        Retrieval step of llm_code_assistant, returns the query result.
+        query_embedding is the vector of input_user if the caller already embedded it.
+        With rerank, rerank_n hits are kept after reranking (default n_results); if reranking
+        fails or runs over budget, n_results first-stage hits are returned.
+        """
+        # TODO eventuell schlauer in der query_reponse funktion zu formatieren
+        # Anpassen,dass die collection ausgewählt wreden kann
+        where = _facet_where(input_user)
+        n_first = n_results
+        if rerank:
+            from rerank import RERANK_CANDIDATES
+            # the reranker picks its top hits out of a larger first-stage list
+            n_first = max(n_results, RERANK_CANDIDATES)
+        if hyde and not isinstance(collection_name, str):
+            raise ValueError("HyDE retrieval queries a single collection, not a list.")
+        if hyde:
+            query_response = query_results_hyde(input_user, collection_name=collection_name, n_results=n_first, coding_lg=coding_lg, llm=self, where=where,
+                                                diversify=diversify, query_embedding=query_embedding)
+        elif isinstance(collection_name, (list, tuple)):
+            query_response = query_results_federated(input_user, collection_names=list(collection_name), n_results=n_first, where=where, diversify=diversify,
+                                                     query_embedding=query_embedding)
+        else:
+            query_response = query_results(input_user, collection_name=collection_name, n_results=n_first, where=where, diversify=diversify,
+                                           query_embedding=query_embedding)
+        if rerank:
+            from rerank import get_scorer, rerank_results
+            query_response = rerank_results(input_user, query_response, n_results=rerank_n or n_results, scorer=get_scorer(llm=self),
+                                            top_n=n_first, fallback_n=n_results)
+        return query_response
+
+    def llm_session_turn(self, input_text: str, previous_response_id: str | None = None) -> tuple[str, str]:
+        """
+        One turn of a conversation, earlier turns (and the context sent with them) are referenced
+        by previous_response_id instead of being sent again. Returns the answer and the response id.
+        """
+        response = self.client.responses.parse(
+            model=self.model,
+            instructions=ASSISTANT_INSTRUCTIONS,
+            input=input_text,
+            previous_response_id=previous_response_id
+        )
+        return response.output_text, response.id
+
 
     
 
+    def llm_hypothetical_answer(self, input_user: str, coding_lg: str = "python") -> str:
+        """
+        Generates a short hypothetical code snippet answering the question (HyDE).
+        The snippet is only used for retrieval and never shown to the user.
+        """
+        if self.llm_disabled:
+            return ""
+        prompt_hyde = (
+            utils.load_prompt_template("src/prompts/hyde_answer.txt")
+            .replace("{{coding_lg}}", coding_lg)
+        )
+        return self.client.responses.parse(
+            model=HYDE_MODEL_NAME,
+            instructions=prompt_hyde,
+            input=input_user
+        ).output_text
+
+    def llm_rerank_scores(self, input_user: str, documents: list[str]) -> list[float]:
+        """
+        Scores every document for the question (0-10) in one call, used by the LLM reranker.
+        """
+        if self.llm_disabled:
+            return []
+        from pydantic import BaseModel
+
+        class rerankScores(BaseModel):
+            scores: list[int]
+
+        candidates = "\n\n".join(f"[{i}]\n{doc}" for i, doc in enumerate(documents))
+        response = self.client.responses.parse(
+            model=RERANK_MODEL_NAME,
+            instructions=utils.load_prompt_template("src/prompts/rerank.txt"),
+            input=f"Question:\n{input_user}\n\nChunks:\n{candidates}",
+            text_format=rerankScores
+        )
+        return [float(s) for s in response.output_parsed.scores]
+
     def llm_code_description(self, code: str)-> str:
         """
         Generates the Output for the code descirption in the proper Json format
         """
+        from pydantic import BaseModel
+
         class metadatasRag(BaseModel):
             description: str
             keywords: list[str]
@@ -0,0 +1,171 @@
+"""
+Dimensionality reduction for embeddings.
+
+- PCA fitted on the corpus embeddings or Matryoshka-style truncation to the first dims
+- Saved as .npz next to the index and applied to chunk and query embeddings
+- projection_report shows recall@k and search latency per target dimension
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+METHODS = ("pca", "truncate")
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class EmbeddingProjection:
+    def __init__(self, method: str, input_dim: int, dim: int, mean: Optional[np.ndarray] = None, components: Optional[np.ndarray] = None):
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}")
+        if dim > input_dim:
+            raise ValueError("target dim must not be larger than the input dim")
+        self.method = method
+        self.input_dim = input_dim
+        self.dim = dim
+        self.mean = mean
+        self.components = components
+
+    @classmethod
+    def fit(cls, embeddings: Iterable[Sequence[float]], dim: int, method: str = "pca") -> "EmbeddingProjection":
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        input_dim = int(matrix.shape[1])
+        if method == "truncate":
+            return cls("truncate", input_dim, dim)
+        if method != "pca":
+            raise ValueError(f"method must be one of {METHODS}")
+        if dim > min(matrix.shape):
+            raise ValueError("PCA needs at least dim embeddings to fit")
+        mean = matrix.mean(axis=0)
+        # rows of vt are the principal axes, sorted by explained variance
+        _, _, vt = np.linalg.svd(matrix - mean, full_matrices=False)
+        return cls("pca", input_dim, dim, mean=mean.astype(np.float32), components=vt[:dim].astype(np.float32))
+
+    @classmethod
+    def fit_from_jsonl(cls, jsonl_path: str, dim: int, method: str = "pca") -> "EmbeddingProjection":
+        """
+        Fits the projection on the embeddings of a chunks JSONL dump (e.g. chunks_all_v1.jsonl).
+        """
+        from jsonl_stream import iter_embeddings
+
+        embeddings = [embedding for _, embedding in iter_embeddings(jsonl_path)]
+        return cls.fit(embeddings, dim, method=method)
+
+    def apply(self, vectors: Iterable[Sequence[float]]) -> np.ndarray:
+        """
+        Projects a batch (or a single vector) and re-normalizes to unit length.
+        """
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.shape[-1] != self.input_dim:
+            raise ValueError(f"expected embeddings of dim {self.input_dim}, got {matrix.shape[-1]}")
+        if self.method == "truncate":
+            projected = matrix[..., :self.dim]
+        else:
+            projected = (matrix - self.mean) @ self.components.T
+        return _normalize(projected)
+
+    def apply_one(self, vector: Sequence[float]) -> List[float]:
+        return self.apply(vector).tolist()
+
+    def save(self, path: str) -> None:
+        arrays = {"method": np.array(self.method), "input_dim": np.array(self.input_dim), "dim": np.array(self.dim)}
+        if self.method == "pca":
+            arrays["mean"] = self.mean
+            arrays["components"] = self.components
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "EmbeddingProjection":
+        data = np.load(path)
+        method = str(data["method"])
+        return cls(
+            method,
+            int(data["input_dim"]),
+            int(data["dim"]),
+            mean=data["mean"] if method == "pca" else None,
+            components=data["components"] if method == "pca" else None,
+        )
+
+
+def _exact_top_k(matrix: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ matrix.T
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+def projection_report(
+    embeddings: Iterable[Sequence[float]],
+    queries: Iterable[Sequence[float]],
+    dims: Sequence[int],
+    k: int = 10,
+    methods: Sequence[str] = METHODS,
+    fit_embeddings: Optional[Iterable[Sequence[float]]] = None,
+) -> List[Dict[str, object]]:
+    """
+    Recall@k against full-dimension exact search, mean search latency and bytes per chunk
+    for every (method, dim). fit_embeddings defaults to the corpus itself.
+    """
+    matrix = _normalize(np.asarray(embeddings, dtype=np.float32))
+    q = _normalize(np.asarray(queries, dtype=np.float32))
+    fit_on = matrix if fit_embeddings is None else np.asarray(fit_embeddings, dtype=np.float32)
+
+    t0 = time.perf_counter()
+    reference = _exact_top_k(matrix, q, k)
+    full_ms = (time.perf_counter() - t0) * 1000 / max(len(q), 1)
+
+    rows: List[Dict[str, object]] = [{
+        "method": "none",
+        "dim": int(matrix.shape[1]),
+        "recall": 1.0,
+        "latency_ms": full_ms,
+        "bytes_per_chunk": int(matrix.shape[1]) * 4,
+    }]
+    for method in methods:
+        for dim in dims:
+            projection = EmbeddingProjection.fit(fit_on, dim, method=method)
+            reduced = projection.apply(matrix)
+            reduced_q = projection.apply(q)
+            t0 = time.perf_counter()
+            found = _exact_top_k(reduced, reduced_q, k)
+            latency = (time.perf_counter() - t0) * 1000 / max(len(q), 1)
+            recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(found, reference)])
+            rows.append({
+                "method": method,
+                "dim": int(dim),
+                "recall": float(recall),
+                "latency_ms": latency,
+                "bytes_per_chunk": int(dim) * 4,
+            })
+    return rows
+
+
+def format_report(rows: List[Dict[str, object]]) -> str:
+    lines = [f"{'method':<10}{'dim':>6}{'recall':>9}{'ms/query':>10}{'bytes':>8}"]
+    for row in rows:
+        lines.append(
+            f"{row['method']:<10}{row['dim']:>6}{row['recall']:>9.3f}{row['latency_ms']:>10.3f}{row['bytes_per_chunk']:>8}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "src/data/chunks_all_v1.jsonl"
+    with open(path, encoding="utf-8") as f:
+        corpus = np.asarray([json.loads(line)["embedding"] for line in f if line.strip()], dtype=np.float32)
+    rng = np.random.default_rng(0)
+    sample = corpus[rng.choice(len(corpus), size=min(50, len(corpus)), replace=False)]
+    noisy_queries = sample + rng.normal(scale=0.01, size=sample.shape).astype(np.float32)
+    dims = [d for d in (32, 64, 128, 256, 512) if d <= min(corpus.shape)]
+    print(format_report(projection_report(corpus, noisy_queries, dims=dims, k=10)))
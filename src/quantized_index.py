@@ -0,0 +1,306 @@
+"""
+In-process vector index with quantized embeddings.
+
+- First pass search on int8 scalar-quantized and/or 1-bit binary codes (kept in memory)
+- Top candidates are rescored with the full-precision float32 vectors,
+  which stay on disk and are only memory-mapped
+- Reports memory use and recall@k against exact search
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from projection import EmbeddingProjection
+
+
+INDEX_VERSION = 1
+MODES = ("int8", "binary", "both")
+# rows scored per block in the first pass, bounds the temporary float32 copies
+_BLOCK_ROWS = 16384
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def quantize_int8(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-dimension scalar quantization to int8.
+    Returns (codes, scale, offset) with embedding ~= codes * scale + offset.
+    """
+    lo = embeddings.min(axis=0)
+    hi = embeddings.max(axis=0)
+    scale = (hi - lo) / 255.0
+    scale[scale == 0] = 1.0
+    codes = np.round((embeddings - lo) / scale) - 128
+    offset = lo + 128 * scale
+    return codes.astype(np.int8), scale.astype(np.float32), offset.astype(np.float32)
+
+
+def quantize_binary(embeddings: np.ndarray) -> np.ndarray:
+    """
+    1-bit quantization (sign of each dimension), packed to dim / 8 bytes per vector.
+    """
+    return np.packbits(embeddings > 0, axis=-1)
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    return table[values]
+
+
+def _top_k(scores: np.ndarray, k: int, candidates: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Indices of the k highest scores, sorted descending.
+    """
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    part = np.argpartition(-scores, k - 1)[:k]
+    order = part[np.argsort(-scores[part], kind="stable")]
+    return order if candidates is None else candidates[order]
+
+
+class QuantizedIndex:
+    def __init__(
+        self,
+        path: str,
+        ids: List[str],
+        mode: str,
+        full: np.ndarray,
+        int8_codes: Optional[np.ndarray] = None,
+        int8_scale: Optional[np.ndarray] = None,
+        int8_offset: Optional[np.ndarray] = None,
+        binary_codes: Optional[np.ndarray] = None,
+        manifest: Optional[Dict[str, object]] = None,
+        projection: Optional[EmbeddingProjection] = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.path = path
+        self.ids = ids
+        self.mode = mode
+        self.full = full
+        self.int8_codes = int8_codes
+        self.int8_scale = int8_scale
+        self.int8_offset = int8_offset
+        self.binary_codes = binary_codes
+        self.manifest = manifest or {}
+        self.projection = projection
+
+    @property
+    def dim(self) -> int:
+        return int(self.full.shape[1])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[str],
+        embeddings: Iterable[Sequence[float]],
+        path: str,
+        mode: str = "int8",
+        embedding_model: str = "mxbai-embed-large",
+        projection: Optional[EmbeddingProjection] = None,
+    ) -> "QuantizedIndex":
+        """
+        Quantizes the embeddings, writes the index to path and returns it loaded from disk.
+        With a projection the embeddings are reduced first and the projection is saved with the index.
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if projection is not None:
+            matrix = projection.apply(matrix)
+        matrix = _normalize(matrix)
+        if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+            raise ValueError("embeddings must be a 2D array with one row per id")
+
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "float32.npy"), matrix)
+        if mode in ("int8", "both"):
+            codes, scale, offset = quantize_int8(matrix)
+            np.save(os.path.join(path, "int8.npy"), codes)
+            np.savez(os.path.join(path, "int8_params.npz"), scale=scale, offset=offset)
+        if mode in ("binary", "both"):
+            np.save(os.path.join(path, "binary.npy"), quantize_binary(matrix))
+        if projection is not None:
+            projection.save(os.path.join(path, "projection.npz"))
+        with open(os.path.join(path, "ids.json"), "w", encoding="utf-8") as f:
+            json.dump(list(ids), f)
+        manifest = {
+            "version": INDEX_VERSION,
+            "mode": mode,
+            "count": int(matrix.shape[0]),
+            "dim": int(matrix.shape[1]),
+            "embedding_model": embedding_model,
+            "projection": None if projection is None else {"method": projection.method, "input_dim": projection.input_dim},
+        }
+        with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path: str) -> "QuantizedIndex":
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version: {manifest.get('version')}")
+        with open(os.path.join(path, "ids.json"), encoding="utf-8") as f:
+            ids = json.load(f)
+        mode = manifest["mode"]
+        int8_codes = int8_scale = int8_offset = binary_codes = None
+        if mode in ("int8", "both"):
+            int8_codes = np.load(os.path.join(path, "int8.npy"))
+            params = np.load(os.path.join(path, "int8_params.npz"))
+            int8_scale, int8_offset = params["scale"], params["offset"]
+        if mode in ("binary", "both"):
+            binary_codes = np.load(os.path.join(path, "binary.npy"))
+        # full precision vectors stay on disk, only rescored rows are paged in
+        full = np.load(os.path.join(path, "float32.npy"), mmap_mode="r")
+        projection = None
+        if manifest.get("projection"):
+            projection = EmbeddingProjection.load(os.path.join(path, "projection.npz"))
+        return cls(
+            path=path,
+            ids=ids,
+            mode=mode,
+            full=full,
+            int8_codes=int8_codes,
+            int8_scale=int8_scale,
+            int8_offset=int8_offset,
+            binary_codes=binary_codes,
+            manifest=manifest,
+            projection=projection,
+        )
+
+    @classmethod
+    def build_from_jsonl(
+        cls,
+        jsonl_path: str,
+        path: str,
+        mode: str = "int8",
+        projection: Optional[EmbeddingProjection] = None,
+    ) -> "QuantizedIndex":
+        """
+        Builds the index from a chunks JSONL dump (items of RAGChunk.to_json_item).
+        """
+        from jsonl_stream import iter_embeddings
+
+        ids: List[str] = []
+        embeddings: List[List[float]] = []
+        for chunk_id, embedding in iter_embeddings(jsonl_path):
+            ids.append(chunk_id)
+            embeddings.append(embedding)
+        return cls.build(ids, embeddings, path, mode=mode, projection=projection)
+
+    def _int8_scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        # q . (codes * scale + offset) = (q * scale) . codes + q . offset
+        q_scaled = query * self.int8_scale
+        bias = float(query @ self.int8_offset)
+        codes = self.int8_codes if rows is None else self.int8_codes[rows]
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], _BLOCK_ROWS):
+            block = codes[start:start + _BLOCK_ROWS].astype(np.float32)
+            scores[start:start + _BLOCK_ROWS] = block @ q_scaled + bias
+        return scores
+
+    def _binary_scores(self, query: np.ndarray) -> np.ndarray:
+        q_bits = quantize_binary(query[None, :])[0]
+        distances = _popcount(np.bitwise_xor(self.binary_codes, q_bits)).sum(axis=1, dtype=np.int32)
+        return -distances.astype(np.float32)
+
+    def _prepare_query(self, query: Sequence[float]) -> np.ndarray:
+        q = np.asarray(query, dtype=np.float32)
+        # full-size query embeddings are reduced with the projection saved in the index
+        if self.projection is not None and q.shape[-1] == self.projection.input_dim:
+            q = self.projection.apply(q)
+        return _normalize(q[None, :])[0]
+
+    def search(self, query: Sequence[float], k: int = 5, rescore_factor: int = 4) -> List[Tuple[str, float]]:
+        """
+        Returns the k best (id, cosine similarity) pairs.
+        The quantized first pass keeps k * rescore_factor candidates which are rescored exactly.
+        """
+        q = self._prepare_query(query)
+        n_candidates = max(k * rescore_factor, k)
+        if self.mode == "int8":
+            candidates = _top_k(self._int8_scores(q), n_candidates)
+        elif self.mode == "binary":
+            candidates = _top_k(self._binary_scores(q), n_candidates)
+        else:
+            # hamming over everything, int8 on a wider pool, exact on the rest
+            pool = _top_k(self._binary_scores(q), n_candidates * 4)
+            candidates = _top_k(self._int8_scores(q, rows=pool), n_candidates, candidates=pool)
+
+        rows = np.sort(candidates)
+        exact = np.asarray(self.full[rows], dtype=np.float32) @ q
+        best = _top_k(exact, k)
+        return [(self.ids[int(rows[i])], float(exact[i])) for i in best]
+
+    def exact_search(self, query: Sequence[float], k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Brute force float32 search, the reference for recall_at_k.
+        """
+        q = self._prepare_query(query)
+        scores = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), _BLOCK_ROWS):
+            scores[start:start + _BLOCK_ROWS] = np.asarray(self.full[start:start + _BLOCK_ROWS]) @ q
+        return [(self.ids[int(i)], float(scores[i])) for i in _top_k(scores, k)]
+
+    def recall_at_k(self, queries: Iterable[Sequence[float]], k: int = 10, rescore_factor: int = 4) -> Dict[str, float]:
+        """
+        Mean overlap of search() with exact_search() over the queries, plus mean latencies in ms.
+        """
+        recalls: List[float] = []
+        quantized_ms: List[float] = []
+        exact_ms: List[float] = []
+        for query in queries:
+            t0 = time.perf_counter()
+            approx = {chunk_id for chunk_id, _ in self.search(query, k=k, rescore_factor=rescore_factor)}
+            t1 = time.perf_counter()
+            exact = {chunk_id for chunk_id, _ in self.exact_search(query, k=k)}
+            t2 = time.perf_counter()
+            recalls.append(len(approx & exact) / max(len(exact), 1))
+            quantized_ms.append((t1 - t0) * 1000)
+            exact_ms.append((t2 - t1) * 1000)
+        return {
+            "k": k,
+            "recall": float(np.mean(recalls)) if recalls else 0.0,
+            "quantized_ms": float(np.mean(quantized_ms)) if quantized_ms else 0.0,
+            "exact_ms": float(np.mean(exact_ms)) if exact_ms else 0.0,
+        }
+
+    def memory_report(self) -> Dict[str, object]:
+        """
+        Bytes held in memory by the first pass codes compared to in-memory float32 vectors.
+        The float32 matrix is memory-mapped and counted separately as on-disk size.
+        """
+        count = max(len(self.ids), 1)
+        in_memory = 0
+        for arr in (self.int8_codes, self.int8_scale, self.int8_offset, self.binary_codes):
+            if arr is not None:
+                in_memory += arr.nbytes
+        float32_bytes = len(self.ids) * self.dim * 4
+        return {
+            "mode": self.mode,
+            "count": len(self.ids),
+            "dim": self.dim,
+            "in_memory_bytes": in_memory,
+            "in_memory_bytes_per_chunk": in_memory / count,
+            "float32_bytes_per_chunk": float32_bytes / count,
+            "mmap_float32_bytes": float32_bytes,
+            "compression": float32_bytes / in_memory if in_memory else 0.0,
+        }
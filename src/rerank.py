@@ -0,0 +1,274 @@
+"""
+Second-stage reranking of retrieved chunks with a latency budget.
+
+- The top_n first-stage hits are scored against the question by a local cross-encoder
+  (RERANK_MODEL_PATH: sentence-transformers directory or model.onnx + tokenizer.json)
+  or by one batched LLM call (LLMWrapper.llm_rerank_scores)
+- Scores are cached by (scorer, query hash, chunk ID), in memory or in RERANK_CACHE_PATH,
+  only the uncached hits are scored
+- Scoring runs in a worker thread; if it does not finish within budget_s (or fails) the
+  first-stage order is returned. Late scores still go into the cache for the next call
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+# first-stage hits scored, hits kept for generation, seconds allowed for scoring
+RERANK_CANDIDATES = 20
+RERANK_TOP = 3
+DEFAULT_BUDGET_S = 2.0
+MAX_CACHE_ENTRIES = 50000
+# characters of a chunk shown to the LLM scorer
+LLM_DOCUMENT_CHARS = 1500
+
+
+def query_hash(query: str) -> str:
+    # whitespace differences do not make a new query, case does (identifiers)
+    return hashlib.sha1(" ".join(query.split()).encode("utf-8")).hexdigest()
+
+
+class ScoreCache:
+    """
+    Rerank scores by "scorer|query hash|chunk ID", oldest entries are evicted first.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = MAX_CACHE_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.scores: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    @staticmethod
+    def _key(scorer: str, qhash: str, chunk_id: str) -> str:
+        return f"{scorer}|{qhash}|{chunk_id}"
+
+    def get_many(self, scorer: str, qhash: str, chunk_ids: Iterable[str]) -> Dict[str, float]:
+        with self._lock:
+            found = {}
+            for chunk_id in chunk_ids:
+                score = self.scores.get(self._key(scorer, qhash, chunk_id))
+                if score is not None:
+                    found[chunk_id] = score
+            return found
+
+    def put_many(self, scorer: str, qhash: str, scores: Dict[str, float]) -> None:
+        with self._lock:
+            for chunk_id, score in scores.items():
+                key = self._key(scorer, qhash, chunk_id)
+                self.scores.pop(key, None)
+                self.scores[key] = float(score)
+            for key in list(self.scores)[:max(0, len(self.scores) - self.max_entries)]:
+                del self.scores[key]
+            self._dirty = True
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self.scores)
+            self._dirty = False
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(self.path + ".tmp", self.path)
+
+    @classmethod
+    def load(cls, path: str, max_entries: int = MAX_CACHE_ENTRIES) -> "ScoreCache":
+        cache = cls(path, max_entries)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                cache.scores = {key: float(score) for key, score in json.load(f).items()}
+        return cache
+
+
+_CACHES: Dict[Optional[str], ScoreCache] = {}
+
+
+def load_cache(path: Optional[str] = None) -> ScoreCache:
+    """
+    The score cache at path (default: RERANK_CACHE_PATH, in memory if unset), loaded once per process.
+    """
+    import utils
+
+    utils.load_dotenv()
+    path = path or os.getenv("RERANK_CACHE_PATH") or None
+    if path not in _CACHES:
+        _CACHES[path] = ScoreCache.load(path) if path else ScoreCache()
+    return _CACHES[path]
+
+
+class CrossEncoderScorer:
+    """
+    Local cross-encoder, model_path is a sentence-transformers directory or a directory with
+    model.onnx + tokenizer.json (like LocalCPUEmbedder). The model is loaded on the first score call.
+    """
+
+    def __init__(self, model_path: str, max_length: int = 512, batch_size: int = 16):
+        self.model_path = model_path
+        self.name = "cross-encoder:" + os.path.basename(os.path.normpath(model_path))
+        self.runtime = "onnx" if os.path.exists(os.path.join(model_path, "model.onnx")) else "sentence-transformers"
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self._model = None
+        self._tokenizer = None
+        self._load_lock = threading.Lock()
+
+    def _load(self) -> None:
+        with self._load_lock:
+            if self._model is not None:
+                return
+            if self.runtime == "onnx":
+                import onnxruntime as ort
+                from tokenizers import Tokenizer
+
+                self._tokenizer = Tokenizer.from_file(os.path.join(self.model_path, "tokenizer.json"))
+                self._tokenizer.enable_truncation(max_length=self.max_length)
+                self._tokenizer.enable_padding()
+                self._model = ort.InferenceSession(os.path.join(self.model_path, "model.onnx"), providers=["CPUExecutionProvider"])
+            else:
+                try:
+                    from sentence_transformers import CrossEncoder
+                except ImportError as exc:
+                    raise ImportError("CrossEncoderScorer needs sentence-transformers or an ONNX export (model.onnx + tokenizer.json).") from exc
+                self._model = CrossEncoder(self.model_path, device="cpu", max_length=self.max_length)
+
+    def score(self, query: str, documents: Sequence[str]) -> List[float]:
+        self._load()
+        pairs = [(query, document) for document in documents]
+        if self.runtime == "sentence-transformers":
+            return [float(s) for s in self._model.predict(pairs, batch_size=self.batch_size)]
+
+        import numpy as np
+
+        scores: List[float] = []
+        input_names = {i.name for i in self._model.get_inputs()}
+        for start in range(0, len(pairs), self.batch_size):
+            encodings = self._tokenizer.encode_batch(pairs[start:start + self.batch_size])
+            feeds = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            }
+            if "token_type_ids" in input_names:
+                feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+            logits = self._model.run(None, feeds)[0]
+            scores.extend(float(s) for s in logits.reshape(len(encodings), -1)[:, 0])
+        return scores
+
+
+class LLMScorer:
+    """
+    Scores all candidates with one structured LLM call (0 = irrelevant, 10 = answers the question).
+    """
+
+    def __init__(self, llm=None):
+        self._llm = llm
+        self.name = "llm"
+
+    def score(self, query: str, documents: Sequence[str]) -> List[float]:
+        if self._llm is None:
+            import llm_wrapper
+            self._llm = llm_wrapper.LLMWrapper()
+        scores = self._llm.llm_rerank_scores(query, [document[:LLM_DOCUMENT_CHARS] for document in documents])
+        if len(scores) != len(documents):
+            raise ValueError(f"LLM returned {len(scores)} scores for {len(documents)} chunks")
+        return [float(s) for s in scores]
+
+
+_SCORERS: Dict[str, object] = {}
+
+
+def get_scorer(name: Optional[str] = None, llm=None):
+    """
+    The scorer "cross-encoder" (RERANK_MODEL_PATH) or "llm". Default: RERANKER, else the
+    cross-encoder if a model path is set and the LLM otherwise. Created once per process.
+    """
+    import utils
+
+    utils.load_dotenv()
+    model_path = os.getenv("RERANK_MODEL_PATH")
+    name = name or os.getenv("RERANKER") or ("cross-encoder" if model_path else "llm")
+    if name == "llm":
+        return LLMScorer(llm) if llm is not None else _SCORERS.setdefault("llm", LLMScorer())
+    if name == "cross-encoder":
+        if not model_path:
+            raise ValueError("RERANK_MODEL_PATH must be set for the cross-encoder reranker")
+        return _SCORERS.setdefault(f"cross-encoder:{model_path}", CrossEncoderScorer(model_path))
+    raise ValueError(f"Unknown reranker: {name}")
+
+
+def rerank_results(
+    query: str,
+    result: dict,
+    n_results: int = RERANK_TOP,
+    scorer=None,
+    budget_s: float = DEFAULT_BUDGET_S,
+    top_n: int = RERANK_CANDIDATES,
+    cache: Optional[ScoreCache] = None,
+    fallback_n: Optional[int] = None,
+) -> dict:
+    """
+    Reorders the top_n hits of a query result by scorer and keeps n_results of them.
+    The returned dict has the shape of the input plus a "reranked" flag (False: first-stage
+    order, scoring failed or ran over budget_s) and "rerank_scores" when reranked.
+    Unreranked, fallback_n hits are kept (default n_results): a caller that keeps fewer hits
+    because they are reranked gets its usual number of first-stage hits instead.
+    """
+    from RAG import _select_hits
+
+    started = time.perf_counter()
+    ids = result.get("ids", [[]])[0][:top_n]
+    documents = (result.get("documents") or [[]])[0]
+    scorer = scorer or get_scorer()
+    cache = cache if cache is not None else load_cache()
+    qhash = query_hash(query)
+
+    scores = cache.get_many(scorer.name, qhash, ids)
+    missing = [i for i, chunk_id in enumerate(ids) if chunk_id not in scores]
+    reranked = True
+    if missing:
+        def score_missing() -> Dict[str, float]:
+            values = scorer.score(query, [(documents[i] if i < len(documents) else None) or "" for i in missing])
+            fresh = {ids[i]: float(value) for i, value in zip(missing, values)}
+            # cached even when it arrives late, a repeated question gets it for free
+            cache.put_many(scorer.name, qhash, fresh)
+            return fresh
+
+        ex = ThreadPoolExecutor(max_workers=1)
+        try:
+            future = ex.submit(score_missing)
+            remaining = budget_s - (time.perf_counter() - started)
+            try:
+                scores.update(future.result(timeout=max(remaining, 0.0)))
+            except FutureTimeoutError:
+                reranked = False
+            except Exception as exc:
+                # reranking is best effort, the first-stage order is still a valid answer
+                print(f"Rerank failed: {exc}")
+                reranked = False
+        finally:
+            # never wait for a late scorer
+            ex.shutdown(wait=False, cancel_futures=True)
+
+    if not reranked:
+        keep = n_results if fallback_n is None else fallback_n
+        out = _select_hits(result, range(min(keep, len((result.get("ids") or [[]])[0]))))
+        out["reranked"] = False
+        return out
+
+    cache.save()
+    order = sorted(range(len(ids)), key=lambda i: (-scores[ids[i]], i))[:n_results]
+    out = _select_hits(result, order)
+    out["rerank_scores"] = [[scores[ids[i]] for i in order]]
+    out["reranked"] = True
+    return out
@@ -0,0 +1,248 @@
+"""
+Sharded ingestion: N workers chunk, describe and embed disjoint parts of the file list,
+a merge step combines their outputs into one chunk dump (and optionally a snapshot or collection).
+
+- A file belongs to shard sha1(path) % n_shards, so the partition does not depend on the
+  order of the file list, the machine or the worker count used for a previous run
+- Every shard writes shard-IIII-of-NNNN.jsonl (journaled, a rerun resumes) and a manifest
+  with its files, chunk count, sha256, the embedder signature and the token counter
+- merge_shards checks that all shards are complete, unmodified, chunked and embedded with the same
+  settings, drops duplicate chunk IDs and writes the chunks sorted by ID, so the result does
+  not depend on how many workers ran or in which order they finished
+
+Shards can run as separate processes on one machine (run_local) or as separate jobs:
+    python src/cli.py ingest --shard 0/4 --out-dir shards/
+    ...
+    python src/cli.py merge shards/ -n 4 --output src/data/chunks_all_v1.jsonl
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def shard_of(path: str, n_shards: int) -> int:
+    """
+    Stable shard index of a file, the path is normalized to forward slashes first.
+    """
+    digest = hashlib.sha1(path.replace("\\", "/").encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % n_shards
+
+
+def shard_files(files: Sequence[str], shard_index: int, n_shards: int) -> List[str]:
+    if not 0 <= shard_index < n_shards:
+        raise ValueError(f"Shard index {shard_index} is not in [0, {n_shards})")
+    return sorted(f for f in files if shard_of(f, n_shards) == shard_index)
+
+
+def shard_path(out_dir: str, shard_index: int, n_shards: int) -> str:
+    return os.path.join(out_dir, f"shard-{shard_index:04d}-of-{n_shards:04d}.jsonl")
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _count_lines(path: str) -> int:
+    with open(path, "rb") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def ingest_shard(
+    files: Sequence[str],
+    shard_index: int,
+    n_shards: int,
+    out_dir: str,
+    use_batch: bool = False,
+    class_skeleton: bool = False,
+    max_tokens: Optional[int] = None,
+    use_llm: bool = True,
+) -> Optional[Dict[str, object]]:
+    """
+    Ingests this shard's part of files and writes its manifest.
+    Returns the manifest, None if chunks failed (rerun to resume).
+    """
+    import import_data
+    from utils import embedding_signature, token_counter_name
+
+    os.makedirs(out_dir, exist_ok=True)
+    own = shard_files(files, shard_index, n_shards)
+    output_path = shard_path(out_dir, shard_index, n_shards)
+    done = import_data.ingest_files(
+        own,
+        output_path,
+        use_batch=use_batch,
+        class_skeleton=class_skeleton,
+        max_tokens=import_data.MAX_CHUNK_TOKENS if max_tokens is None else max_tokens,
+        use_llm=use_llm,
+        # batch jobs of different shards must not share their state files
+        batch_dir=os.path.join(out_dir, f"batch-{shard_index:04d}"),
+    )
+    if not done:
+        return None
+
+    manifest = {
+        "shard": shard_index,
+        "n_shards": n_shards,
+        "files": own,
+        "count": _count_lines(output_path),
+        "sha256": _sha256(output_path),
+        "embedding_model": embedding_signature(),
+        "tokenizer": token_counter_name(),
+    }
+    with open(output_path + MANIFEST_SUFFIX, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _load_manifests(out_dir: str, n_shards: int, verify: bool) -> List[Dict[str, object]]:
+    manifests = []
+    missing = []
+    for shard_index in range(n_shards):
+        path = shard_path(out_dir, shard_index, n_shards)
+        if not os.path.exists(path + MANIFEST_SUFFIX):
+            missing.append(shard_index)
+            continue
+        with open(path + MANIFEST_SUFFIX, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if verify and _sha256(path) != manifest["sha256"]:
+            raise ValueError(f"Shard {shard_index} does not match its manifest hash")
+        manifests.append(manifest)
+    if missing:
+        raise ValueError(f"Shards not finished: {missing}")
+
+    models = {m["embedding_model"] for m in manifests}
+    if len(models) > 1:
+        raise ValueError(f"Shards were embedded with different models: {sorted(models)}")
+    tokenizers = {str(m.get("tokenizer")) for m in manifests}
+    if len(tokenizers) > 1:
+        raise ValueError(f"Shards were chunked with different token counters: {sorted(tokenizers)}")
+    seen: Dict[str, int] = {}
+    for m in manifests:
+        for file in m["files"]:
+            if file in seen:
+                raise ValueError(f"{file} was ingested by shard {seen[file]} and shard {m['shard']}")
+            seen[file] = m["shard"]
+    return manifests
+
+
+def merge_shards(
+    out_dir: str,
+    n_shards: int,
+    output_path: str,
+    snapshot_path: Optional[str] = None,
+    collection_name: Optional[str] = None,
+    verify: bool = True,
+) -> Dict[str, object]:
+    """
+    Combines the shard outputs into output_path, one line per chunk ID, sorted by ID.
+    With snapshot_path the merged dump is also written as a snapshot, with collection_name
+    that snapshot is bulk-loaded into a new Chroma collection.
+    """
+    from jsonl_stream import parse_line
+
+    manifests = _load_manifests(out_dir, n_shards, verify)
+    # only ids and byte offsets are kept in memory, the lines are copied in a second pass
+    offsets: Dict[str, tuple] = {}
+    duplicates = 0
+    for manifest in manifests:
+        shard_index = manifest["shard"]
+        offset = 0
+        lines = 0
+        with open(shard_path(out_dir, shard_index, n_shards), "rb") as f:
+            for line in f:
+                if line.strip():
+                    lines += 1
+                    chunk_id = parse_line(line, ("id",))["id"]
+                    if chunk_id in offsets:
+                        duplicates += 1
+                    else:
+                        offsets[chunk_id] = (shard_index, offset)
+                offset += len(line)
+        if lines != manifest["count"]:
+            raise ValueError(f"Shard {shard_index} has {lines} chunks, its manifest says {manifest['count']}")
+
+    handles = {}
+    tmp = output_path + ".tmp"
+    try:
+        with open(tmp, "wb") as out:
+            for chunk_id in sorted(offsets):
+                shard_index, offset = offsets[chunk_id]
+                if shard_index not in handles:
+                    handles[shard_index] = open(shard_path(out_dir, shard_index, n_shards), "rb")
+                f = handles[shard_index]
+                f.seek(offset)
+                line = f.readline()
+                out.write(line if line.endswith(b"\n") else line + b"\n")
+            out.flush()
+            os.fsync(out.fileno())
+    finally:
+        for f in handles.values():
+            f.close()
+    os.replace(tmp, output_path)
+
+    from symbol_index import SymbolIndex, symbol_index_path
+
+    symbol_paths = [symbol_index_path(shard_path(out_dir, i, n_shards)) for i in range(n_shards)]
+    if all(os.path.exists(path) for path in symbol_paths):
+        SymbolIndex.merge(SymbolIndex.load(path) for path in symbol_paths).save(symbol_index_path(output_path))
+    from facets import FacetStore, facet_store_path
+
+    facet_paths = [facet_store_path(shard_path(out_dir, i, n_shards)) for i in range(n_shards)]
+    if all(os.path.exists(path) for path in facet_paths):
+        FacetStore.merge(FacetStore.load(path) for path in facet_paths).save(facet_store_path(output_path))
+
+    embedding_model = manifests[0]["embedding_model"] if manifests else None
+    if embedding_model:
+        from embeddings import save_dump_signature
+        save_dump_signature(output_path, embedding_model)
+    report = {
+        "shards": n_shards,
+        "files": sum(len(m["files"]) for m in manifests),
+        "chunks": len(offsets),
+        "duplicates": duplicates,
+        "embedding_model": embedding_model,
+        "sha256": _sha256(output_path),
+    }
+    if snapshot_path or collection_name:
+        import snapshot
+
+        snapshot_path = snapshot_path or output_path + ".snapshot"
+        snapshot.export_jsonl(output_path, snapshot_path, embedding_model=embedding_model)
+        report["snapshot"] = snapshot_path
+        if collection_name:
+            snapshot.import_to_chroma(snapshot_path, collection_name)
+            report["collection"] = collection_name
+    return report
+
+
+def _run_shard(args: tuple) -> Optional[Dict[str, object]]:
+    files, shard_index, n_shards, out_dir, kwargs = args
+    return ingest_shard(files, shard_index, n_shards, out_dir, **kwargs)
+
+
+def run_local(
+    files: Sequence[str],
+    n_shards: int,
+    out_dir: str,
+    workers: Optional[int] = None,
+    **kwargs,
+) -> List[Optional[Dict[str, object]]]:
+    """
+    Runs every shard in its own process on this machine, kwargs go to ingest_shard.
+    Returns the shard manifests in shard order (None for shards that did not finish).
+    """
+    jobs = [(list(files), i, n_shards, out_dir, kwargs) for i in range(n_shards)]
+    with ProcessPoolExecutor(max_workers=workers or n_shards) as ex:
+        return list(ex.map(_run_shard, jobs))
@@ -0,0 +1,297 @@
+"""
+Portable, versioned index snapshots for warm starts without re-embedding.
+
+Layout of a snapshot directory:
+- manifest.json: format version, embedding model (backend signature), dim, count, distance space,
+  collection metadata, sha256 per file and a content hash over all of them
+- embeddings.npy: float32 (count, dim), memory-mapped on load
+- columns.npz: ids, documents and one column per metadata key; strings are stored as
+  utf-8 bytes + int64 offsets, ints/floats/bools as numeric arrays, missing values in a mask
+
+Import bulk-loads into Chroma (embeddings are passed through, the embedder is never called)
+or builds a QuantizedIndex.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+SNAPSHOT_VERSION = 1
+_FILES = ("embeddings.npy", "columns.npz")
+
+
+def _encode_strings(values: Sequence[str]) -> Dict[str, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return {"data": np.frombuffer(b"".join(encoded), dtype=np.uint8), "offsets": offsets}
+
+
+def _decode_strings(data: np.ndarray, offsets: np.ndarray) -> List[str]:
+    raw = data.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+def _column_kind(values: Iterable[object]) -> str:
+    present = [v for v in values if v is not None]
+    if present and all(type(v) is bool for v in present):
+        return "bool"
+    if present and all(type(v) is int for v in present):
+        return "int"
+    if present and all(type(v) in (int, float) for v in present):
+        return "float"
+    return "str"
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _content_hash(file_hashes: Dict[str, str]) -> str:
+    digest = hashlib.sha256()
+    for name in sorted(file_hashes):
+        digest.update(f"{name}:{file_hashes[name]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def write_snapshot(
+    path: str,
+    ids: Sequence[str],
+    documents: Sequence[str],
+    metadatas: Sequence[Dict[str, object]],
+    embeddings,
+    embedding_model: str,
+    space: str = "l2",
+    collection_metadata: Optional[Dict[str, object]] = None,
+    source: str = "",
+) -> Dict[str, object]:
+    """
+    Writes a snapshot directory and returns its manifest.
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if matrix.ndim != 2 or matrix.shape[0] != len(ids) or len(documents) != len(ids) or len(metadatas) != len(ids):
+        raise ValueError("ids, documents, metadatas and embeddings must have one row per chunk")
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "embeddings.npy"), matrix)
+
+    arrays: Dict[str, np.ndarray] = {}
+    for name, column in (("ids", ids), ("documents", documents)):
+        for part, array in _encode_strings([str(v) for v in column]).items():
+            arrays[f"{name}.{part}"] = array
+    columns: Dict[str, str] = {}
+    keys = sorted({key for meta in metadatas for key in (meta or {})})
+    for key in keys:
+        values = [(meta or {}).get(key) for meta in metadatas]
+        kind = _column_kind(values)
+        columns[key] = kind
+        mask = np.array([v is not None for v in values], dtype=bool)
+        if not mask.all():
+            arrays[f"meta.{key}.mask"] = mask
+        if kind == "str":
+            for part, array in _encode_strings(["" if v is None else str(v) for v in values]).items():
+                arrays[f"meta.{key}.{part}"] = array
+        else:
+            dtype = {"bool": bool, "int": np.int64, "float": np.float64}[kind]
+            arrays[f"meta.{key}.values"] = np.array([0 if v is None else v for v in values], dtype=dtype)
+    np.savez(os.path.join(path, "columns.npz"), **arrays)
+
+    file_hashes = {name: _sha256(os.path.join(path, name)) for name in _FILES}
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": int(time.time()),
+        "source": source,
+        "embedding_model": embedding_model,
+        "dim": int(matrix.shape[1]) if matrix.size else 0,
+        "count": int(matrix.shape[0]),
+        "space": space,
+        "collection_metadata": collection_metadata or {},
+        "columns": columns,
+        "files": file_hashes,
+        "content_hash": _content_hash(file_hashes),
+    }
+    with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class Snapshot:
+    def __init__(self, path: str, manifest: Dict[str, object], embeddings: np.ndarray, columns):
+        self.path = path
+        self.manifest = manifest
+        self.embeddings = embeddings
+        self._columns = columns
+        self._ids: Optional[List[str]] = None
+
+    @classmethod
+    def load(cls, path: str, verify: bool = True) -> "Snapshot":
+        """
+        Opens a snapshot, embeddings stay memory-mapped. verify re-checks the file hashes.
+        """
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {manifest.get('version')}")
+        if verify:
+            for name, expected in manifest["files"].items():
+                if _sha256(os.path.join(path, name)) != expected:
+                    raise ValueError(f"Snapshot file {name} does not match its manifest hash")
+        embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        columns = np.load(os.path.join(path, "columns.npz"))
+        return cls(path, manifest, embeddings, columns)
+
+    def __len__(self) -> int:
+        return int(self.manifest["count"])
+
+    @property
+    def embedding_model(self) -> str:
+        return str(self.manifest["embedding_model"])
+
+    @property
+    def content_hash(self) -> str:
+        return str(self.manifest["content_hash"])
+
+    def _strings(self, name: str) -> List[str]:
+        return _decode_strings(self._columns[f"{name}.data"], self._columns[f"{name}.offsets"])
+
+    @property
+    def ids(self) -> List[str]:
+        if self._ids is None:
+            self._ids = self._strings("ids")
+        return self._ids
+
+    def documents(self) -> List[str]:
+        return self._strings("documents")
+
+    def metadatas(self) -> List[Dict[str, object]]:
+        rows: List[Dict[str, object]] = [{} for _ in range(len(self))]
+        for key, kind in self.manifest["columns"].items():
+            if kind == "str":
+                values = self._strings(f"meta.{key}")
+            else:
+                values = self._columns[f"meta.{key}.values"].tolist()
+            mask_name = f"meta.{key}.mask"
+            mask = self._columns[mask_name] if mask_name in self._columns.files else None
+            for i, value in enumerate(values):
+                if mask is None or mask[i]:
+                    rows[i][key] = value
+        return rows
+
+    def to_chunks(self):
+        import chunk_data.rag_chunk as rc
+
+        return [
+            rc.ragchunk_from_json_item({"document": doc, "metadata": meta})
+            for doc, meta in zip(self.documents(), self.metadatas())
+        ]
+
+
+def export_collection(collection_name: str, path: str, client=None, batch_size: int = 1000) -> Dict[str, object]:
+    """
+    Reads a Chroma collection page by page and writes it as a snapshot.
+    """
+    import RAG
+    from embeddings import LEGACY_SIGNATURE, METADATA_KEY
+
+    client = client or RAG._get_client()
+    collection = client.get_collection(name=collection_name)
+    ids: List[str] = []
+    documents: List[str] = []
+    metadatas: List[Dict[str, object]] = []
+    blocks: List[np.ndarray] = []
+    for offset in range(0, collection.count(), batch_size):
+        page = collection.get(limit=batch_size, offset=offset, include=["embeddings", "documents", "metadatas"])
+        ids.extend(page["ids"])
+        documents.extend(doc or "" for doc in page["documents"])
+        metadatas.extend(meta or {} for meta in page["metadatas"])
+        blocks.append(np.asarray(page["embeddings"], dtype=np.float32))
+    collection_metadata = dict(collection.metadata or {})
+    return write_snapshot(
+        path,
+        ids,
+        documents,
+        metadatas,
+        np.concatenate(blocks) if blocks else np.zeros((0, 0), dtype=np.float32),
+        embedding_model=collection_metadata.get(METADATA_KEY, LEGACY_SIGNATURE),
+        space=RAG._collection_space(collection),
+        collection_metadata=collection_metadata,
+        source=f"chroma:{collection_name}",
+    )
+
+
+def export_jsonl(jsonl_path: str, path: str, embedding_model: Optional[str] = None) -> Dict[str, object]:
+    """
+    Snapshot of a chunk dump (RAGChunk.to_json_item lines), e.g. chunks_all_v1.jsonl.
+    The embedding signature is the one recorded next to the dump; embedding_model is only
+    needed for dumps without it and must match it otherwise.
+    """
+    from embeddings import collection_metadata, load_dump_signature
+    from jsonl_stream import iter_jsonl_items
+
+    stored = load_dump_signature(jsonl_path)
+    if stored and embedding_model and stored != embedding_model:
+        raise ValueError(f"'{jsonl_path}' was embedded with '{stored}', not '{embedding_model}'.")
+    signature = stored or embedding_model
+    if not signature:
+        # guessing would label foreign vectors and mix them into mismatched collections
+        raise ValueError(
+            f"No embedding signature is recorded for '{jsonl_path}', pass embedding_model "
+            f"(e.g. 'ollama:mxbai-embed-large' for dumps written before it was recorded)."
+        )
+
+    ids, documents, metadatas, embeddings = [], [], [], []
+    for item in iter_jsonl_items(jsonl_path):
+        ids.append(item["id"])
+        documents.append(item.get("document", ""))
+        metadatas.append(item.get("metadata", {}) or {})
+        embeddings.append(item["embedding"])
+    return write_snapshot(
+        path, ids, documents, metadatas, embeddings,
+        embedding_model=signature,
+        collection_metadata=collection_metadata(signature),
+        source=f"jsonl:{os.path.basename(jsonl_path)}",
+    )
+
+
+def import_to_chroma(path: str, collection_name: str, client=None, verify: bool = True):
+    """
+    Bulk-loads a snapshot into a new Chroma collection with the stored embeddings.
+    """
+    import RAG
+
+    snapshot = Snapshot.load(path, verify=verify)
+    client = client or RAG._get_client()
+    metadata = dict(snapshot.manifest["collection_metadata"])
+    collection = client.create_collection(
+        name=collection_name,
+        metadata=metadata or None,
+        configuration={"hnsw": {"space": snapshot.manifest["space"]}},
+    )
+    ids, documents, metadatas = snapshot.ids, snapshot.documents(), snapshot.metadatas()
+    batch_size = client.get_max_batch_size()
+    for start in range(0, len(ids), batch_size):
+        end = start + batch_size
+        collection.add(
+            ids=ids[start:end],
+            embeddings=np.asarray(snapshot.embeddings[start:end]),
+            documents=documents[start:end],
+            metadatas=metadatas[start:end],
+        )
+    return collection
+
+
+def import_to_quantized_index(path: str, index_path: str, mode: str = "int8", verify: bool = True):
+    from quantized_index import QuantizedIndex
+
+    snapshot = Snapshot.load(path, verify=verify)
+    return QuantizedIndex.build(snapshot.ids, snapshot.embeddings, index_path, mode=mode, embedding_model=snapshot.embedding_model)
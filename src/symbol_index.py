@@ -0,0 +1,306 @@
+"""
+Symbol index for "where is X" questions, answered without embedding, vector search or LLM.
+
+Built from the chunks right after chunking (ingest writes it next to the chunk dump):
+- definitions: symbol_name / symbol_type / file / line span of every symbol chunk
+- imports: import statements of the Python and Java sources
+- references: lines of the indexed sources that mention a defined name (word match)
+
+lookup() tries exact (qualified or short name, then case-insensitive), prefix and fuzzy
+matches in that order. answer_location() detects location questions and answers them
+with file:line citations, or returns None so the caller falls back to RAG + LLM.
+"""
+
+from __future__ import annotations
+
+import bisect
+import difflib
+import json
+import os
+import re
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from chunk_data.text_span import TextSpan
+
+
+DEFAULT_SYMBOL_INDEX_PATH = "src/data/chunks_all_v1.symbols.json"
+# chunks that are not a symbol definition of their own
+_SKIP_SYMBOL_TYPES = {"file_fallback"}
+_MIN_REFERENCE_NAME = 4
+_MAX_REFERENCES = 20
+_FUZZY_CUTOFF = 0.8
+
+_WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_PY_IMPORT_RE = re.compile(r"^\s*(?:from\s+([\w.]+)\s+)?import\s+([\w., ]+?)(?:\s+as\s+\w+)?\s*$")
+_JAVA_IMPORT_RE = re.compile(r"^\s*import\s+(?:static\s+)?([\w.]+(?:\.\*)?)\s*;")
+# only location phrasing counts, "defined"/"definition" alone also occur in explanation questions
+# ("how is `score` defined?", "what does the definition of X do?")
+_LOCATION_RE = re.compile(
+    r"\b(where\s+(?:is|are|was|were|do|does|can|did)|where's|in\s+which\s+(?:file|module|class|package)|"
+    r"which\s+file|(?:find|show|go\s+to|jump\s+to)\s+(?:me\s+)?the\s+(?:definition|declaration|location)\s+of|"
+    r"location\s+of|wo\s+(?:ist|sind|wird|finde))\b",
+    re.IGNORECASE,
+)
+# code generation requests go to the LLM even if they mention a location
+_GENERATE_RE = re.compile(r"\b(write|generate|create|implement|schreib\w*|erstell\w*|generier\w*)\b", re.IGNORECASE)
+# a second clause ("... and how does it work?") needs an explanation, the LLM answers it
+_CLAUSE_RE = re.compile(
+    r"\b(?:and|or|but|also|then|und|oder)\s+(?:how|what|why|when|which|can|could|should|does|do|explain|wie|was|warum)\b",
+    re.IGNORECASE,
+)
+_SENTENCE_END_RE = re.compile(r"[.?!]\s+\S")
+# `quoted`, dotted (HateChecker.classify), snake_case (load_model) or CamelCase with at least
+# two humps (HateChecker, DUUIPipeline, getUrl); plain and all-caps words (DUUI) are not identifiers
+_IDENTIFIER_RE = re.compile(
+    r"`([^`]+)`|\b([A-Za-z_]\w*(?:\.[A-Za-z_]\w*)+|[A-Za-z][A-Za-z0-9]*(?:_[A-Za-z0-9]+)+|"
+    r"[A-Za-z]\w*?(?:[a-z0-9][A-Z]|[A-Z][A-Z][a-z])\w*)\b"
+)
+
+
+@dataclass
+class SymbolEntry:
+    name: str
+    kind: str
+    symbol_type: str
+    file: str
+    start_line: int
+    end_line: int
+    language: str = ""
+    chunk_id: str = ""
+
+    @property
+    def short_name(self) -> str:
+        return self.name.rsplit(".", 1)[-1]
+
+    def citation(self) -> str:
+        if self.start_line == self.end_line:
+            return f"{self.file}:{self.start_line}"
+        return f"{self.file}:{self.start_line}-{self.end_line}"
+
+
+def _imports(language: str, lines: List[str]) -> Iterable[Tuple[str, int]]:
+    for number, line in enumerate(lines, start=1):
+        if language == "java":
+            match = _JAVA_IMPORT_RE.match(line)
+            if match:
+                yield match.group(1), number
+        elif language == "python":
+            match = _PY_IMPORT_RE.match(line)
+            if match:
+                module, names = match.groups()
+                for name in names.split(","):
+                    name = name.strip().split(" as ")[0].strip()
+                    if name:
+                        yield f"{module}.{name}" if module else name, number
+
+
+class SymbolIndex:
+    def __init__(self, entries: List[SymbolEntry]):
+        self.entries = entries
+        self._by_name: Dict[str, List[int]] = {}
+        for i, entry in enumerate(entries):
+            for key in {entry.name, entry.short_name}:
+                self._by_name.setdefault(key, []).append(i)
+        self._by_lower: Dict[str, List[str]] = {}
+        for name in self._by_name:
+            self._by_lower.setdefault(name.lower(), []).append(name)
+        self._sorted = sorted(self._by_lower)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def from_chunks(cls, chunks, references: bool = True) -> "SymbolIndex":
+        """
+        Definitions of every chunk, imports and references from the source files of the chunks.
+        Sources are the shared SourceBuffer of span chunks or the text of whole-file chunks.
+        """
+        entries: List[SymbolEntry] = []
+        by_id: Dict[str, SymbolEntry] = {}
+        parts = []
+        sources: Dict[str, Tuple[str, List[str]]] = {}
+        for chunk in chunks:
+            file = str(chunk.file).replace("\\", "/")
+            symbol_type = str(chunk.symbol_type)
+            if symbol_type.endswith("_part"):
+                parts.append(chunk)
+            elif symbol_type not in _SKIP_SYMBOL_TYPES:
+                entry = SymbolEntry(
+                    str(chunk.symbol_name), "definition", symbol_type, file,
+                    int(chunk.start_line), int(chunk.end_line), str(chunk.language), chunk.chunk_id(),
+                )
+                entries.append(entry)
+                by_id[entry.chunk_id] = entry
+            if file in sources:
+                continue
+            ref = chunk.text_ref
+            if isinstance(ref, TextSpan):
+                sources[file] = (str(chunk.language), ref.buffer.text.splitlines())
+            elif symbol_type in ("file", "file_fallback"):
+                sources[file] = (str(chunk.language), chunk.text.splitlines())
+
+        # a split symbol is cited with its full span, not only the span of its head chunk
+        for part in parts:
+            head = by_id.get(part.parent_id)
+            if head is not None:
+                head.end_line = max(head.end_line, int(part.end_line))
+
+        for file, (language, lines) in sources.items():
+            for name, number in _imports(language, lines):
+                entries.append(SymbolEntry(name, "import", "import", file, number, number, language))
+
+        if references:
+            entries.extend(cls._references(entries, sources))
+        return cls(entries)
+
+    @staticmethod
+    def _references(definitions: List[SymbolEntry], sources: Dict[str, Tuple[str, List[str]]]) -> List[SymbolEntry]:
+        # only names that are defined somewhere, a definition line is not a reference to itself
+        names = {e.short_name for e in definitions if e.kind == "definition" and len(e.short_name) >= _MIN_REFERENCE_NAME}
+        own = {(e.file, e.start_line) for e in definitions if e.kind == "definition"}
+        found: Dict[str, List[SymbolEntry]] = {}
+        for file, (language, lines) in sorted(sources.items()):
+            for number, line in enumerate(lines, start=1):
+                if (file, number) in own or line.lstrip().startswith(("import ", "from ")):
+                    continue
+                for name in names.intersection(_WORD_RE.findall(line)):
+                    refs = found.setdefault(name, [])
+                    if len(refs) < _MAX_REFERENCES:
+                        refs.append(SymbolEntry(name, "reference", "reference", file, number, number, language))
+        return [entry for name in sorted(found) for entry in found[name]]
+
+    def _entries_for(self, names: Iterable[str], kinds: Optional[Iterable[str]]) -> List[SymbolEntry]:
+        allowed = set(kinds) if kinds else None
+        seen = set()
+        result = []
+        for name in names:
+            for i in self._by_name.get(name, ()):
+                if i not in seen and (allowed is None or self.entries[i].kind in allowed):
+                    seen.add(i)
+                    result.append(self.entries[i])
+        return result
+
+    def exact(self, name: str, kinds: Optional[Iterable[str]] = None) -> List[SymbolEntry]:
+        found = self._entries_for([name], kinds)
+        if not found:
+            found = self._entries_for(self._by_lower.get(name.lower(), []), kinds)
+        return found
+
+    def prefix(self, prefix: str, kinds: Optional[Iterable[str]] = None, limit: int = 20) -> List[SymbolEntry]:
+        low = prefix.lower()
+        start = bisect.bisect_left(self._sorted, low)
+        names = []
+        for key in self._sorted[start:]:
+            if not key.startswith(low):
+                break
+            names.extend(self._by_lower[key])
+        return self._entries_for(names, kinds)[:limit]
+
+    def fuzzy(self, name: str, kinds: Optional[Iterable[str]] = None, limit: int = 5, cutoff: float = _FUZZY_CUTOFF) -> List[SymbolEntry]:
+        close = difflib.get_close_matches(name.lower(), self._sorted, n=limit, cutoff=cutoff)
+        return self._entries_for([n for key in close for n in self._by_lower[key]], kinds)
+
+    def lookup(self, name: str, kinds: Optional[Iterable[str]] = ("definition",)) -> Tuple[str, List[SymbolEntry]]:
+        """
+        Returns (match mode, entries) of the first mode that finds something: exact, prefix, fuzzy.
+        """
+        for mode, search in (("exact", self.exact), ("prefix", self.prefix), ("fuzzy", self.fuzzy)):
+            found = search(name, kinds)
+            if found:
+                return mode, found
+        return "none", []
+
+    def save(self, path: str) -> None:
+        columns = list(SymbolEntry.__dataclass_fields__)
+        data = {"columns": columns, "rows": [[getattr(e, c) for c in columns] for e in self.entries]}
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SymbolIndex":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        columns = data["columns"]
+        return cls([SymbolEntry(**dict(zip(columns, row))) for row in data["rows"]])
+
+    @classmethod
+    def merge(cls, indexes: Iterable["SymbolIndex"]) -> "SymbolIndex":
+        entries = {}
+        for index in indexes:
+            for entry in index.entries:
+                entries.setdefault(tuple(asdict(entry).values()), entry)
+        return cls([entries[key] for key in sorted(entries, key=lambda k: (k[3], k[4], k[1], k[0]))])
+
+
+def symbol_index_path(chunks_path: str) -> str:
+    """
+    The symbol index written next to a chunk dump, chunks_all_v1.jsonl -> chunks_all_v1.symbols.json.
+    """
+    return os.path.splitext(chunks_path)[0] + ".symbols.json"
+
+
+_LOADED: Dict[str, Tuple[float, SymbolIndex]] = {}
+
+
+def load_cached(path: Optional[str] = None) -> Optional[SymbolIndex]:
+    """
+    The index at path (SYMBOL_INDEX_PATH by default), loaded once per process. None if missing.
+    """
+    path = path or os.getenv("SYMBOL_INDEX_PATH", DEFAULT_SYMBOL_INDEX_PATH)
+    if not os.path.exists(path):
+        return None
+    mtime = os.path.getmtime(path)
+    cached = _LOADED.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, SymbolIndex.load(path))
+        _LOADED[path] = cached
+    return cached[1]
+
+
+def is_location_question(question: str) -> bool:
+    """
+    True for a question that only asks where something is, not for generation requests or
+    questions with a second clause or sentence.
+    """
+    if not _LOCATION_RE.search(question) or _GENERATE_RE.search(question) or _CLAUSE_RE.search(question):
+        return False
+    return not _SENTENCE_END_RE.search(question.strip())
+
+
+def candidate_names(question: str) -> List[str]:
+    """
+    Code-shaped identifiers of a question: `quoted`, dotted, snake_case, CamelCase.
+    """
+    cleaned: List[str] = []
+    for quoted, word in _IDENTIFIER_RE.findall(question):
+        name = (quoted or word).strip().rstrip(".?()")
+        if name and name not in cleaned:
+            cleaned.append(name)
+    return cleaned
+
+
+def answer_location(question: str, index: Optional[SymbolIndex] = None, max_hits: int = 5) -> Optional[str]:
+    """
+    Plain-text answer with file:line citations for a location question, None if the question
+    is not only about a location or none of its identifiers is an exact match in the index
+    (prefix and fuzzy matches go to the LLM, a near miss is not an answer).
+    """
+    index = index if index is not None else load_cached()
+    if index is None or not is_location_question(question):
+        return None
+    for name in candidate_names(question):
+        hits = index.exact(name, kinds=("definition",))
+        if not hits:
+            continue
+        hits = hits[:max_hits]
+        lines = [f"{name} is defined in:"]
+        for hit in hits:
+            lines.append(f"- {hit.symbol_type} {hit.name} at {hit.citation()}")
+        refs = index.exact(hits[0].short_name, kinds=("reference",))
+        if refs:
+            lines.append("Referenced at: " + ", ".join(ref.citation() for ref in refs[:max_hits]))
+        return "\n".join(lines)
+    return None
@@ -1,8 +1,15 @@
-import ollama
 import os
+import re
 import chunk_data.rag_chunk as rc
 import json
-from dotenv import load_dotenv
+
+
+def load_dotenv() -> None:
+    """
+    Loads the .env file, python-dotenv is imported on first use.
+    """
+    from dotenv import load_dotenv as _load_dotenv
+    _load_dotenv()
 
 
 def load_prompt_template(path: str) -> str:
@@ -17,11 +24,99 @@ def write_ragchunks_jsonl(chunks, path: str) -> None:
             item = chunk.to_json_item()
             f.write(json.dumps(item, ensure_ascii=True) + "\n")
 
+_PROJECTION = None
+_PROJECTION_LOADED = False
+
+
+def get_embedding_projection():
+    """
+    Returns the projection configured via EMBED_PROJECTION_PATH, None if no projection is used.
+    """
+    global _PROJECTION, _PROJECTION_LOADED
+    if not _PROJECTION_LOADED:
+        load_dotenv()
+        path = os.getenv("EMBED_PROJECTION_PATH")
+        if path:
+            from projection import EmbeddingProjection
+            _PROJECTION = EmbeddingProjection.load(path)
+        _PROJECTION_LOADED = True
+    return _PROJECTION
+
+
+def project_embeddings(embeddings: list[list[float]]) -> list[list[float]]:
+    projection = get_embedding_projection()
+    if projection is None or not embeddings:
+        return embeddings
+    return projection.apply(embeddings).tolist()
+
+
+def embedding_signature() -> str:
+    """
+    Backend, model and projection of the configured embedder, stored in the collection metadata.
+    """
+    from embeddings import get_embedder
+    signature = get_embedder().signature
+    projection = get_embedding_projection()
+    if projection is not None:
+        signature += f"+{projection.method}{projection.dim}"
+    return signature
+
+
 def embed_ollama(input: str):
-    return ollama.embed(
-                    model='mxbai-embed-large',
-                    input=input
-                    ).embeddings[0]
+    """
+    Embeds one text with the configured backend (EMBED_BACKEND, ollama by default).
+    """
+    return embed_ollama_batch([input])[0]
+
+
+def embed_ollama_batch(inputs: list[str]) -> list[list[float]]:
+    """
+    Embeds several texts with the batch API of the configured backend.
+    """
+    if not inputs:
+        return []
+    from embeddings import get_embedder
+    return project_embeddings(get_embedder().embed_batch(list(inputs)))
+
+
+# chunk sizes must not depend on what the machine has installed or can download, so the
+# counter is fixed: "regex" (default) or "tiktoken:<encoding>" via TOKEN_COUNTER
+DEFAULT_TOKEN_COUNTER = "regex"
+# rough GPT-style tokens: words, and every punctuation character on its own
+_REGEX_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_TOKEN_COUNTER = None
+
+
+def token_counter_name() -> str:
+    """
+    The configured token counter, recorded with shard manifests and version stores.
+    """
+    return _get_token_counter()[0]
+
+
+def _get_token_counter():
+    global _TOKEN_COUNTER
+    if _TOKEN_COUNTER is None:
+        load_dotenv()
+        name = os.getenv("TOKEN_COUNTER") or DEFAULT_TOKEN_COUNTER
+        if name == "regex":
+            _TOKEN_COUNTER = (name, lambda text: len(_REGEX_TOKEN_RE.findall(text)))
+        elif name.startswith("tiktoken:"):
+            import tiktoken
+
+            # raises if the encoding cannot be loaded, a silent fallback would change every chunk
+            encoder = tiktoken.get_encoding(name.split(":", 1)[1])
+            _TOKEN_COUNTER = (name, lambda text: len(encoder.encode(text, disallowed_special=())))
+        else:
+            raise ValueError(f"Unknown TOKEN_COUNTER: {name}")
+    return _TOKEN_COUNTER
+
+
+def count_tokens(text: str) -> int:
+    """
+    Token count with the configured counter (token_counter_name).
+    """
+    return _get_token_counter()[1](text)
 
 
 def filter_files(path: str, filters: set = None):
@@ -78,6 +173,8 @@ def get_rag_path(default: str = "chroma") -> str:
 
 
 def load_jsonl_ragChunk(path: str) -> list[rc.RAGChunk]:
-    with open(path) as f:
-        data = [json.loads(line) for line in f]
-        return rc.ragchunks_from_json_items(data)
+    """
+    Loads a whole dump as a list, use jsonl_stream.iter_ragchunks to stream large dumps.
+    """
+    from jsonl_stream import iter_ragchunks
+    return list(iter_ragchunks(path))
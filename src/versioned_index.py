@@ -0,0 +1,374 @@
+"""
+Multi-version indexing of git repositories with content-addressed chunks.
+
+A chunk is stored once under the hash of its repo-relative file, symbol and text, its
+description and embedding are shared by every version that contains it. A version only
+lists the hashes of its chunks (with their line numbers in that version).
+
+- Files are read from git objects (git ls-tree / git cat-file), no checkout is needed
+- A (path, blob) pair already seen in an earlier version is not read or chunked again
+- Of the chunks of changed files, only hashes not in the store are described and embedded,
+  so indexing ten releases costs one full ingest plus the diffs
+
+Store directory:
+- store.json: embedding signature, max_tokens and token counter the store was built with,
+  a store is never extended or synced with other settings
+- chunks.jsonl: one RAGChunk.to_json_item line per content hash (append-only)
+- files.json: "path@blob" -> [hash, start_line, end_line, parent hash] per chunk of that file
+- versions.json: "repo@version" -> commit and [hash, start_line, end_line, parent hash] per chunk
+
+In Chroma every chunk carries a boolean key per version that contains it, so a query
+targets one version with where=version_where("duui-Hate", "v1.2"). Line numbers and parent
+differ between versions of a shared chunk, they are stored per version ("lines:repo@version"
+= "11-12", "parent:repo@version") and apply_version puts them into a query result.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+VERSION_KEY_PREFIX = "v:"
+LINES_KEY_PREFIX = "lines:"
+PARENT_KEY_PREFIX = "parent:"
+
+
+def version_key(repo: str, version: str) -> str:
+    return f"{repo}@{version}"
+
+
+def version_where(repo: str, version: str) -> Dict[str, object]:
+    """
+    Chroma where filter for the chunks of one indexed version.
+    """
+    return {VERSION_KEY_PREFIX + version_key(repo, version): True}
+
+
+def version_metadata(meta: Dict[str, object], repo: str, version: str) -> Dict[str, object]:
+    """
+    Copy of a chunk's metadata with the line numbers and parent of the given version.
+    """
+    key = version_key(repo, version)
+    meta = dict(meta)
+    lines = meta.get(LINES_KEY_PREFIX + key)
+    if lines:
+        start, _, end = str(lines).partition("-")
+        meta["start_line"], meta["end_line"] = int(start), int(end)
+    if PARENT_KEY_PREFIX + key in meta:
+        meta["parent_id"] = meta[PARENT_KEY_PREFIX + key]
+    return meta
+
+
+def apply_version(result: Dict[str, object], repo: str, version: str) -> Dict[str, object]:
+    """
+    Query result of a version-filtered query with the line numbers and parents of that version.
+    """
+    metadatas = result.get("metadatas")
+    if metadatas:
+        result["metadatas"] = [[version_metadata(meta or {}, repo, version) for meta in row] for row in metadatas]
+    return result
+
+
+def content_hash(chunk) -> str:
+    """
+    Content address of a chunk: repo-relative file, symbol and text, but not the line numbers,
+    so a function that only moved keeps its hash.
+    """
+    base = f"{chunk.file}|{chunk.language}|{chunk.symbol_type}|{chunk.symbol_name}|{chunk.text}"
+    return "sha256:" + hashlib.sha256(base.encode("utf-8")).hexdigest()
+
+
+def _git(repo_path: str, *args: str) -> bytes:
+    return subprocess.run(["git", "-C", repo_path, *args], capture_output=True, check=True).stdout
+
+
+def list_blobs(repo_path: str, rev: str) -> List[Tuple[str, str]]:
+    """
+    (path, blob sha) of every file in rev.
+    """
+    entries = []
+    for entry in _git(repo_path, "ls-tree", "-r", "-z", "--full-tree", rev).split(b"\0"):
+        if not entry:
+            continue
+        info, path = entry.split(b"\t", 1)
+        _, kind, sha = info.split()
+        if kind == b"blob":
+            entries.append((path.decode("utf-8"), sha.decode("ascii")))
+    return entries
+
+
+class VersionStore:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.chunks_path = os.path.join(path, "chunks.jsonl")
+        self.files: Dict[str, List[list]] = self._read_json("files.json")
+        self.versions: Dict[str, Dict[str, object]] = self._read_json("versions.json")
+        self.settings: Dict[str, object] = self._read_json("store.json")
+        self._offsets: Dict[str, int] = {}
+        if os.path.exists(self.chunks_path):
+            self._index_chunks()
+
+    def _read_json(self, name: str) -> dict:
+        path = os.path.join(self.path, name)
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_json(self, name: str, data: dict) -> None:
+        path = os.path.join(self.path, name)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(path + ".tmp", path)
+
+    def _index_chunks(self) -> None:
+        from jsonl_stream import parse_line
+
+        offset = 0
+        with open(self.chunks_path, "rb") as f:
+            for line in f:
+                # a torn last line of a crashed run is ignored and overwritten
+                if not line.endswith(b"\n"):
+                    break
+                if line.strip():
+                    self._offsets[parse_line(line, ("id",))["id"]] = offset
+                offset += len(line)
+        with open(self.chunks_path, "r+b") as f:
+            f.truncate(offset)
+
+    def check_settings(self, embedding_model: str, max_tokens: Optional[int] = None, record: bool = False,
+                       tokenizer: Optional[str] = None) -> None:
+        """
+        Raises if the store was built with another embedding signature (or max_tokens / token
+        counter, if given): its embeddings and path@blob chunks would be reused with the wrong settings.
+        With record a new store takes the settings.
+        """
+        wanted = {"embedding_model": embedding_model}
+        if max_tokens is not None:
+            wanted["max_tokens"] = max_tokens
+        if tokenizer is not None:
+            wanted["tokenizer"] = tokenizer
+        if not self.settings:
+            if self.files or len(self):
+                raise ValueError(f"Version store '{self.path}' has no recorded settings, index into a new store directory.")
+            if record:
+                self.settings = dict(wanted)
+                self._write_json("store.json", self.settings)
+            return
+        for key, value in wanted.items():
+            if self.settings.get(key) != value:
+                raise ValueError(
+                    f"Version store '{self.path}' was built with {key}={self.settings.get(key)!r}, "
+                    f"the current setting is {value!r}; use a new store directory."
+                )
+
+    def __contains__(self, chunk_hash: str) -> bool:
+        return chunk_hash in self._offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def add_items(self, items: Iterable[Dict[str, object]]) -> None:
+        with open(self.chunks_path, "ab") as f:
+            offset = f.tell()
+            for item in items:
+                if item["id"] in self._offsets:
+                    continue
+                line = (json.dumps(item) + "\n").encode("utf-8")
+                f.write(line)
+                self._offsets[item["id"]] = offset
+                offset += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def get_item(self, chunk_hash: str) -> Dict[str, object]:
+        from jsonl_stream import parse_line
+
+        with open(self.chunks_path, "rb") as f:
+            f.seek(self._offsets[chunk_hash])
+            return parse_line(f.readline())
+
+    def chunk_versions(self) -> Dict[str, Dict[str, List[object]]]:
+        """
+        Content hash -> version key -> [start_line, end_line, parent hash] in that version.
+        Entries written before parents were recorded have None as parent.
+        """
+        result: Dict[str, Dict[str, List[object]]] = {}
+        for key in sorted(self.versions):
+            for entry in self.versions[key]["chunks"]:
+                parent = entry[3] if len(entry) > 3 else None
+                result.setdefault(entry[0], {})[key] = [entry[1], entry[2], parent]
+        return result
+
+    def save(self) -> None:
+        self._write_json("files.json", self.files)
+        self._write_json("versions.json", self.versions)
+
+
+def _chunk_blob(repo_path: str, work_dir: str, path: str, blob: str, repo: str, max_tokens: Optional[int]):
+    import import_data
+
+    local = os.path.join(work_dir, path)
+    os.makedirs(os.path.dirname(local), exist_ok=True)
+    with open(local, "wb") as f:
+        f.write(_git(repo_path, "cat-file", "blob", blob))
+    try:
+        chunks = import_data.chunk_file(local, deferred_llm=True, max_tokens=max_tokens)
+    finally:
+        os.remove(local)
+
+    # parent_id holds chunk ids of the local copy, they are remapped to content hashes
+    old_ids = {c.chunk_id(): c for c in chunks}
+    for chunk in chunks:
+        chunk.file = path
+        chunk.repo_id = f"repo::{repo}"
+    hashes = {old: content_hash(c) for old, c in old_ids.items()}
+    for chunk in chunks:
+        if chunk.parent_id:
+            chunk.parent_id = hashes.get(chunk.parent_id, "")
+    return chunks
+
+
+def _describe(chunks, use_llm: bool) -> int:
+    from chunk_data.static_description import apply_static_description, min_score_from_env
+    from import_data import describe_chunk
+
+    min_score = min_score_from_env()
+    llm_pending = [c for c in chunks if not apply_static_description(c, min_score)]
+    if not use_llm:
+        return 0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=6) as ex:
+        futures = [ex.submit(describe_chunk, c) for c in llm_pending]
+        for fut in as_completed(futures):
+            try:
+                rchunk, data = fut.result()
+                rchunk.append_llm_data(data)
+            except Exception as exc:
+                failed += 1
+                print(f"Chunk failed: {exc}")
+    return failed
+
+
+def index_version(
+    store: VersionStore,
+    repo_path: str,
+    rev: str,
+    repo: Optional[str] = None,
+    version: Optional[str] = None,
+    suffixes: Optional[Sequence[str]] = None,
+    max_tokens: Optional[int] = None,
+    use_llm: bool = True,
+) -> Optional[Dict[str, int]]:
+    """
+    Indexes one revision of a git repository into the store.
+    Returns counts of reused and new files/chunks, None if descriptions failed (rerun to resume).
+    """
+    import import_data
+    from utils import embedding_signature, token_counter_name
+
+    repo = repo or os.path.basename(os.path.abspath(repo_path))
+    version = version or rev
+    max_tokens = import_data.MAX_CHUNK_TOKENS if max_tokens is None else max_tokens
+    store.check_settings(embedding_signature(), max_tokens, record=True, tokenizer=token_counter_name())
+    commit = _git(repo_path, "rev-parse", f"{rev}^{{commit}}").decode("ascii").strip()
+    blobs = [(p, b) for p, b in list_blobs(repo_path, commit) if not suffixes or p.endswith(tuple(suffixes))]
+
+    stats = {"files": len(blobs), "files_reused": 0, "chunks": 0, "chunks_reused": 0, "chunks_new": 0}
+    file_chunks: Dict[str, List[Tuple[str, int, int, str]]] = {}
+    new_chunks = {}
+    work_dir = os.path.join(tempfile.gettempdir(), "ragbot-versions", hashlib.sha1(store.path.encode("utf-8")).hexdigest()[:12])
+    try:
+        for path, blob in blobs:
+            key = f"{path}@{blob}"
+            if key in store.files:
+                stats["files_reused"] += 1
+                continue
+            chunks = _chunk_blob(repo_path, work_dir, path, blob, repo, max_tokens)
+            entries = []
+            for chunk in chunks:
+                chunk_hash = content_hash(chunk)
+                entries.append((chunk_hash, int(chunk.start_line), int(chunk.end_line), chunk.parent_id or ""))
+                if chunk_hash not in store and chunk_hash not in new_chunks:
+                    new_chunks[chunk_hash] = chunk
+            file_chunks[key] = entries
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if _describe(list(new_chunks.values()), use_llm):
+        # described chunks are kept, the next run only retries the failed ones
+        store.add_items(_items(c, h) for h, c in new_chunks.items() if c.description != "N.A")
+        return None
+    store.add_items(_items(c, h) for h, c in new_chunks.items())
+
+    chunks: List[Tuple[object, ...]] = []
+    for path, blob in blobs:
+        key = f"{path}@{blob}"
+        if key in file_chunks:
+            store.files[key] = [list(entry) for entry in file_chunks[key]]
+        chunks.extend(tuple(entry) for entry in store.files[key])
+    stats["chunks"] = len(chunks)
+    stats["chunks_new"] = len(new_chunks)
+    stats["chunks_reused"] = len(chunks) - len(new_chunks)
+    store.versions[version_key(repo, version)] = {
+        "repo": repo,
+        "version": version,
+        "commit": commit,
+        "chunks": [list(entry) for entry in chunks],
+    }
+    store.save()
+    return stats
+
+
+def _items(chunk, chunk_hash: str) -> Dict[str, object]:
+    item = chunk.to_json_item()
+    item["id"] = chunk_hash
+    return item
+
+
+def sync_to_chroma(store: VersionStore, collection_name: str, client=None, batch_size: Optional[int] = None):
+    """
+    Upserts every stored chunk with its stored embedding, one boolean key per version and
+    its line numbers and parent in every version.
+    """
+    import RAG
+    from embeddings import check_collection_signature, collection_metadata
+    from utils import embedding_signature
+
+    client = client or RAG._get_client()
+    signature = embedding_signature()
+    # the stored vectors must be those of the configured embedder, queries are embedded with it
+    store.check_settings(signature)
+    collection = client.get_or_create_collection(name=collection_name, metadata=collection_metadata(signature))
+    check_collection_signature(collection, signature)
+
+    memberships = store.chunk_versions()
+    batch_size = batch_size or client.get_max_batch_size()
+    hashes = sorted(memberships)
+    for start in range(0, len(hashes), batch_size):
+        items = [store.get_item(h) for h in hashes[start:start + batch_size]]
+        for item in items:
+            meta = item["metadata"]
+            # start/end_line and parent_id are those of the version that first stored the chunk,
+            # version_metadata reads the ones of the queried version
+            meta["versions"] = ", ".join(memberships[item["id"]])
+            for key, (start, end, parent) in memberships[item["id"]].items():
+                meta[VERSION_KEY_PREFIX + key] = True
+                meta[LINES_KEY_PREFIX + key] = f"{start}-{end}"
+                if parent is not None:
+                    meta[PARENT_KEY_PREFIX + key] = parent
+        collection.upsert(
+            ids=[item["id"] for item in items],
+            embeddings=[item["embedding"] for item in items],
+            documents=[item["document"] for item in items],
+            metadatas=[item["metadata"] for item in items],
+        )
+    return collection
@@ -0,0 +1,167 @@
+import unittest
+import sys
+import time
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+import RAG
+
+
+class TestRAG(unittest.TestCase):
+
+    def test_merge_query_results_dedup_and_rank(self):
+        result_a = {
+            "ids": [["id::1", "id::2"]],
+            "documents": [["doc1", "doc2"]],
+            "metadatas": [[{"file": "a.py"}, {"file": "b.py"}]],
+            "distances": [[0.2, 0.8]],
+        }
+        result_b = {
+            "ids": [["id::2", "id::3"]],
+            "documents": [["doc2", "doc3"]],
+            "metadatas": [[{"file": "b.py"}, {"file": "c.py"}]],
+            "distances": [[0.05, 0.3]],
+        }
+        merged = RAG.merge_query_results([("java_v2", "l2", result_a), ("all_data_v1", "cosine", result_b)], n_results=5)
+
+        self.assertEqual(merged["ids"][0], ["id::2", "id::1", "id::3"])
+        self.assertEqual(merged["collections"][0][0], "all_data_v1")
+        self.assertEqual(len(merged["documents"][0]), 3)
+
+    def test_merge_query_results_skips_empty(self):
+        merged = RAG.merge_query_results([("empty", None, None)], n_results=3)
+        self.assertEqual(merged["ids"], [[]])
+
+    def test_fuse_rrf_prefers_ids_in_both_lists(self):
+        plain = {"ids": [["a", "b"]], "documents": [["A", "B"]], "metadatas": [[{}, {}]], "distances": [[0.1, 0.2]]}
+        hyde = {"ids": [["b", "c"]], "documents": [["B", "C"]], "metadatas": [[{}, {}]], "distances": [[0.05, 0.3]]}
+        fused = RAG.fuse_rrf([plain, hyde], n_results=3)
+
+        self.assertEqual(fused["ids"][0][0], "b")
+        self.assertEqual(fused["distances"][0][0], 0.05)
+        self.assertEqual(set(fused["ids"][0]), {"a", "b", "c"})
+
+    def test_query_results_hyde_falls_back_when_late(self):
+        class SlowLLM:
+            def llm_hypothetical_answer(self, input_user, coding_lg="python"):
+                time.sleep(0.5)
+                return "def foo(): pass"
+
+        collection = MagicMock()
+        collection.count.return_value = 2
+        collection.query.return_value = {"ids": [["a"]], "documents": [["A"]], "metadatas": [[{}]], "distances": [[0.1]]}
+        with patch("RAG._get_collection", return_value=collection), \
+             patch("RAG.embed_ollama", return_value=[1.0, 0.0]), \
+             patch("RAG.embed_ollama_batch") as mock_batch:
+            started = time.perf_counter()
+            out = RAG.query_results_hyde("where is foo", "all_data_v1", budget_s=0.05, llm=SlowLLM())
+            elapsed = time.perf_counter() - started
+
+        self.assertFalse(out["hyde_used"])
+        self.assertEqual(out["ids"], [["a"]])
+        self.assertLess(elapsed, 0.4)
+        mock_batch.assert_not_called()
+
+    def test_query_results_hyde_fuses_results(self):
+        class FastLLM:
+            def llm_hypothetical_answer(self, input_user, coding_lg="python"):
+                return "def foo(): pass"
+
+        collection = MagicMock()
+        collection.count.return_value = 2
+        collection.query.side_effect = [
+            {"ids": [["a"]], "documents": [["A"]], "metadatas": [[{}]], "distances": [[0.1]]},
+            {"ids": [["b"]], "documents": [["B"]], "metadatas": [[{}]], "distances": [[0.2]]},
+        ]
+        with patch("RAG._get_collection", return_value=collection), \
+             patch("RAG.embed_ollama", return_value=[1.0, 0.0]), \
+             patch("RAG.embed_ollama_batch", return_value=[[0.0, 1.0]]):
+            out = RAG.query_results_hyde("where is foo", "all_data_v1", budget_s=5.0, llm=FastLLM(), where={"repo_id": "r"})
+
+        self.assertTrue(out["hyde_used"])
+        self.assertEqual(set(out["ids"][0]), {"a", "b"})
+        # the facet/version filter applies to the plain and the hypothetical query
+        self.assertEqual([c.kwargs["where"] for c in collection.query.call_args_list], [{"repo_id": "r"}] * 2)
+
+
+    def test_collapse_overlaps_keeps_better_ranked_parent(self):
+        ids = ["class", "method", "other", "child"]
+        metadatas = [
+            {"file": "a.py", "start_line": 1, "end_line": 40},
+            {"file": "a.py", "start_line": 10, "end_line": 20},
+            {"file": "b.py", "start_line": 10, "end_line": 20},
+            {"file": "c.py", "start_line": 1, "end_line": 5, "parent_id": "other"},
+        ]
+        self.assertEqual(RAG.collapse_overlaps(ids, metadatas), [0, 2])
+
+    def test_mmr_select_skips_near_duplicates(self):
+        embeddings = [[1.0, 0.0], [0.99, 0.01], [0.6, 0.8]]
+        self.assertEqual(RAG.mmr_select([1.0, 0.0], embeddings, 2, mmr_lambda=0.3), [0, 2])
+        # pure relevance keeps the duplicate
+        self.assertEqual(RAG.mmr_select([1.0, 0.0], embeddings, 2, mmr_lambda=1.0), [0, 1])
+
+    def test_mmr_select_caps_chunks_per_file(self):
+        embeddings = [[1.0, 0.0], [0.9, 0.1], [0.8, 0.2], [0.0, 1.0]]
+        groups = ["a.py", "a.py", "a.py", "b.py"]
+        chosen = RAG.mmr_select([1.0, 0.0], embeddings, 4, mmr_lambda=1.0, groups=groups, max_per_group=2)
+        # the third a.py chunk only comes after b.py is used up
+        self.assertEqual(chosen, [0, 1, 3, 2])
+
+    def test_query_results_diversify(self):
+        import chromadb
+
+        client = chromadb.EphemeralClient()
+        collection = client.get_or_create_collection("test_diversify")
+        collection.add(
+            ids=["class", "method_a", "method_b", "helper"],
+            embeddings=[[1.0, 0.0, 0.0], [0.98, 0.1, 0.0], [0.97, 0.0, 0.1], [0.5, 0.5, 0.5]],
+            documents=["class A", "def a", "def b", "def helper"],
+            metadatas=[
+                {"file": "a.py", "start_line": 1, "end_line": 30},
+                {"file": "a.py", "start_line": 3, "end_line": 10, "parent_id": "class"},
+                {"file": "a.py", "start_line": 12, "end_line": 20, "parent_id": "class"},
+                {"file": "b.py", "start_line": 1, "end_line": 5},
+            ],
+        )
+        with patch("RAG._get_collection", return_value=collection), \
+             patch("RAG.embed_ollama", return_value=[1.0, 0.05, 0.0]):
+            plain = RAG.query_results("class A", "test_diversify", n_results=2)
+            out = RAG.query_results("class A", "test_diversify", n_results=2, diversify=True)
+
+        self.assertEqual(plain["ids"][0], ["class", "method_a"])
+        self.assertEqual(out["ids"][0], ["class", "helper"])
+        self.assertEqual(out["documents"][0], ["class A", "def helper"])
+        self.assertNotIn("embeddings", out)
+
+    def test_query_results_hyde_diversify(self):
+        class FastLLM:
+            def llm_hypothetical_answer(self, input_user, coding_lg="python"):
+                return "class A: pass"
+
+        def hits(ids, embeddings):
+            return {"ids": [ids], "documents": [[i.upper() for i in ids]], "distances": [[0.1] * len(ids)],
+                    "metadatas": [[{"file": f"{i}.py", "start_line": 1, "end_line": 5} for i in ids]],
+                    "embeddings": [embeddings]}
+
+        collection = MagicMock()
+        collection.count.return_value = 3
+        collection.query.side_effect = [
+            hits(["a", "b"], [[1.0, 0.0], [0.99, 0.01]]),
+            hits(["b", "c"], [[0.99, 0.01], [0.0, 1.0]]),
+        ]
+        with patch("RAG._get_collection", return_value=collection), \
+             patch("RAG.embed_ollama", return_value=[1.0, 0.0]), \
+             patch("RAG.embed_ollama_batch", return_value=[[0.9, 0.1]]):
+            out = RAG.query_results_hyde("class A", "all_data_v1", n_results=2, budget_s=5.0, llm=FastLLM(),
+                                         diversify=True, mmr_lambda=0.3)
+
+        self.assertTrue(out["hyde_used"])
+        # both queries over-fetched, the near-duplicate b is dropped for c
+        self.assertEqual([c.kwargs["n_results"] for c in collection.query.call_args_list], [8, 8])
+        self.assertEqual(out["ids"], [["a", "c"]])
+        self.assertNotIn("embeddings", out)
+
+
+if __name__ == "__main__":
+    unittest.main()
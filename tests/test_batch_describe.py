@@ -0,0 +1,110 @@
+import unittest
+import sys
+import json
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+import chunk_data.rag_chunk as rc
+from batch_describe import BatchDescriber
+
+
+class FakeBatchClient:
+    """
+    Local stand-in for the OpenAI files/batches endpoints.
+    Answers every request, except the custom_ids in fail_ids.
+    """
+
+    def __init__(self, fail_ids=()):
+        self.fail_ids = set(fail_ids)
+        self.uploaded = {}
+        self.outputs = {}
+        self.submitted = []
+        self.files = SimpleNamespace(create=self._create_file, content=self._content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve)
+
+    def _create_file(self, file, purpose):
+        file_id = f"file-{len(self.uploaded)}"
+        self.uploaded[file_id] = file.read().decode("utf-8")
+        return SimpleNamespace(id=file_id)
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        batch_id = f"batch-{len(self.submitted)}"
+        lines = []
+        for line in self.uploaded[input_file_id].splitlines():
+            request = json.loads(line)
+            self.submitted.append(request["custom_id"])
+            if request["custom_id"] in self.fail_ids:
+                continue
+            text = json.dumps({"description": f"desc {request['custom_id']}", "keywords": ["a", "b", "c"]})
+            body = {"output": [{"type": "message", "content": [{"type": "output_text", "text": text}]}]}
+            lines.append(json.dumps({"custom_id": request["custom_id"], "response": {"status_code": 200, "body": body}, "error": None}))
+        self.outputs[f"out-{batch_id}"] = "\n".join(lines)
+        self.batch = SimpleNamespace(id=batch_id, status="completed", output_file_id=f"out-{batch_id}")
+        return SimpleNamespace(id=batch_id, status="validating")
+
+    def _retrieve(self, batch_id):
+        return self.batch
+
+    def _content(self, file_id):
+        return SimpleNamespace(text=self.outputs[file_id])
+
+
+def _chunk(name):
+    return rc.RAGChunk(
+        text=f"def {name}():\n    pass\n",
+        file="src/example.py",
+        language="python",
+        symbol_type="function",
+        symbol_name=name,
+        start_line=1,
+        end_line=2,
+        description="N.A",
+        keywords=["N.A"],
+        chunk_type="python",
+        repo_id="repo::test",
+    )
+
+
+class TestBatchDescribe(unittest.TestCase):
+
+    def test_run_merges_by_id_and_resumes(self):
+        chunks = [_chunk("foo"), _chunk("bar")]
+        failing = chunks[1].chunk_id()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            client = FakeBatchClient(fail_ids={failing})
+            describer = BatchDescriber(client=client, work_dir=tmpdir, model="test-model", poll_interval=0)
+
+            self.assertEqual(describer.run(chunks), 1)
+            self.assertEqual(chunks[0].description, f"desc {chunks[0].chunk_id()}")
+            self.assertEqual(chunks[1].description, "N.A")
+
+            # second run only resubmits the chunk without result
+            client.fail_ids.clear()
+            self.assertEqual(describer.run(chunks), 2)
+            self.assertEqual(client.submitted, [chunks[0].chunk_id(), failing, failing])
+            self.assertEqual(len(describer.load_results()), 2)
+
+            # nothing pending, nothing submitted
+            self.assertEqual(describer.run(chunks), 2)
+            self.assertEqual(len(client.submitted), 3)
+
+    def test_finished_batch_is_collected_after_crash(self):
+        chunks = [_chunk("foo"), _chunk("bar")]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            client = FakeBatchClient()
+            describer = BatchDescriber(client=client, work_dir=tmpdir, model="test-model", poll_interval=0)
+            describer.write_requests(chunks)
+            # crash after the final state was saved, before collect()
+            describer.poll(describer.submit())
+            self.assertEqual(describer.load_results(), {})
+
+            self.assertEqual(describer.run(chunks), 2)
+            self.assertEqual(len(client.submitted), 2)
+            with open(describer.state_path, encoding="utf-8") as f:
+                self.assertTrue(json.load(f)["collected"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+import chat_session
+import embeddings
+
+
+class FakeLLM:
+    def __init__(self, hits):
+        self.hits = hits
+        self.retrievals = []
+        self.embeddings = []
+        self.turns = []
+
+    def retrieve_context(self, question, collection_name, coding_lg="python", **options):
+        self.retrievals.append(question)
+        self.embeddings.append(options.get("query_embedding"))
+        ids = self.hits[question]
+        return {"ids": [ids], "documents": [[f"doc {i}" for i in ids]], "metadatas": [[{"file": i} for i in ids]]}
+
+    def llm_session_turn(self, prompt, previous_response_id=None):
+        self.turns.append((prompt, previous_response_id))
+        return f"answer {len(self.turns)}", f"resp_{len(self.turns)}"
+
+
+class TestChatSession(unittest.TestCase):
+
+    def setUp(self):
+        embeddings.set_embedder(embeddings.create_embedder("hashing", dim=256))
+        patcher = patch("symbol_index.answer_location", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(embeddings.set_embedder, None)
+
+    def test_follow_ups_reuse_extend_and_switch_topic(self):
+        first = "how do I write a DUUI tokenizer component in java"
+        same = "how do I write a DUUI tokenizer component in java with tests"
+        extend = "how do I write a DUUI tokenizer component for spacy"
+        other = "which docker image runs the GPU sentiment model"
+        llm = FakeLLM({first: ["a", "b"], extend: ["b", "c"], other: ["x"]})
+        session = chat_session.ChatSession("all_data_v1", llm=llm, reuse_threshold=0.85, extend_threshold=0.5)
+
+        with patch("llm_wrapper.utils.load_prompt_template", return_value="{{rag_context}}\n{{user_input}}"):
+            session.ask(first)
+            session.ask(same)
+            session.ask(extend)
+            session.ask(other)
+
+        self.assertEqual([t.mode for t in session.turns], ["new", "reuse", "extend", "new"])
+        # the reused turn did not retrieve, the extended one only sent the unseen chunk
+        self.assertEqual(llm.retrievals, [first, extend, other])
+        self.assertEqual(session.turns[2].new_chunk_ids, ["c"])
+        self.assertIn("[3] document:\ndoc c", llm.turns[2][0])
+        self.assertNotIn("doc b", llm.turns[2][0])
+        # every turn is chained, a new topic only resets the sent chunks
+        self.assertEqual([previous for _, previous in llm.turns], [None, "resp_1", "resp_2", "resp_3"])
+        # retrieval reuses the embedding of the topic check
+        self.assertTrue(all(embedding is not None for embedding in llm.embeddings))
+        self.assertLess(session.turns[1].prompt_tokens, session.turns[0].prompt_tokens)
+        self.assertEqual(session.chunk_ids, ["x"])
+
+    def test_extend_over_chunk_limit_starts_new_topic(self):
+        first = "how do I write a DUUI tokenizer component in java"
+        extend = "how do I write a DUUI tokenizer component for spacy"
+        llm = FakeLLM({first: ["a", "b"], extend: ["c", "d"]})
+        session = chat_session.ChatSession("all_data_v1", llm=llm, reuse_threshold=0.99, extend_threshold=0.5, max_context_chunks=3)
+
+        with patch("llm_wrapper.utils.load_prompt_template", return_value="{{rag_context}}\n{{user_input}}"):
+            session.ask(first)
+            session.ask(extend)
+
+        self.assertEqual([t.mode for t in session.turns], ["new", "new"])
+        self.assertEqual(session.chunk_ids, ["c", "d"])
+        self.assertEqual(llm.turns[1][1], "resp_1")
+
+
+if __name__ == "__main__":
+    unittest.main()
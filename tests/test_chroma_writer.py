@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+import unittest
+import sys
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+import chromadb
+
+import chroma_writer
+import embeddings
+from chunk_data.rag_chunk import RAGChunk
+
+
+def _chunk(i):
+    return RAGChunk(
+        text=f"def f{i}():\n    return {i}\n", file=f"m{i}.py", language="python", symbol_type="function",
+        symbol_name=f"f{i}", start_line=1, end_line=2, description=f"Returns {i}.", keywords=["n"],
+        chunk_type="python", repo_id="repo::test",
+    )
+
+
+class _Crash(Exception):
+    pass
+
+
+class TestChromaWriter(unittest.TestCase):
+
+    def setUp(self):
+        embeddings.set_embedder(embeddings.create_embedder("hashing", dim=16))
+        self.client = chromadb.EphemeralClient()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.tmp.name, "upsert.json")
+        self.chunks = [_chunk(i) for i in range(10)]
+
+    def tearDown(self):
+        for name in ("writer_test",):
+            try:
+                self.client.delete_collection(name)
+            except Exception:
+                pass
+        embeddings.set_embedder(None)
+        self.tmp.cleanup()
+
+    def _upsert(self, records, **kwargs):
+        return chroma_writer.bulk_upsert(records, "writer_test", client=self.client, batch_size=3,
+                                         checkpoint_path=self.checkpoint, progress=False, **kwargs)
+
+    def test_batches_are_bounded(self):
+        batches = list(chroma_writer._batches(self.chunks, batch_size=4, max_bytes=10 ** 9))
+        self.assertEqual([len(b) for b in batches], [4, 4, 2])
+        batches = list(chroma_writer._batches(self.chunks, batch_size=100, max_bytes=1200))
+        self.assertTrue(all(len(b) == 2 for b in batches))
+
+    def test_upsert_matches_per_chunk_items(self):
+        report = self._upsert(self.chunks)
+        self.assertEqual((report["written"], report["batches"]), (10, 4))
+        collection = self.client.get_collection("writer_test")
+        stored = collection.get(ids=[self.chunks[0].chunk_id()], include=["embeddings", "metadatas"])
+        expected = self.chunks[0].to_chroma_item()
+        self.assertEqual(stored["metadatas"][0], expected["metadata"])
+        self.assertEqual([round(v, 5) for v in stored["embeddings"][0]], [round(v, 5) for v in expected["embedding"]])
+
+    def test_resume_after_crash(self):
+        def crashing():
+            for i, chunk in enumerate(self.chunks):
+                if i == 7:
+                    raise _Crash()
+                yield chunk
+
+        with self.assertRaises(_Crash):
+            self._upsert(crashing())
+        # batches [0-2] and [3-5] are committed, [6] never filled a batch
+        report = self._upsert(self.chunks)
+        self.assertEqual((report["skipped"], report["written"]), (6, 4))
+        self.assertEqual(self.client.get_collection("writer_test").count(), 10)
+
+        self.assertEqual(self._upsert(self.chunks)["written"], 0)
+        self.assertEqual(self._upsert(self.chunks, restart=True)["written"], 10)
+        self.assertEqual(self.client.get_collection("writer_test").count(), 10)
+
+    def test_dump_items_keep_their_embeddings(self):
+        items = [c.to_json_item() for c in self.chunks[:4]]
+        items[0]["embedding"] = [1.0] + [0.0] * 15
+        self._upsert(items)
+        stored = self.client.get_collection("writer_test").get(ids=[items[0]["id"]], include=["embeddings"])
+        self.assertEqual(list(stored["embeddings"][0]), items[0]["embedding"])
+
+    def test_upsert_jsonl_rejects_other_embedder(self):
+        dump = os.path.join(self.tmp.name, "chunks.jsonl")
+        with open(dump, "w", encoding="utf-8") as f:
+            for chunk in self.chunks[:3]:
+                f.write(json.dumps(chunk.to_json_item()) + "\n")
+        embeddings.save_dump_signature(dump, "hashing:hash8")
+        with self.assertRaises(ValueError):
+            chroma_writer.upsert_jsonl(dump, "writer_test", client=self.client)
+
+        embeddings.save_dump_signature(dump, "hashing:hash16")
+        report = chroma_writer.upsert_jsonl(dump, "writer_test", client=self.client)
+        self.assertEqual(report["written"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
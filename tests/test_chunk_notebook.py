@@ -0,0 +1,62 @@
+import json
+import unittest
+import sys
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+from chunk_data.chunk_notebook import chunk_notebook_code, load_cells
+
+
+def _notebook(cells):
+    return json.dumps({"nbformat": 4, "nbformat_minor": 5, "metadata": {}, "cells": cells})
+
+
+CELLS = [
+    {"cell_type": "markdown", "metadata": {}, "source": ["# Hate detection\n", "Load the model first."],
+     "attachments": {"plot.png": {"image/png": "iVBORw0KGgo" * 500}}},
+    {"cell_type": "code", "metadata": {}, "execution_count": 1, "source": ["import os\n", "\n", "def load(path):\n", "    return open(path).read()\n"],
+     "outputs": [{"output_type": "display_data", "data": {"image/png": "iVBORw0KGgo" * 5000}}]},
+    {"cell_type": "code", "metadata": {}, "execution_count": 2, "source": "%matplotlib inline\ntext = load('a.txt')\nprint(len(text))",
+     "outputs": [{"output_type": "stream", "name": "stdout", "text": ["42\n"]}]},
+    {"cell_type": "raw", "metadata": {}, "source": "raw cell"},
+    {"cell_type": "code", "metadata": {}, "execution_count": 3, "source": "for x in range(3)\n    print(x)", "outputs": []},
+]
+
+
+class TestChunkNotebook(unittest.TestCase):
+
+    def setUp(self):
+        self.chunks = chunk_notebook_code(_notebook(CELLS), file_path="demo.ipynb", deferred_llm=True, max_tokens=512)
+
+    def test_outputs_and_attachments_are_dropped(self):
+        self.assertEqual([(i, t) for i, t, _ in load_cells(_notebook(CELLS))], [(0, "markdown"), (1, "code"), (2, "code"), (4, "code")])
+        for chunk in self.chunks:
+            self.assertNotIn("iVBORw0KGgo", chunk.text)
+            self.assertNotIn("42\n", chunk.text)
+
+    def test_definitions_go_through_the_ast_chunker(self):
+        function = next(c for c in self.chunks if c.symbol_type == "function")
+        self.assertEqual(function.symbol_name, "load")
+        self.assertIn("import os", function.text)
+        # line 6 of the percent script: cell 0 marker + 2 lines, cell 1 marker, import, blank
+        self.assertEqual((function.start_line, function.end_line), (7, 8))
+
+    def test_cell_groups(self):
+        groups = [c for c in self.chunks if c.symbol_type == "notebook_cells"]
+        # the definition-only cell 1 is left to the AST chunk, the broken cell 4 is kept as text
+        self.assertEqual([c.symbol_name for c in groups], ["demo.ipynb cell 0", "demo.ipynb cells 2-4"])
+        self.assertTrue(groups[0].text.startswith("# %% [markdown] [cell 0]\n# Hate detection\n"))
+        text = groups[1].text
+        self.assertTrue(text.startswith("# %% [cell 2]\n%matplotlib inline\n"))
+        self.assertIn("for x in range(3)\n", text)
+        self.assertNotIn("def load", text)
+
+    def test_markdown_starts_a_new_group(self):
+        cells = CELLS[:3] + [{"cell_type": "markdown", "metadata": {}, "source": "## Evaluate"}, CELLS[4]]
+        chunks = chunk_notebook_code(_notebook(cells), file_path="demo.ipynb", deferred_llm=True)
+        names = [c.symbol_name for c in chunks if c.symbol_type == "notebook_cells"]
+        self.assertEqual(names, ["demo.ipynb cell 0", "demo.ipynb cell 2", "demo.ipynb cells 3-4"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import sys
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+import chunk_data.rag_chunk as rc
+from chunk_data.chunk_table import ChunkTable, benchmark_chunk_memory
+
+
+def _chunk(i, language):
+    return rc.RAGChunk(
+        text=f"code {i}",
+        file="".join(["src/", "example.", language]),
+        language="".join([language]),
+        symbol_type="function",
+        symbol_name=f"f{i}",
+        start_line=i,
+        end_line=i + 1,
+        description="N.A",
+        keywords=["".join(["N", ".A"])],
+        chunk_type=language,
+        repo_id="repo::test",
+    )
+
+
+class TestChunkTable(unittest.TestCase):
+
+    def test_ragchunk_is_slotted_and_interned(self):
+        a, b = _chunk(1, "py"), _chunk(2, "py")
+        self.assertFalse(hasattr(a, "__dict__"))
+        self.assertIs(a.file, b.file)
+        self.assertIs(a.keywords[0], b.keywords[0])
+        self.assertEqual(a.meta["file"], "src/example.py")
+
+    def test_roundtrip_and_where(self):
+        chunks = [_chunk(i, "py" if i % 2 else "java") for i in range(10)]
+        table = ChunkTable.from_chunks(chunks)
+
+        self.assertEqual(len(table), 10)
+        self.assertEqual(table.categories("language"), ["java", "py"])
+        self.assertEqual(table.where(language="py"), [1, 3, 5, 7, 9])
+        self.assertEqual(table.where(language="go"), [])
+        self.assertEqual(table.row(3), chunks[3])
+        self.assertEqual(table.to_chunks(), chunks)
+
+    def test_benchmark_compact_layout_is_smaller(self):
+        results = benchmark_chunk_memory(n=2000, n_files=100)
+        self.assertLess(results["ragchunk"]["bytes"], results["plain_dataclass"]["bytes"])
+        self.assertLess(results["chunk_table"]["bytes"], results["plain_dataclass"]["bytes"])
+
+
+if __name__ == "__main__":
+    unittest.main()
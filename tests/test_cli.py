@@ -0,0 +1,33 @@
+import unittest
+import sys
+from unittest.mock import patch
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+import cli
+
+
+class TestCLI(unittest.TestCase):
+
+    def test_import_time_report_chunkers_stay_light(self):
+        for module in ("cli", "chunk_data.chunk_python", "chunk_data.chunk_java", "llm_wrapper"):
+            report = cli.import_time_report(module)
+            # timings depend on the machine, only the lazy imports are guaranteed
+            self.assertEqual(report["heavy"], [], module)
+
+    def test_parser(self):
+        args = cli.build_parser().parse_args(["query", "where is the hate model", "-c", "java_v2", "-c", "all_data_v1", "-k", "3"])
+        self.assertEqual(args.collection, ["java_v2", "all_data_v1"])
+        self.assertEqual(args.k, 3)
+        self.assertIs(args.func, cli.cmd_query)
+
+    def test_query_hyde_rejects_several_collections(self):
+        args = cli.build_parser().parse_args(["query", "q", "-c", "java_v2", "-c", "all_data_v1", "--hyde"])
+        with patch("RAG.query_results_hyde") as hyde, patch("RAG.query_results_federated") as federated:
+            self.assertEqual(args.func(args), 1)
+        hyde.assert_not_called()
+        federated.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+import embeddings
+import utils
+import chunk_data.rag_chunk as rc
+
+
+class TestEmbeddings(unittest.TestCase):
+
+    def tearDown(self):
+        embeddings.set_embedder(None)
+
+    def test_hashing_embedder_is_deterministic(self):
+        embedder = embeddings.HashingEmbedder(dim=64, batch_size=2)
+        vectors = embedder.embed_batch(["HateModel predict", "hate_model predict", "docker base image"])
+        self.assertEqual(len(vectors), 3)
+        self.assertEqual(len(vectors[0]), 64)
+        self.assertEqual(vectors[0], embeddings.HashingEmbedder(dim=64).embed("HateModel predict"))
+        same = sum(a * b for a, b in zip(vectors[0], vectors[1]))
+        other = sum(a * b for a, b in zip(vectors[0], vectors[2]))
+        self.assertGreater(same, other)
+
+    def test_backend_from_env(self):
+        with patch.dict(os.environ, {"EMBED_BACKEND": "hashing", "EMBED_DIM": "32"}):
+            embedder = embeddings.get_embedder()
+        self.assertIsInstance(embedder, embeddings.HashingEmbedder)
+        self.assertEqual(embedder.signature, "hashing:hash32")
+        self.assertEqual(len(utils.embed_ollama("foo")), 32)
+
+    def test_chunk_embedding_uses_configured_backend(self):
+        embeddings.set_embedder(embeddings.HashingEmbedder(dim=16))
+        chunk = rc.RAGChunk(
+            text="def foo(): pass",
+            file="src/example.py",
+            language="python",
+            symbol_type="function",
+            symbol_name="foo",
+            start_line=1,
+            end_line=1,
+            description="Does nothing.",
+            keywords=["foo"],
+            chunk_type="python",
+            repo_id="repo::test",
+        )
+        self.assertEqual(len(chunk.gen_embedding_meta()), 16)
+
+    def test_signature_mismatch_raises(self):
+        class Collection:
+            name = "java_v2"
+            metadata = None
+
+        embeddings.check_collection_signature(Collection(), embeddings.LEGACY_SIGNATURE)
+        with self.assertRaises(ValueError):
+            embeddings.check_collection_signature(Collection(), "hashing:hash1024")
+
+
+if __name__ == "__main__":
+    unittest.main()
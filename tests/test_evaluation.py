@@ -0,0 +1,78 @@
+import json
+import os
+import unittest
+import sys
+from unittest.mock import patch
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+import evaluation
+
+
+HATE = "src/data/duui-uima/duui-Hate/src/main/python/hatechecker.py"
+
+
+def _meta(file, symbol):
+    return {"file": file, "symbol_name": symbol}
+
+
+class TestEvaluation(unittest.TestCase):
+
+    def test_score_ranking(self):
+        expected = [{"file": "duui-Hate/src/main/python/hatechecker.py", "symbol": "HateCheck"}]
+        ranked = [_meta("other.py", "x"), _meta(HATE, "sigmoid"), _meta(HATE, "HateCheck")]
+        scores = evaluation.score_ranking(ranked, expected, k=3)
+        self.assertEqual(scores["recall"], 1.0)
+        self.assertAlmostEqual(scores["rr"], 1 / 3)
+        # file-only hit at rank 2 (gain 1) and full hit at rank 3 (gain 3) against the full hit at rank 1, file hit at rank 2
+        self.assertAlmostEqual(scores["ndcg"], (1 / 1.5849625 + 3 / 2) / (3 + 1 / 1.5849625), places=5)
+        self.assertEqual(evaluation.score_ranking(ranked, expected, k=2)["recall"], 0.0)
+
+    def test_ndcg_is_at_most_one(self):
+        expected = [{"file": "hatechecker.py", "symbol": "HateCheck"}]
+        for ranked in (
+            [_meta(HATE, "HateCheck"), _meta(HATE, "HateCheck"), _meta(HATE, "sigmoid")],
+            [_meta(HATE, "sigmoid"), _meta(HATE, "load"), _meta(HATE, "HateCheck")],
+        ):
+            self.assertLessEqual(evaluation.score_ranking(ranked, expected, k=3)["ndcg"], 1.0)
+        perfect = [_meta(HATE, "HateCheck"), _meta(HATE, "HateCheck")]
+        self.assertAlmostEqual(evaluation.score_ranking(perfect, expected, k=2)["ndcg"], 1.0)
+
+    def test_evaluate_retriever_reports_quality_and_latency(self):
+        queries = [
+            evaluation.EvalQuery("a", "hate model", [{"file": "hatechecker.py"}]),
+            evaluation.EvalQuery("b", "unrelated", [{"file": "missing.py"}]),
+        ]
+        result = {"metadatas": [[_meta(HATE, "HateCheck")]]}
+        calls = []
+        report = evaluation.evaluate_retriever("fake", lambda q: calls.append(q) or result, queries, k=5)
+        self.assertEqual(report["recall@5"], 0.5)
+        self.assertEqual(report["mrr"], 0.5)
+        self.assertGreaterEqual(report["p95_ms"], report["p50_ms"])
+        self.assertIn("peak_mem_mb", report)
+        # warmup, timed pass and memory pass
+        self.assertEqual(len(calls), 5)
+        self.assertIn("fake", evaluation.format_report([report]))
+
+    def test_run_evaluation_restores_rag_path(self):
+        seen = []
+        config = evaluation.EvalConfig("fake")
+        queries = [evaluation.EvalQuery("a", "hate model", [{"file": "hatechecker.py"}])]
+        with patch.dict(os.environ, {"RAG_PATH": "src/src/chroma"}), \
+             patch.object(evaluation.EvalConfig, "retriever", return_value=lambda q: seen.append(os.environ["RAG_PATH"]) or {}):
+            evaluation.run_evaluation(queries, [config], rag_path="/tmp/snapshot", measure_memory=False)
+            self.assertEqual(os.environ["RAG_PATH"], "src/src/chroma")
+        self.assertEqual(set(seen), {"/tmp/snapshot"})
+
+    def test_sample_queries_match_the_chunk_dump(self):
+        queries = evaluation.load_queries("src/data/eval/duui_queries.jsonl")
+        self.assertGreaterEqual(len(queries), 20)
+        with open("src/data/chunks_all_v1.jsonl", encoding="utf-8") as f:
+            metas = [json.loads(line)["metadata"] for line in f]
+        for query in queries:
+            for expected in query.expected:
+                self.assertTrue(any(evaluation.relevance(m, expected) == evaluation.FULL_MATCH for m in metas), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+import sys
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+import facets
+
+
+POM = """<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <version>1.2</version>
+  <properties><dkpro.version>2.4.0</dkpro.version></properties>
+  <dependencies>
+    <dependency>
+      <groupId>org.dkpro.core</groupId>
+      <artifactId>dkpro-core-api-segmentation-asl</artifactId>
+      <version>${dkpro.version}</version>
+    </dependency>
+    <dependency>
+      <groupId>org.texttechnologylab</groupId>
+      <artifactId>UIMATypeSystem</artifactId>
+    </dependency>
+  </dependencies>
+</project>
+"""
+
+DOCKERFILE = """ARG CUDA=11.8.0
+FROM nvidia/cuda:${CUDA}-runtime-ubuntu22.04 AS base
+RUN apt-get update && \\
+    apt-get install -y python3
+FROM base
+EXPOSE 9714/tcp 9715
+"""
+
+REQUIREMENTS = """# runtime
+torch==2.1.0
+Sentence_Transformers>=2.2 ; python_version >= "3.8"
+-r extra.txt
+"""
+
+TYPESYSTEM = """<?xml version="1.0" encoding="UTF-8"?>
+<typeSystemDescription xmlns="http://uima.apache.org/resourceSpecifier">
+  <types>
+    <typeDescription><name>org.texttechnologylab.annotation.Hate</name><supertypeName>uima.tcas.Annotation</supertypeName></typeDescription>
+  </types>
+</typeSystemDescription>
+"""
+
+
+class TestFacets(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        files = {
+            "duui-Hate/pom.xml": POM,
+            "duui-Hate/src/main/docker/Dockerfile": DOCKERFILE,
+            "duui-Hate/requirements.txt": REQUIREMENTS,
+            "duui-Hate/src/main/resources/TypeSystemHate.xml": TYPESYSTEM,
+            "duui-Sentiment/pom.xml": POM.replace("dkpro-core-api-segmentation-asl", "dkpro-core-api-sentiment"),
+            "duui-Sentiment/Dockerfile": "FROM python:3.10-slim\nEXPOSE 9714\n",
+        }
+        self.files = []
+        for name, text in files.items():
+            path = os.path.join(self.tmp.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            self.files.append(path)
+        self.store = facets.extract_facets(self.files)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parsers(self):
+        self.assertIn(("org.dkpro.core:dkpro-core-api-segmentation-asl", "2.4.0"), facets.parse_pom(POM))
+        parsed = facets.parse_dockerfile(DOCKERFILE)
+        self.assertEqual(parsed["images"], [("nvidia/cuda:11.8.0-runtime-ubuntu22.04", 2)])
+        self.assertEqual(parsed["ports"], [("9714", 6), ("9715", 6)])
+        self.assertEqual(
+            [(name, spec) for name, spec, _ in facets.parse_requirements(REQUIREMENTS)],
+            [("torch", "==2.1.0"), ("sentence-transformers", ">=2.2")],
+        )
+        self.assertEqual(facets.parse_typesystem(TYPESYSTEM), ["org.texttechnologylab.annotation.Hate"])
+        self.assertEqual(facets.parse_typesystem(POM), [])
+
+    def test_store_queries(self):
+        self.assertEqual(self.store.components(self.store.repo_ids("docker_gpu", "true")), ["duui-Hate"])
+        self.assertEqual(self.store.components(self.store.repo_ids("uima_type", "Hate")), ["duui-Hate"])
+        self.assertEqual(self.store.components(self.store.repo_ids("docker_expose", "9714")), ["duui-Hate", "duui-Sentiment"])
+        self.assertEqual(self.store.match({"docker_expose": "9714", "pip_requirement": "torch"}), self.store.repo_ids("uima_type", "Hate"))
+
+    def test_question_filters(self):
+        filters = facets.facets_for_question("Which annotators output the Hate type on a GPU?", self.store)
+        self.assertEqual(filters, {"docker_gpu": "true", "uima_type": "org.texttechnologylab.annotation.Hate"})
+        where = facets.facet_where(self.store.match(filters))
+        self.assertEqual(list(where), ["repo_id"])
+        self.assertEqual(facets.facets_for_question("How do I write a reader?", self.store), {})
+        self.assertEqual(facets.facets_for_question("list all repos that depend on torch", self.store), {"pip_requirement": "torch"})
+        # ordinary prose that happens to contain a type or package name is not filtered
+        self.assertEqual(facets.facets_for_question("How do I split a text into a Hate span with torch on the GPU?", self.store), {})
+
+    def test_save_load(self):
+        path = os.path.join(self.tmp.name, "facets.json")
+        self.store.save(path)
+        self.assertEqual(facets.FacetStore.load(path).facets, self.store.facets)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+from ingest_journal import RunJournal
+
+
+class TestRunJournal(unittest.TestCase):
+
+    def test_resume_after_crash(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, "chunks.jsonl")
+            with open(output, "w") as f:
+                f.write('{"id": "old"}\n')
+
+            journal = RunJournal(output)
+            self.assertEqual(journal.start(), set())
+            journal.record({"id": "a", "document": "A"})
+            journal.record({"id": "b", "document": "B"})
+            journal.close()
+            # crash: record written to the partial file but never journaled, torn line at the end
+            with open(journal.partial_path, "a") as f:
+                f.write('{"id": "c", "document": "C"}\n{"id": "d", "docu')
+
+            # the previous output is untouched until the run finishes
+            with open(output) as f:
+                self.assertEqual(f.read(), '{"id": "old"}\n')
+
+            journal = RunJournal(output)
+            self.assertEqual(journal.start(), {"a", "b"})
+            journal.record({"id": "c", "document": "C"})
+            journal.record({"id": "a", "document": "A"})
+            journal.finish()
+
+            with open(output) as f:
+                ids = [json.loads(line)["id"] for line in f]
+            self.assertEqual(ids, ["a", "b", "c"])
+            self.assertFalse(os.path.exists(journal.journal_path))
+            self.assertFalse(os.path.exists(journal.partial_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import json
+import os
+import tempfile
+import unittest
+import sys
+from unittest.mock import patch
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+import jsonl_stream
+import chunk_data.rag_chunk as rc
+
+
+def _item(i):
+    return {
+        "id": f"id::{i}",
+        "embedding": [0.5 * i, -1.25, 3e-05],
+        # the key text inside a document must not be touched
+        "document": f'x = {{"embedding": [{i}]}}\n',
+        "metadata": {"file": "a.py", "language": "python", "symbol_type": "function", "symbol_name": f"f{i}",
+                     "start_line": i, "end_line": i + 1, "description": "d", "keywords": "a, b",
+                     "chunk_type": "python", "repo_id": "repo::x"},
+    }
+
+
+class TestJsonlStream(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "chunks.jsonl")
+        self.items = [_item(i) for i in range(7)]
+        with open(self.path, "w", encoding="utf-8") as f:
+            for item in self.items:
+                f.write(json.dumps(item) + "\n")
+            f.write("\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_chunks_match_list_loader(self):
+        expected = rc.ragchunks_from_json_items(self.items)
+        self.assertEqual(list(jsonl_stream.iter_ragchunks(self.path, batch_size=3)), expected)
+        batches = list(jsonl_stream.iter_ragchunk_batches(self.path, batch_size=3))
+        self.assertEqual([len(b) for b in batches], [3, 3, 1])
+        self.assertEqual(batches[0][2].text, 'x = {"embedding": [2]}\n')
+
+    def test_projection_and_stdlib_fallback(self):
+        items = list(jsonl_stream.iter_jsonl_items(self.path, fields=("id", "document")))
+        self.assertEqual(items[1], {"id": "id::1", "document": self.items[1]["document"]})
+        with patch.object(jsonl_stream, "_orjson", None):
+            pairs = list(jsonl_stream.iter_embeddings(self.path))
+        self.assertEqual(pairs, [(item["id"], item["embedding"]) for item in self.items])
+
+    def test_workers_keep_order(self):
+        chunks = list(jsonl_stream.iter_ragchunks(self.path, batch_size=2, workers=2))
+        self.assertEqual([c.symbol_name for c in chunks], [f"f{i}" for i in range(7)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -63,5 +63,51 @@ class TestLLMWrapper(unittest.TestCase):
         mock_client.responses.parse.assert_called_once()
 
 
+    def test_retrieve_context_hyde_keeps_facet_filter(self):
+        with patch("llm_wrapper.OpenAI"):
+            wrapper = llm_wrapper.LLMWrapper()
+        with patch("llm_wrapper._facet_where", return_value={"repo_id": "r"}), \
+             patch("llm_wrapper.query_results_hyde", return_value={"ids": [[]]}) as hyde:
+            wrapper.retrieve_context("which components use torch", "all_data_v1", hyde=True)
+            with self.assertRaises(ValueError):
+                wrapper.retrieve_context("q", ["java_v2", "all_data_v1"], hyde=True)
+        self.assertEqual(hyde.call_args.kwargs["where"], {"repo_id": "r"})
+
+
+    def test_retrieve_context_rerank_keeps_n_results(self):
+        hits = {"ids": [[f"id{i}" for i in range(20)]], "documents": [[f"doc {i}" for i in range(20)]]}
+        with patch("llm_wrapper.OpenAI"):
+            wrapper = llm_wrapper.LLMWrapper()
+        with patch("llm_wrapper._facet_where", return_value=None), \
+             patch("llm_wrapper.query_results", return_value=hits) as query, \
+             patch("rerank.get_scorer", return_value=MagicMock(name="scorer")) as get_scorer, \
+             patch("rerank.rerank_results", return_value={"ids": [["id0"] * 7]}) as rerank_results:
+            wrapper.retrieve_context("q", "all_data_v1", rerank=True, n_results=7)
+        self.assertEqual(query.call_args.kwargs["n_results"], 20)
+        self.assertEqual(rerank_results.call_args.kwargs["n_results"], 7)
+        self.assertEqual(rerank_results.call_args.kwargs["fallback_n"], 7)
+        get_scorer.assert_called_once()
+
+    def test_code_assistant_rerank_falls_back_to_five_hits(self):
+        with patch("llm_wrapper.OpenAI"):
+            wrapper = llm_wrapper.LLMWrapper()
+        with patch.object(wrapper, "retrieve_context", return_value={}) as retrieve, \
+             patch("llm_wrapper.utils.load_prompt_template", return_value="{{rag_context}}\n{{user_input}}"):
+            wrapper.llm_code_assistant("how do I score text", "all_data_v1", rerank=True, symbol_fast_path=False)
+        self.assertEqual(retrieve.call_args.kwargs["n_results"], 5)
+        self.assertEqual(retrieve.call_args.kwargs["rerank_n"], 3)
+
+    def test_symbol_fast_path_can_be_disabled(self):
+        with patch("llm_wrapper.OpenAI"):
+            wrapper = llm_wrapper.LLMWrapper()
+        with patch("symbol_index.answer_location", return_value="X is defined in: a.py:1") as answer_location, \
+             patch("llm_wrapper.utils.load_prompt_template", return_value="{{rag_context}}\n{{user_input}}"):
+            self.assertEqual(wrapper.llm_code_assistant("Where is X defined?", "all_data_v1", rag_context=False), "X is defined in: a.py:1")
+            wrapper.llm_code_assistant("Where is X defined?", "all_data_v1", rag_context=False, symbol_fast_path=False)
+
+        answer_location.assert_called_once()
+        wrapper.client.responses.parse.assert_called_once()
+
+
 if __name__ == "__main__":
     unittest.main()
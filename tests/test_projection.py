@@ -0,0 +1,53 @@
+import unittest
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+from projection import EmbeddingProjection, projection_report
+from quantized_index import QuantizedIndex
+
+
+class TestProjection(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        # low rank data so PCA keeps most of the structure
+        self.embeddings = (rng.normal(size=(300, 16)) @ rng.normal(size=(16, 128))).astype(np.float32)
+
+    def test_pca_save_load_roundtrip(self):
+        projection = EmbeddingProjection.fit(self.embeddings, dim=16, method="pca")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "projection.npz")
+            projection.save(path)
+            loaded = EmbeddingProjection.load(path)
+        reduced = loaded.apply(self.embeddings[:5])
+        self.assertEqual(reduced.shape, (5, 16))
+        np.testing.assert_allclose(reduced, projection.apply(self.embeddings[:5]), rtol=1e-5)
+        self.assertEqual(len(loaded.apply_one(self.embeddings[0].tolist())), 16)
+
+    def test_truncate_and_dim_check(self):
+        projection = EmbeddingProjection.fit(self.embeddings, dim=8, method="truncate")
+        self.assertEqual(projection.apply(self.embeddings).shape, (300, 8))
+        with self.assertRaises(ValueError):
+            projection.apply(np.zeros((2, 64)))
+
+    def test_report_and_index_with_projection(self):
+        rows = projection_report(self.embeddings, self.embeddings[:10], dims=[16], k=5)
+        pca_row = [row for row in rows if row["method"] == "pca"][0]
+        self.assertGreaterEqual(pca_row["recall"], 0.9)
+
+        projection = EmbeddingProjection.fit(self.embeddings, dim=16)
+        ids = [f"id::{i}" for i in range(300)]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            QuantizedIndex.build(ids, self.embeddings, tmpdir, mode="int8", projection=projection)
+            index = QuantizedIndex.load(tmpdir)
+            self.assertEqual(index.dim, 16)
+            self.assertEqual(index.search(self.embeddings[4], k=1)[0][0], "id::4")
+
+
+if __name__ == "__main__":
+    unittest.main()
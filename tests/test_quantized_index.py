@@ -0,0 +1,43 @@
+import unittest
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+from quantized_index import QuantizedIndex
+
+
+class TestQuantizedIndex(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.embeddings = rng.normal(size=(500, 64)).astype(np.float32)
+        self.ids = [f"id::{i}" for i in range(500)]
+        self.queries = self.embeddings[:20] + rng.normal(scale=0.05, size=(20, 64))
+
+    def test_int8_search_matches_exact(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = QuantizedIndex.build(self.ids, self.embeddings, tmpdir, mode="int8")
+            report = index.recall_at_k(self.queries, k=5)
+            self.assertGreaterEqual(report["recall"], 0.95)
+            self.assertEqual(index.search(self.embeddings[3], k=1)[0][0], "id::3")
+            self.assertGreater(index.memory_report()["compression"], 3.5)
+
+    def test_binary_memory_and_reload(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            QuantizedIndex.build(self.ids, self.embeddings, tmpdir, mode="binary")
+            index = QuantizedIndex.load(tmpdir)
+            self.assertEqual(len(index), 500)
+            self.assertEqual(index.memory_report()["compression"], 32.0)
+            self.assertEqual(index.search(self.embeddings[7], k=1, rescore_factor=10)[0][0], "id::7")
+
+    def test_invalid_mode(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with self.assertRaises(ValueError):
+                QuantizedIndex.build(self.ids, self.embeddings, tmpdir, mode="pq")
+
+
+if __name__ == "__main__":
+    unittest.main()
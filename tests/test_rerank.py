@@ -0,0 +1,109 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+import rerank
+
+
+class KeywordScorer:
+    name = "keyword"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+
+    def score(self, query, documents):
+        self.calls.append(list(documents))
+        time.sleep(self.delay)
+        return [float(doc.count("HateCheck")) for doc in documents]
+
+
+def _result():
+    return {
+        "ids": [["a", "b", "c", "d"]],
+        "documents": [["class Other", "HateCheck HateCheck", "def unrelated", "HateCheck"]],
+        "metadatas": [[{"file": "a.py"}, {"file": "b.py"}, {"file": "c.py"}, {"file": "d.py"}]],
+        "distances": [[0.1, 0.2, 0.3, 0.4]],
+    }
+
+
+class TestRerank(unittest.TestCase):
+
+    def test_rerank_orders_by_score(self):
+        out = rerank.rerank_results("HateCheck", _result(), n_results=2, scorer=KeywordScorer(), cache=rerank.ScoreCache())
+
+        self.assertTrue(out["reranked"])
+        self.assertEqual(out["ids"], [["b", "d"]])
+        self.assertEqual(out["documents"][0][0], "HateCheck HateCheck")
+        self.assertEqual(out["distances"], [[0.2, 0.4]])
+        self.assertEqual(out["rerank_scores"], [[2.0, 1.0]])
+
+    def test_cached_scores_are_not_recomputed(self):
+        cache = rerank.ScoreCache()
+        scorer = KeywordScorer()
+        rerank.rerank_results("HateCheck", _result(), scorer=scorer, cache=cache, top_n=2)
+        # same question (other whitespace), one new candidate
+        rerank.rerank_results(" HateCheck ", _result(), scorer=scorer, cache=cache, top_n=3)
+
+        self.assertEqual(scorer.calls, [["class Other", "HateCheck HateCheck"], ["def unrelated"]])
+
+    def test_over_budget_keeps_first_stage_order(self):
+        cache = rerank.ScoreCache()
+        scorer = KeywordScorer(delay=0.3)
+        started = time.perf_counter()
+        out = rerank.rerank_results("HateCheck", _result(), n_results=3, scorer=scorer, budget_s=0.05, cache=cache)
+        elapsed = time.perf_counter() - started
+
+        self.assertFalse(out["reranked"])
+        self.assertEqual(out["ids"], [["a", "b", "c"]])
+        self.assertLess(elapsed, 0.25)
+
+        # the late scores land in the cache, the next call is reranked without scoring
+        time.sleep(0.4)
+        again = rerank.rerank_results("HateCheck", _result(), n_results=3, scorer=scorer, budget_s=0.05, cache=cache)
+        self.assertTrue(again["reranked"])
+        self.assertEqual(len(scorer.calls), 1)
+
+    def test_fallback_keeps_callers_hit_count(self):
+        scorer = KeywordScorer(delay=0.3)
+        out = rerank.rerank_results("HateCheck", _result(), n_results=2, scorer=scorer, budget_s=0.05, cache=rerank.ScoreCache(), fallback_n=4)
+        self.assertFalse(out["reranked"])
+        self.assertEqual(out["ids"], [["a", "b", "c", "d"]])
+
+        reranked = rerank.rerank_results("HateCheck", _result(), n_results=2, scorer=KeywordScorer(), cache=rerank.ScoreCache(), fallback_n=4)
+        self.assertEqual(reranked["ids"], [["b", "d"]])
+
+    def test_wrong_llm_score_count_keeps_first_stage_order(self):
+        out = rerank.rerank_results("HateCheck", _result(), n_results=2, scorer=rerank.LLMScorer(llm=self._llm([1.0])), cache=rerank.ScoreCache())
+        self.assertFalse(out["reranked"])
+        self.assertEqual(out["ids"], [["a", "b"]])
+
+    def test_cache_persists(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rerank.json")
+            cache = rerank.ScoreCache(path)
+            rerank.rerank_results("HateCheck", _result(), scorer=KeywordScorer(), cache=cache)
+            loaded = rerank.ScoreCache.load(path)
+
+        self.assertEqual(loaded.get_many("keyword", rerank.query_hash("HateCheck"), ["b", "x"]), {"b": 2.0})
+
+    def test_cache_evicts_oldest(self):
+        cache = rerank.ScoreCache(max_entries=2)
+        cache.put_many("s", "q", {"a": 1.0, "b": 2.0})
+        cache.put_many("s", "q", {"c": 3.0})
+        self.assertEqual(cache.get_many("s", "q", ["a", "b", "c"]), {"b": 2.0, "c": 3.0})
+
+    @staticmethod
+    def _llm(scores):
+        class FakeLLM:
+            def llm_rerank_scores(self, input_user, documents):
+                return scores
+        return FakeLLM()
+
+
+if __name__ == "__main__":
+    unittest.main()
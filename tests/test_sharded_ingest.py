@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+import unittest
+import sys
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+import embeddings
+import sharded_ingest
+
+
+SOURCES = {
+    f"mod_{i}.py": (
+        f'"""\nModule {i}.\n"""\n\n'
+        f"class Handler{i}:\n"
+        f"    def run(self, value):\n"
+        f"        total = value * {i}\n"
+        f"        return total + self.offset\n\n"
+        f"    def name(self):\n"
+        f"        return self._name\n\n\n"
+        f"def helper_{i}(items):\n"
+        f"    return [item + {i} for item in items if item]\n"
+    )
+    for i in range(8)
+}
+
+
+class TestShardedIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.files = []
+        for name, code in SOURCES.items():
+            path = os.path.join(self.tmp.name, name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(code)
+            self.files.append(path)
+        self._env = {key: os.environ.get(key) for key in ("EMBED_BACKEND", "EMBED_DIM")}
+        os.environ["EMBED_BACKEND"] = "hashing"
+        os.environ["EMBED_DIM"] = "32"
+        embeddings.set_embedder(None)
+
+    def tearDown(self):
+        for key, value in self._env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        embeddings.set_embedder(None)
+        self.tmp.cleanup()
+
+    def _ingest(self, n_shards, name):
+        out_dir = os.path.join(self.tmp.name, name)
+        for i in range(n_shards):
+            self.assertIsNotNone(sharded_ingest.ingest_shard(self.files, i, n_shards, out_dir, use_llm=False))
+        return out_dir
+
+    def test_partition_is_stable_and_complete(self):
+        shards = [sharded_ingest.shard_files(list(reversed(self.files)), i, 3) for i in range(3)]
+        self.assertEqual(sorted(f for shard in shards for f in shard), sorted(self.files))
+        self.assertEqual(shards, [sharded_ingest.shard_files(self.files, i, 3) for i in range(3)])
+        self.assertEqual(sharded_ingest.shard_of("a\\b.py", 5), sharded_ingest.shard_of("a/b.py", 5))
+
+    def test_merge_does_not_depend_on_shard_count(self):
+        single = os.path.join(self.tmp.name, "single.jsonl")
+        merged = os.path.join(self.tmp.name, "merged.jsonl")
+        sharded_ingest.merge_shards(self._ingest(1, "one"), 1, single)
+        report = sharded_ingest.merge_shards(self._ingest(3, "three"), 3, merged)
+
+        with open(single, "rb") as a, open(merged, "rb") as b:
+            self.assertEqual(a.read(), b.read())
+        self.assertEqual(report["files"], len(self.files))
+        self.assertEqual(report["duplicates"], 0)
+        self.assertEqual(report["embedding_model"], "hashing:hash32")
+        from embeddings import load_dump_signature
+        self.assertEqual(load_dump_signature(merged), "hashing:hash32")
+
+    def test_merge_rejects_modified_or_missing_shards(self):
+        out_dir = self._ingest(2, "two")
+        with open(sharded_ingest.shard_path(out_dir, 1, 2), "a", encoding="utf-8") as f:
+            f.write("{}\n")
+        with self.assertRaises(ValueError):
+            sharded_ingest.merge_shards(out_dir, 2, os.path.join(self.tmp.name, "out.jsonl"))
+        with self.assertRaises(ValueError):
+            sharded_ingest.merge_shards(out_dir, 3, os.path.join(self.tmp.name, "out.jsonl"))
+
+    def test_merge_rejects_other_token_counter(self):
+        out_dir = self._ingest(2, "tokens")
+        path = sharded_ingest.shard_path(out_dir, 1, 2) + sharded_ingest.MANIFEST_SUFFIX
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest["tokenizer"], "regex")
+        manifest["tokenizer"] = "tiktoken:o200k_base"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        with self.assertRaises(ValueError):
+            sharded_ingest.merge_shards(out_dir, 2, os.path.join(self.tmp.name, "out.jsonl"))
+
+    def test_run_local_uses_processes(self):
+        out_dir = os.path.join(self.tmp.name, "local")
+        manifests = sharded_ingest.run_local(self.files, 2, out_dir, use_llm=False)
+        self.assertEqual([m["shard"] for m in manifests], [0, 1])
+        report = sharded_ingest.merge_shards(out_dir, 2, os.path.join(self.tmp.name, "local.jsonl"))
+        self.assertEqual(report["chunks"], sum(m["count"] for m in manifests))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import ast
+import os
+import tempfile
+import unittest
+import sys
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+from chunk_data.chunk_java import chunk_java_code
+from chunk_data.chunk_python import chunk_python_code
+from cli import skeleton_token_report
+
+
+PY_CODE = '''class Model:
+    """Wraps the classifier."""
+    labels = ["hate", "none"]
+
+    def __init__(self, path):
+        self.path = path
+        self.loaded = False
+
+    @property
+    def name(self):
+        """Model name."""
+        return os.path.basename(self.path)
+'''
+
+JAVA_CODE = """public class Client {
+    private String url;
+
+    public Client(String url) {
+        this.url = url;
+        connect();
+    }
+}
+"""
+
+
+class TestSkeleton(unittest.TestCase):
+
+    def test_python_skeleton_references_method_chunks(self):
+        chunks = chunk_python_code(PY_CODE, deferred_llm=True, class_skeleton=True, include_header=False)
+        cls, init, name = chunks
+        ast.parse(cls.text)
+        self.assertIn('labels = ["hate", "none"]', cls.text)
+        self.assertIn('"""Model name."""', cls.text)
+        self.assertNotIn("self.loaded = False", cls.text)
+        self.assertIn(f"body in chunk {init.chunk_id()}", cls.text)
+        self.assertIn(f"body in chunk {name.chunk_id()}", cls.text)
+        self.assertEqual({init.parent_id, name.parent_id}, {cls.chunk_id()})
+
+    def test_full_mode_is_unchanged(self):
+        full = chunk_python_code(PY_CODE, deferred_llm=True, include_header=False)
+        self.assertEqual(full[0].text, PY_CODE)
+        self.assertEqual(full[1].parent_id, full[0].chunk_id())
+
+    def test_java_skeleton(self):
+        cls, ctor = chunk_java_code(JAVA_CODE, deferred_llm=True, class_skeleton=True, include_header=False)
+        self.assertEqual(cls.text, (
+            "public class Client {\n"
+            "    private String url;\n"
+            "\n"
+            "    public Client(String url) {\n"
+            f"        // ... body in chunk {ctor.chunk_id()}\n"
+            "    }\n"
+            "}\n"
+        ))
+
+    def test_token_report(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            body = "".join(f"        self.weight_{i} = path + {i}\n" for i in range(20))
+            with open(os.path.join(tmp, "model.py"), "w", encoding="utf-8") as f:
+                f.write(PY_CODE.replace("        self.loaded = False\n", body))
+            report = skeleton_token_report([tmp])
+        self.assertEqual(report["files"], 1)
+        self.assertLess(report["skeleton"]["classes"], report["full"]["classes"])
+        self.assertGreater(report["saved_tokens"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
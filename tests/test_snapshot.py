@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+import sys
+
+import numpy as np
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+import snapshot
+
+
+IDS = ["id::a", "id::b", "id::c"]
+DOCS = ["def a():\n    return 'ä'\n", "", "class C:\n    pass\n"]
+METAS = [
+    {"file": "a.py", "start_line": 1, "score": 0.5, "is_test": False},
+    {"file": "b.py", "start_line": 3, "score": 1, "is_test": True},
+    {"file": "c.py", "start_line": 7, "is_test": False},
+]
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "snap")
+        self.embeddings = np.random.default_rng(0).normal(size=(3, 8)).astype(np.float32)
+        self.manifest = snapshot.write_snapshot(self.path, IDS, DOCS, METAS, self.embeddings, embedding_model="hashing:hash8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        snap = snapshot.Snapshot.load(self.path)
+        self.assertEqual(snap.ids, IDS)
+        self.assertEqual(snap.documents(), DOCS)
+        self.assertEqual(snap.metadatas(), METAS)
+        np.testing.assert_array_equal(snap.embeddings, self.embeddings)
+        self.assertEqual(self.manifest["columns"], {"file": "str", "is_test": "bool", "score": "float", "start_line": "int"})
+        self.assertEqual((snap.embedding_model, len(snap)), ("hashing:hash8", 3))
+
+    def test_content_hash_is_deterministic_and_verified(self):
+        other = snapshot.write_snapshot(os.path.join(self.tmp.name, "other"), IDS, DOCS, METAS, self.embeddings, embedding_model="hashing:hash8")
+        self.assertEqual(other["content_hash"], self.manifest["content_hash"])
+        with open(os.path.join(self.path, "embeddings.npy"), "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            f.write(b"\x01")
+        with self.assertRaises(ValueError):
+            snapshot.Snapshot.load(self.path)
+
+    def test_import_to_chroma_keeps_vectors(self):
+        import chromadb
+
+        client = chromadb.PersistentClient(os.path.join(self.tmp.name, "chroma"))
+        collection = snapshot.import_to_chroma(self.path, "snapshot_test", client=client)
+        self.assertEqual(collection.count(), 3)
+        got = collection.get(ids=["id::b"], include=["embeddings", "metadatas"])
+        np.testing.assert_allclose(got["embeddings"][0], self.embeddings[1])
+        self.assertEqual(got["metadatas"][0]["start_line"], 3)
+
+        exported = snapshot.export_collection("snapshot_test", os.path.join(self.tmp.name, "again"), client=client)
+        self.assertEqual(exported["count"], 3)
+        self.assertEqual(snapshot.Snapshot.load(os.path.join(self.tmp.name, "again")).metadatas()[0], METAS[0])
+
+    def test_export_jsonl_uses_the_recorded_signature(self):
+        import json
+        from embeddings import save_dump_signature
+
+        dump = os.path.join(self.tmp.name, "chunks.jsonl")
+        with open(dump, "w", encoding="utf-8") as f:
+            for i, chunk_id in enumerate(IDS):
+                f.write(json.dumps({"id": chunk_id, "document": DOCS[i], "metadata": METAS[i], "embedding": self.embeddings[i].tolist()}) + "\n")
+
+        # no recorded signature and none given: refused instead of guessing
+        with self.assertRaises(ValueError):
+            snapshot.export_jsonl(dump, os.path.join(self.tmp.name, "none"))
+        manifest = snapshot.export_jsonl(dump, os.path.join(self.tmp.name, "given"), embedding_model="ollama:mxbai-embed-large")
+        self.assertEqual(manifest["embedding_model"], "ollama:mxbai-embed-large")
+
+        save_dump_signature(dump, "hashing:hash8")
+        manifest = snapshot.export_jsonl(dump, os.path.join(self.tmp.name, "recorded"))
+        self.assertEqual(manifest["embedding_model"], "hashing:hash8")
+        self.assertEqual(manifest["collection_metadata"], {"embedding_backend": "hashing:hash8"})
+        with self.assertRaises(ValueError):
+            snapshot.export_jsonl(dump, os.path.join(self.tmp.name, "mismatch"), embedding_model="ollama:mxbai-embed-large")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import sys
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+import utils
+from chunk_data.chunk_java import chunk_java_code
+from chunk_data.chunk_python import chunk_python_code
+
+
+STATEMENTS = "".join(f"    total += compute({i}, 'value number {i}', scale=factor * {i})\n" for i in range(80))
+PY_CODE = f'''import os
+
+
+def big(factor):
+    total = 0
+{STATEMENTS}    return total
+
+
+def small():
+    return 1
+'''
+
+BODY = "".join(f"        int v{i} = compute({i}, \"value number {i}\");\n" for i in range(60))
+JAVA_CODE = f"""package org.example;
+
+public class Big {{
+    public int run() {{
+{BODY}        return v1;
+    }}
+}}
+"""
+
+
+class TestSplit(unittest.TestCase):
+
+    def test_python_function_is_split_into_linked_parts(self):
+        chunks = chunk_python_code(PY_CODE, deferred_llm=True, max_tokens=256)
+        head, *parts, small = chunks
+        self.assertEqual((head.symbol_type, small.symbol_name), ("function", "small"))
+        self.assertGreater(len(parts), 2)
+        for part in parts:
+            self.assertEqual(part.symbol_type, "function_part")
+            self.assertEqual(part.parent_id, head.chunk_id())
+            self.assertLessEqual(utils.count_tokens(part.text), 256)
+            # the header only lives in the head chunk
+            self.assertNotIn("import os", part.text)
+        self.assertIn("import os", head.text)
+        self.assertLessEqual(utils.count_tokens(head.text), 256)
+        # parts overlap by one statement and cover the whole function
+        self.assertEqual(parts[0].start_line, head.end_line)
+        self.assertEqual(parts[-1].end_line, 86)
+
+    def test_small_symbols_are_unchanged(self):
+        plain = chunk_python_code(PY_CODE, deferred_llm=True)
+        self.assertEqual(plain[-1].text, chunk_python_code(PY_CODE, deferred_llm=True, max_tokens=256)[-1].text)
+        self.assertEqual(len(plain), 2)
+
+    def test_java_method_parts_link_to_method(self):
+        chunks = chunk_java_code(JAVA_CODE, deferred_llm=True, max_tokens=256)
+        method = next(c for c in chunks if c.symbol_type == "method")
+        parts = [c for c in chunks if c.symbol_type == "method_part"]
+        self.assertTrue(parts)
+        self.assertTrue(all(p.parent_id == method.chunk_id() for p in parts))
+        self.assertTrue(all(not p.text.startswith("package") for p in parts))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import sys
+from unittest.mock import Mock
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+from chunk_data.chunk_java import chunk_java_code
+from chunk_data.chunk_python import chunk_python_code
+from chunk_data.static_description import apply_static_description, describe_chunks, static_description
+
+
+PY_CODE = '''import os
+
+
+class Store:
+    """
+    Keeps the loaded hate speech models of the service in memory.
+    """
+
+    def get_path(self):
+        return self.path
+
+    def load(self, name):
+        model = os.path.join(self.path, name)
+        self.cache[name] = model
+        return model
+'''
+
+JAVA_CODE = """package org.texttechnologylab;
+
+/**
+ * Sends the {@code JCas} to the <b>remote</b> annotator and reads the response back.
+ */
+public class Client {
+    private String url;
+
+    public String getUrl() {
+        return url;
+    }
+}
+"""
+
+
+class TestStaticDescription(unittest.TestCase):
+
+    def _by_name(self, chunks):
+        return {c.symbol_name: c for c in chunks}
+
+    def test_python_tiers(self):
+        chunks = self._by_name(chunk_python_code(PY_CODE, file_path="src/store.py", deferred_llm=True))
+        doc = static_description(chunks["Store"])
+        self.assertEqual(doc.source, "docstring")
+        self.assertIn("Keeps the loaded hate speech models", doc.description)
+        self.assertIn("file:store.py", doc.keywords)
+        getter = static_description(chunks["Store.get_path"])
+        self.assertEqual((getter.source, getter.score), ("signature", 1.0))
+        self.assertIsNone(static_description(chunks["Store.load"]))
+
+    def test_javadoc_and_getter(self):
+        chunks = self._by_name(chunk_java_code(JAVA_CODE, file_path="Client.java", deferred_llm=True))
+        doc = static_description(chunks["Client"])
+        self.assertEqual(doc.source, "docstring")
+        self.assertIn("Sends the JCas to the remote annotator", doc.description)
+        self.assertEqual(static_description(chunks["Client.getUrl"]).source, "signature")
+
+    def test_docstring_preference_follows_min_score(self):
+        code = 'def get_path(self):\n    """\n    Model folder.\n    """\n    return self.path\n'
+        chunk = chunk_python_code(code, file_path="src/store.py", deferred_llm=True)[0]
+        self.assertEqual(static_description(chunk, min_score=0.9).source, "signature")
+        self.assertEqual(static_description(chunk, min_score=0.1).source, "docstring")
+
+    def test_only_low_scores_reach_the_llm(self):
+        chunks = chunk_python_code(PY_CODE, file_path="src/store.py", deferred_llm=True)
+        llm = Mock(return_value={"description": "Loads a model.", "keywords": ["load"]})
+        counts = describe_chunks(chunks, llm, min_score=0.5)
+        self.assertEqual(counts, {"docstring": 1, "signature": 1, "llm": 1})
+        llm.assert_called_once()
+        self.assertEqual(self._by_name(chunks)["Store.load"].description_source, "llm")
+        self.assertEqual(chunks[0].meta["description_source"], "docstring")
+
+    def test_threshold_is_configurable(self):
+        chunk = self._by_name(chunk_python_code(PY_CODE, file_path="src/store.py", deferred_llm=True))["Store"]
+        self.assertFalse(apply_static_description(chunk, min_score=1.1))
+        self.assertEqual(chunk.description_source, "none")
+
+
+if __name__ == "__main__":
+    unittest.main()
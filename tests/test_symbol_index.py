@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+import sys
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+from chunk_data.chunk_java import chunk_java_code
+from chunk_data.chunk_python import chunk_python_code
+from symbol_index import SymbolIndex, answer_location, candidate_names, is_location_question
+
+
+PY_CODE = '''import os
+from typing import List
+
+
+class HateChecker:
+    def classify(self, text):
+        return self.model(text)
+
+
+def load_model(path):
+    checker = HateChecker()
+    return checker
+'''
+
+JAVA_CODE = '''package org.texttechnologylab;
+
+import org.apache.uima.jcas.JCas;
+
+public class DUUIPipeline {
+    public void run(JCas jcas) {
+        System.out.println("run");
+    }
+}
+'''
+
+
+class TestSymbolIndex(unittest.TestCase):
+
+    def setUp(self):
+        chunks = chunk_python_code(PY_CODE, file_path="duui-Hate/hate.py", deferred_llm=True)
+        chunks += chunk_java_code(JAVA_CODE, file_path="duui-core/DUUIPipeline.java", deferred_llm=True)
+        self.index = SymbolIndex.from_chunks(chunks)
+
+    def test_definitions_imports_and_references(self):
+        hit = self.index.exact("HateChecker", kinds=("definition",))[0]
+        self.assertEqual((hit.file, hit.start_line, hit.end_line), ("duui-Hate/hate.py", 5, 7))
+        self.assertEqual(self.index.exact("classify")[0].name, "HateChecker.classify")
+
+        imports = {e.name: e.start_line for e in self.index.entries if e.kind == "import"}
+        self.assertEqual(imports, {"os": 1, "typing.List": 2, "org.apache.uima.jcas.JCas": 3})
+        refs = [e.start_line for e in self.index.exact("HateChecker", kinds=("reference",))]
+        self.assertEqual(refs, [11])
+
+    def test_lookup_modes(self):
+        self.assertEqual(self.index.lookup("hatechecker")[0], "exact")
+        mode, hits = self.index.lookup("load_mo")
+        self.assertEqual((mode, hits[0].name), ("prefix", "load_model"))
+        mode, hits = self.index.lookup("DUUIPipline")
+        self.assertEqual((mode, hits[0].name), ("fuzzy", "DUUIPipeline"))
+        self.assertEqual(self.index.lookup("nothing_like_it"), ("none", []))
+
+    def test_answer_location(self):
+        answer = answer_location("Where is the HateChecker class defined?", self.index)
+        self.assertIn("duui-Hate/hate.py:5-7", answer)
+        self.assertIn("duui-Hate/hate.py:11", answer)
+        self.assertIsNone(answer_location("Write a pipeline like DUUIPipeline", self.index))
+        self.assertIsNone(answer_location("Where is FooBarBaz defined?", self.index))
+        self.assertIn("duui-Hate/hate.py:10-12", answer_location("Where is `load_model` defined?", self.index))
+        # only exact matches of code-shaped identifiers are answered, the rest goes to the LLM
+        self.assertIsNone(answer_location("Where is HateCheck defined?", self.index))
+        self.assertIsNone(answer_location("Where is DUUIPipline defined?", self.index))
+        self.assertIsNone(answer_location("Where is the DUUI pipeline defined?", self.index))
+        self.assertIsNone(answer_location("Where is HateChecker defined and how does it classify text?", self.index))
+        self.assertIsNone(answer_location("Where is HateChecker defined? Explain the model.", self.index))
+
+    def test_question_parsing(self):
+        self.assertTrue(is_location_question("In which file is `load_model` declared?"))
+        self.assertFalse(is_location_question("How do I run a pipeline?"))
+        self.assertTrue(is_location_question("find the definition of HateChecker"))
+        # explanation questions mentioning a definition go to the LLM
+        self.assertFalse(is_location_question("what does the definition of `HateModel.predict` do?"))
+        self.assertFalse(is_location_question("how is `score` defined?"))
+        self.assertIsNone(answer_location("What does the definition of HateChecker do?", self.index))
+        self.assertEqual(candidate_names("where is the method HateChecker.classify"), ["HateChecker.classify"])
+        self.assertEqual(candidate_names("where is DUUI used in DUUIPipeline or load_model"), ["DUUIPipeline", "load_model"])
+
+    def test_save_load_merge(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "symbols.json")
+            self.index.save(path)
+            loaded = SymbolIndex.load(path)
+        self.assertEqual(loaded.entries, self.index.entries)
+        self.assertEqual(len(SymbolIndex.merge([loaded, self.index])), len(self.index))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import sys
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+from chunk_data.text_span import SourceBuffer, TextSpan
+from chunk_data.chunk_python import chunk_python_code
+from chunk_data.rag_chunk import RAGChunk
+
+
+CODE = '''import os
+
+
+def first(x):
+    return x + 1
+
+
+def second(y):
+    return y * 2
+'''
+
+
+class TestTextSpan(unittest.TestCase):
+
+    def test_span_matches_line_slice(self):
+        lines = CODE.splitlines(keepends=True)
+        buffer = SourceBuffer(CODE, lines)
+        span = buffer.span(4, 5, header="# hdr\n")
+        self.assertEqual(span.materialize(), "# hdr\n" + "".join(lines[3:5]))
+        self.assertEqual(len(span), len(span.materialize()))
+        # out of range lines are clamped
+        self.assertEqual(buffer.span(8, 99).body(), "".join(lines[7:]))
+
+    def test_chunks_share_one_buffer(self):
+        chunks = chunk_python_code(CODE, deferred_llm=True)
+        refs = [c.text_ref for c in chunks if isinstance(c.text_ref, TextSpan)]
+        self.assertGreaterEqual(len(refs), 2)
+        self.assertTrue(all(r.buffer is refs[0].buffer for r in refs))
+        self.assertTrue(all(r.header is refs[0].header for r in refs))
+        self.assertIn("def second", next(c.text for c in chunks if c.symbol_name == "second"))
+
+    def test_chunk_with_span_equals_chunk_with_text(self):
+        chunk = next(c for c in chunk_python_code(CODE, deferred_llm=True) if isinstance(c.text_ref, TextSpan))
+        copy = RAGChunk(chunk.text, chunk.file, chunk.language, chunk.symbol_type, chunk.symbol_name, chunk.start_line,
+                        chunk.end_line, chunk.description, chunk.keywords, chunk.chunk_type, chunk.repo_id,
+                        description_source=chunk.description_source, parent_id=chunk.parent_id)
+        self.assertEqual(copy, chunk)
+        self.assertIsInstance(copy.text_ref, str)
+        copy.text = "changed"
+        self.assertNotEqual(copy, chunk)
+        self.assertFalse(hasattr(copy, "__dict__"))
+
+
+if __name__ == "__main__":
+    unittest.main()
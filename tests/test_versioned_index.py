@@ -0,0 +1,150 @@
+import os
+import subprocess
+import tempfile
+import unittest
+import sys
+
+sys.path.insert(1, "/home/nev/Documents/Bachelor/DUUI-RagBot/src")
+
+import chromadb
+
+import embeddings
+import versioned_index
+
+
+V1 = {
+    "app/core.py": (
+        "class Scorer:\n"
+        "    def score(self, text):\n"
+        "        words = text.split()\n"
+        "        return len(words) * self.weight\n\n\n"
+        "def normalize(text):\n"
+        "    return ' '.join(text.lower().split())\n"
+    ),
+    "app/io.py": "def read(path):\n    with open(path) as f:\n        return f.read().strip()\n",
+    "README.md": "# App\n",
+}
+V2 = {
+    # normalize moved down, score and io.py changed
+    "app/core.py": (
+        "def tokenize(text):\n"
+        "    return [word for word in text.split() if word.isalnum()]\n\n\n"
+        "class Scorer:\n"
+        "    def score(self, text):\n"
+        "        words = tokenize(text)\n"
+        "        return len(words) * self.weight\n\n\n"
+        "def normalize(text):\n"
+        "    return ' '.join(text.lower().split())\n"
+    ),
+    "app/io.py": "def read(path):\n    with open(path, encoding='utf-8') as f:\n        return f.read().strip()\n",
+    "README.md": "# App\n",
+}
+
+
+class TestVersionedIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = os.path.join(self.tmp.name, "repo")
+        os.makedirs(self.repo)
+        self._git("init", "-q")
+        for tag, files in (("v1", V1), ("v2", V2)):
+            for path, code in files.items():
+                full = os.path.join(self.repo, path)
+                os.makedirs(os.path.dirname(full), exist_ok=True)
+                with open(full, "w", encoding="utf-8") as f:
+                    f.write(code)
+            self._git("add", "-A")
+            self._git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", tag)
+            self._git("tag", tag)
+        embeddings.set_embedder(embeddings.create_embedder("hashing", dim=32))
+        self.store = versioned_index.VersionStore(os.path.join(self.tmp.name, "store"))
+
+    def tearDown(self):
+        embeddings.set_embedder(None)
+        self.tmp.cleanup()
+
+    def _git(self, *args):
+        subprocess.run(["git", "-C", self.repo, *args], check=True, capture_output=True)
+
+    def _index(self, rev):
+        return versioned_index.index_version(self.store, self.repo, rev, repo="app", use_llm=False)
+
+    def test_second_version_reuses_unchanged_chunks(self):
+        first = self._index("v1")
+        second = self._index("v2")
+        self.assertEqual(first["chunks_new"], first["chunks"])
+        self.assertEqual(second["files_reused"], 1)
+        self.assertGreater(second["chunks_reused"], 0)
+        self.assertEqual(len(self.store), first["chunks"] + second["chunks_new"])
+
+        # the moved function keeps its hash but gets the line numbers of its version
+        lines = {}
+        for key in ("app@v1", "app@v2"):
+            for chunk_hash, start, *_ in self.store.versions[key]["chunks"]:
+                if self.store.get_item(chunk_hash)["metadata"]["symbol_name"] == "normalize":
+                    lines[key] = (chunk_hash, start)
+        self.assertEqual(lines["app@v1"][0], lines["app@v2"][0])
+        self.assertNotEqual(lines["app@v1"][1], lines["app@v2"][1])
+
+    def test_reindexing_a_version_adds_nothing(self):
+        self._index("v1")
+        count = len(self.store)
+        again = versioned_index.VersionStore(self.store.path)
+        stats = versioned_index.index_version(again, self.repo, "v1", repo="app", use_llm=False)
+        self.assertEqual(stats["files_reused"], stats["files"])
+        self.assertEqual(len(again), count)
+
+    def test_method_parent_points_to_class_hash(self):
+        self._index("v1")
+        items = [self.store.get_item(h) for h, *_ in self.store.versions["app@v1"]["chunks"]]
+        by_name = {item["metadata"]["symbol_name"]: item for item in items}
+        self.assertEqual(by_name["Scorer.score"]["metadata"]["parent_id"], by_name["Scorer"]["id"])
+
+    def test_chroma_filter_by_version(self):
+        self._index("v1")
+        self._index("v2")
+        client = chromadb.EphemeralClient()
+        collection = versioned_index.sync_to_chroma(self.store, "versions_test", client=client)
+        for key, where in (("app@v1", versioned_index.version_where("app", "v1")),
+                           ("app@v2", versioned_index.version_where("app", "v2"))):
+            ids = set(collection.get(where=where)["ids"])
+            self.assertEqual(ids, {h for h, *_ in self.store.versions[key]["chunks"]})
+        client.delete_collection("versions_test")
+
+    def test_version_query_has_lines_of_that_version(self):
+        self._index("v1")
+        self._index("v2")
+        client = chromadb.EphemeralClient()
+        collection = versioned_index.sync_to_chroma(self.store, "versions_lines", client=client)
+        lines = {}
+        for version in ("v1", "v2"):
+            result = collection.query(
+                query_embeddings=[embeddings.get_embedder().embed("normalize text")],
+                n_results=10,
+                where=versioned_index.version_where("app", version),
+            )
+            result = versioned_index.apply_version(result, "app", version)
+            metas = {meta["symbol_name"]: meta for meta in result["metadatas"][0]}
+            ids = {meta["symbol_name"]: chunk_id for meta, chunk_id in zip(result["metadatas"][0], result["ids"][0])}
+            lines[version] = (metas["normalize"]["start_line"], metas["normalize"]["end_line"])
+            self.assertEqual(metas["Scorer.score"]["parent_id"], ids["Scorer"])
+        self.assertEqual(lines, {"v1": (7, 8), "v2": (11, 12)})
+        client.delete_collection("versions_lines")
+
+    def test_store_rejects_other_settings(self):
+        self._index("v1")
+        again = versioned_index.VersionStore(self.store.path)
+        self.assertEqual(again.settings, {"embedding_model": "hashing:hash32", "max_tokens": again.settings["max_tokens"], "tokenizer": "regex"})
+        with self.assertRaises(ValueError):
+            versioned_index.index_version(again, self.repo, "v2", repo="app", max_tokens=17, use_llm=False)
+
+        embeddings.set_embedder(embeddings.create_embedder("hashing", dim=16))
+        with self.assertRaises(ValueError):
+            versioned_index.index_version(again, self.repo, "v2", repo="app", use_llm=False)
+        with self.assertRaises(ValueError):
+            versioned_index.sync_to_chroma(again, "versions_test", client=chromadb.EphemeralClient())
+
+
+if __name__ == "__main__":
+    unittest.main()